@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+import pytest
+
+# Keep the validation history and jobs of test runs out of the service's data directory
+DATA_DIR = tempfile.mkdtemp(prefix="ksml-tests-")
+os.environ.setdefault("KSML_HISTORY_DB", os.path.join(DATA_DIR, "history.db"))
+os.environ.setdefault("KSML_JOBS_DIR", os.path.join(DATA_DIR, "jobs"))
+os.environ.setdefault("KSML_JOBS_INPUT_ROOT", os.path.join(DATA_DIR, "inputs"))
+os.makedirs(os.environ["KSML_JOBS_INPUT_ROOT"], exist_ok=True)
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+import main
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Every TestClient request comes from "testclient"; keep the suite under the per-minute limit"""
+    main.rate_limit_storage.clear()
+    yield
@@ -0,0 +1,119 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app
+from action_catalog import ActionCatalog, CatalogError, compile_action
+
+client = TestClient(app)
+
+METADATA = {"id": "5f0c6c1e-8d1a-4c59-9a55-0f3c2b7d9e10", "author": "actions", "title": "Actions",
+            "created_at": "2024-01-01T00:00:00Z"}
+
+DEPLOY = {"target": "required", "target_pattern": "^[a-z-]+$", "value_types": ["string", "null"],
+          "options": ["region", "strategy"], "required_options": ["region"]}
+
+def write_catalog(directory, actions, name="core.json"):
+    path = directory / name
+    path.write_text(json.dumps({"actions": actions}))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # a visible mtime change
+
+def steps(*parameter_sets, action="deploy_service"):
+    return [{"name": "Step", "action": action, "parameters": parameters} for parameters in parameter_sets]
+
+class TestCompile:
+    """action_catalog.compile_action"""
+
+    def test_valid_parameters(self):
+        check = compile_action("deploy_service", DEPLOY)
+        assert check({"target": "api", "value": None, "options": {"region": "eu"}}) == []
+
+    def test_violations(self):
+        check = compile_action("deploy_service", DEPLOY)
+        issues = dict(check({"target": "API!", "value": 3, "options": {"color": "red"}}))
+        assert set(issues) == {"target", "value", "options.color", "options"}
+        assert issues["value"] == "action 'deploy_service' takes a string or null value"
+        assert dict(check({})).keys() == {"target", "options"}
+
+    def test_forbidden_target_and_required_value(self):
+        check = compile_action("noop", {"target": "forbidden", "value_required": True})
+        assert [path for path, _ in check({"target": "x"})] == ["target", "value"]
+
+    @pytest.mark.parametrize("spec", [
+        [], {"target": "sometimes"}, {"value_types": ["integer"]}, {"options": "region"},
+        {"target_pattern": "("}, {"colour": "red"},
+    ])
+    def test_malformed_entries(self, spec):
+        with pytest.raises(CatalogError):
+            compile_action("bad", spec)
+
+class TestCatalog:
+    """action_catalog.ActionCatalog"""
+
+    def test_dispatch_and_unknown_actions(self, tmp_path):
+        write_catalog(tmp_path, {"deploy_service": DEPLOY})
+        catalog = ActionCatalog(str(tmp_path), check_interval=0)
+        issues = catalog.validate_steps(steps({"target": "api", "options": {"region": "eu"}}, {"target": "api"})
+                                        + steps({"anything": 1}, action="other"))
+        assert [issue.path for issue in issues] == ["steps.1.parameters.options"]
+        catalog.strict = True
+        assert catalog.validate_steps(steps({}, action="other"))[0].path == "steps.0.action"
+
+    def test_hot_reload(self, tmp_path):
+        reloads = []
+        write_catalog(tmp_path, {"deploy_service": DEPLOY})
+        catalog = ActionCatalog(str(tmp_path), check_interval=0, on_reload=lambda: reloads.append(1))
+        assert len(catalog.validate_steps(steps({"target": "api"}))) == 1
+
+        write_catalog(tmp_path, {"deploy_service": {"target": "required"}})
+        assert catalog.validate_steps(steps({"target": "api"})) == []
+        assert catalog.stats()["reloads"] == 2 and len(reloads) == 2
+
+        (tmp_path / "broken.json").write_text("{not json")
+        assert catalog.validate_steps(steps({})) != []  # previous catalog still in force
+        assert catalog.stats()["last_error"].startswith("broken.json")
+        assert len(reloads) == 2
+
+        (tmp_path / "broken.json").unlink()
+        write_catalog(tmp_path, {"deploy_service": {}}, name="other.json")
+        catalog.validate_steps(steps({}))
+        assert "already defined" in catalog.stats()["last_error"]
+
+    def test_check_interval(self, tmp_path):
+        write_catalog(tmp_path, {"deploy_service": DEPLOY})
+        catalog = ActionCatalog(str(tmp_path), check_interval=3600)
+        catalog.refresh(force=True)
+        write_catalog(tmp_path, {})
+        assert catalog.refresh() is False and len(catalog) == 1
+        assert catalog.refresh(force=True) is True and len(catalog) == 0
+
+class TestService:
+    """KSML_011 in /validate, from schema/actions"""
+
+    def document(self, *step_list):
+        return {"ksml_version": "0.2.0", "metadata": METADATA, "configurations": {}, "steps": list(step_list)}
+
+    def test_showcase_valid(self):
+        showcase = json.loads((Path(__file__).parent.parent / "examples" / "valid_v02_showcase.ksml.json").read_text())
+        assert client.post("/validate", json=showcase).json()["valid"] is True
+
+    def test_catalog_violation(self):
+        doc = self.document({"name": "Init", "action": "system_init", "parameters": {"target": "main", "value": "yes"}})
+        result = client.post("/validate", json=doc).json()
+        assert result["valid"] is False
+        assert [(e["code"], e["path"]) for e in result["errors"]] == [("KSML_011", "steps.0.parameters.value")]
+
+    def test_v01_not_checked(self):
+        doc = {**self.document({"name": "Init", "action": "system_init", "parameters": {}}), "ksml_version": "0.1.0"}
+        assert client.post("/validate", json=doc).json()["valid"] is True
+
+    def test_stats_exposed(self):
+        stats = client.get("/admin/actions").json()
+        assert stats["actions"] >= 2 and stats["last_error"] is None
@@ -0,0 +1,147 @@
+import asyncio
+import sys
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app, ADMISSION
+from admission import AdmissionLane, AdmissionRejected, estimate_cost
+
+client = TestClient(app)
+
+DOC = {
+    "ksml_version": "0.2.0",
+    "metadata": {
+        "id": "550e8400-e29b-41d4-a716-446655440000",
+        "author": "Test",
+        "title": "Admission Test",
+        "created_at": "2024-01-01T00:00:00Z"
+    },
+    "configurations": {},
+    "steps": [{"name": "test", "action": "test", "parameters": {}}]
+}
+
+class TestAdmissionLane:
+    """Concurrency limits, bounded queues and cost accounting"""
+
+    def test_queue_then_reject(self):
+        async def run():
+            lane = AdmissionLane("single", max_concurrency=1, capacity=10, max_queue=1, max_wait=1)
+            release = asyncio.Event()
+            order = []
+
+            async def hold(tag):
+                async with lane.admit():
+                    order.append(tag)
+                    await release.wait()
+
+            first = asyncio.create_task(hold("first"))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(hold("second"))
+            await asyncio.sleep(0)
+
+            with pytest.raises(AdmissionRejected) as info:
+                async with lane.admit():
+                    pass
+            assert info.value.reason == "queue full"
+            assert info.value.retry_after >= 1
+
+            release.set()
+            await asyncio.gather(first, second)
+            return lane, order
+
+        lane, order = asyncio.run(run())
+        assert order == ["first", "second"]
+        assert lane.stats()["active"] == 0
+        assert lane.stats()["rejected"] == 1
+        assert lane.stats()["queued"] == 1
+
+    def test_wait_timeout(self):
+        async def run():
+            lane = AdmissionLane("batch", max_concurrency=1, capacity=10, max_queue=4, max_wait=0.05)
+            async with lane.admit():
+                with pytest.raises(AdmissionRejected) as info:
+                    async with lane.admit():
+                        pass
+            return lane, info.value
+
+        lane, rejection = asyncio.run(run())
+        assert rejection.reason == "wait timeout"
+        assert lane.stats()["queued_now"] == 0
+        assert lane.stats()["cost_in_use"] == 0
+
+    def test_head_leaving_wakes_next(self):
+        async def run():
+            lane = AdmissionLane("batch", max_concurrency=10, capacity=4, max_queue=4, max_wait=5)
+            admitted = asyncio.Event()
+
+            async def small():
+                async with lane.admit(1):
+                    admitted.set()
+
+            async with lane.admit(2):
+                large = asyncio.create_task(lane.admit(4).__aenter__())
+                await asyncio.sleep(0)
+                waiter = asyncio.create_task(small())
+                await asyncio.sleep(0)
+                assert lane.stats()["queued_now"] == 2
+                # The small request fits but waits behind the large one; it must not outlast it
+                large.cancel()
+                await asyncio.wait_for(admitted.wait(), 1)
+                await waiter
+            return lane
+
+        lane = asyncio.run(run())
+        assert lane.stats()["queued_now"] == 0 and lane.stats()["cost_in_use"] == 0
+
+    def test_cost_limits_concurrency(self):
+        async def run():
+            lane = AdmissionLane("batch", max_concurrency=10, capacity=4, max_queue=0, max_wait=1)
+            async with lane.admit(3):
+                with pytest.raises(AdmissionRejected):
+                    async with lane.admit(2):
+                        pass
+                async with lane.admit(1):
+                    assert lane.cost_in_use == 4
+
+        asyncio.run(run())
+
+    def test_estimate_cost(self):
+        assert estimate_cost(0, 0) == 1
+        assert estimate_cost(256 * 1024, 100) > estimate_cost(1024, 1)
+        assert estimate_cost(0, 0, documents=10) == 10
+
+class TestLoadShedding:
+    """Saturated lanes answer 503 with Retry-After"""
+
+    def test_single_lane_sheds(self):
+        lane = ADMISSION["single"]
+        saved = lane.active, lane.max_queue
+        lane.active, lane.max_queue = lane.max_concurrency, 0
+        try:
+            response = client.post("/validate", json=DOC)
+        finally:
+            lane.active, lane.max_queue = saved
+
+        assert response.status_code == 503
+        assert int(response.headers["retry-after"]) >= 1
+
+    def test_batch_lane_does_not_block_single(self):
+        lane = ADMISSION["batch"]
+        saved = lane.active, lane.max_queue
+        lane.active, lane.max_queue = lane.max_concurrency, 0
+        try:
+            batch = client.post("/validate/batch", json={"documents": [DOC]})
+            single = client.post("/validate", json=DOC)
+        finally:
+            lane.active, lane.max_queue = saved
+
+        assert batch.status_code == 503
+        assert single.status_code == 200
+        assert single.json()["valid"] is True
+
+    def test_health_reports_lanes(self):
+        health = client.get("/health").json()
+        assert set(health["admission"]) == {"single", "batch"}
@@ -0,0 +1,135 @@
+import io
+import json
+import sys
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+import main
+from main import app
+from archive_ingest import ArchiveError, ArchiveTooLarge, iter_members
+
+client = TestClient(app)
+
+EXAMPLES = sorted((Path(__file__).parent.parent / "examples").glob("*.json"))
+
+def make_tar(files, mode="w:gz"):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+def example_files(prefix="docs/"):
+    return {prefix + path.name: path.read_bytes() for path in EXAMPLES}
+
+class TestArchiveEndpoint:
+    """POST /validate/archive"""
+
+    @pytest.mark.parametrize("build", [make_tar, make_zip])
+    def test_results_keyed_by_path(self, build):
+        files = example_files()
+        files["docs/README.md"] = b"not a document"
+        response = client.post("/validate/archive", content=build(files))
+        assert response.status_code == 200
+        body = response.json()
+        assert set(body["results"]) == {name for name in files if name.endswith(".json")}
+        for name, result in body["results"].items():
+            assert result["valid"] == ("/valid_" in name), name
+        assert body["summary"]["documents"] == len(EXAMPLES)
+        assert body["summary"]["valid"] + body["summary"]["invalid"] == len(EXAMPLES)
+
+    def test_matches_single_validation(self):
+        path = EXAMPLES[0]
+        single = client.post("/validate", content=path.read_bytes(), headers={"content-type": "application/json"}).json()
+        archived = client.post("/validate/archive", content=make_tar({path.name: path.read_bytes()})).json()
+        assert archived["results"][path.name] == single
+
+    def test_unparseable_member(self):
+        body = client.post("/validate/archive", content=make_zip({"broken.json": b"{nope"})).json()
+        result = body["results"]["broken.json"]
+        assert result["valid"] is False
+        assert result["errors"][0]["code"] == "KSML_001"
+
+    def test_duplicate_paths_rejected(self):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as archive:
+            for name, data in [("a.json", EXAMPLES[0].read_bytes()), ("./a.json", b"{nope"), ("b.json", b"{}")]:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        body = client.post("/validate/archive", content=buffer.getvalue()).json()
+        assert set(body["results"]) == {"a.json", "b.json"}
+        assert "More than one archive member" in body["results"]["a.json"]["errors"][0]["message"]
+        assert body["summary"] == {"valid": 0, "invalid": 2, "documents": 2}
+
+    def test_member_that_raises_keeps_its_result(self, monkeypatch):
+        validate = main.validate_raw_document
+
+        def flaky(data, client_ip):
+            if data == b'{"explode": true}':
+                raise RuntimeError("boom")
+            return validate(data, client_ip)
+
+        monkeypatch.setattr(main, "validate_raw_document", flaky)
+        files = {"good.json": EXAMPLES[0].read_bytes(), "bad.json": b'{"explode": true}'}
+        body = client.post("/validate/archive", content=make_zip(files)).json()
+        assert set(body["results"]) == {"good.json", "bad.json"}
+        assert body["results"]["bad.json"]["errors"][0]["code"] == "KSML_001"
+        assert body["summary"]["documents"] == body["summary"]["valid"] + body["summary"]["invalid"] == 2
+
+    def test_oversized_member(self):
+        big = b'{"padding": "' + b"x" * (main.MAX_DOCUMENT_SIZE + 1) + b'"}'
+        files = {"big.json": big, "ok.json": EXAMPLES[0].read_bytes()}
+        body = client.post("/validate/archive", content=make_tar(files)).json()
+        assert body["results"]["big.json"]["errors"][0]["code"] == "KSML_004"
+        assert "exceeds" in body["results"]["big.json"]["errors"][0]["message"]
+        assert "ok.json" in body["results"]
+
+    def test_decompression_bomb(self, monkeypatch):
+        monkeypatch.setattr(main, "ARCHIVE_MAX_TOTAL_BYTES", 1024 * 1024)
+        files = {f"bomb/{i}.json": b" " * (main.MAX_DOCUMENT_SIZE - 1) for i in range(200)}
+        response = client.post("/validate/archive", content=make_tar(files))
+        assert response.status_code == 413
+
+    def test_too_many_members(self, monkeypatch):
+        monkeypatch.setattr(main, "ARCHIVE_MAX_MEMBERS", 3)
+        response = client.post("/validate/archive", content=make_zip(example_files()))
+        assert response.status_code == 413
+
+    def test_not_an_archive(self):
+        response = client.post("/validate/archive", content=b"definitely not an archive")
+        assert response.status_code == 400
+
+class TestIterMembers:
+    """archive_ingest.iter_members"""
+
+    @pytest.mark.parametrize("mode", ["w", "w:gz", "w:bz2", "w:xz"])
+    def test_tar_compressions(self, mode):
+        data = make_tar({"./a.json": b"{}", "b.txt": b"skip"}, mode=mode)
+        members = list(iter_members(io.BytesIO(data), 100, 1000, 10))
+        assert [(m.path, m.data, m.error) for m in members] == [("a.json", b"{}", None)]
+
+    def test_zip_budget_counts_actual_bytes(self):
+        data = make_zip({f"{i}.json": b"0" * 100 for i in range(5)})
+        with pytest.raises(ArchiveTooLarge):
+            list(iter_members(io.BytesIO(data), 100, 250, 10))
+
+    def test_truncated_archive(self):
+        data = make_tar({"a.json": b"{}" * 5000})
+        with pytest.raises(ArchiveError):
+            list(iter_members(io.BytesIO(data[: len(data) // 2]), 100000, 1000000, 10))
@@ -0,0 +1,123 @@
+import json
+import sys
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app
+from ksml_binary import MAGIC, MEDIA_TYPE, BinaryDecodeError, decode, encode
+
+client = TestClient(app)
+
+EXAMPLES = sorted((Path(__file__).parent.parent / "examples").glob("*.json"))
+BINARY = {"content-type": MEDIA_TYPE}
+
+def load(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+class TestRoundTrip:
+    """encode/decode preserves the JSON data model exactly"""
+
+    @pytest.mark.parametrize("path", EXAMPLES, ids=lambda p: p.name)
+    def test_examples(self, path):
+        document = load(path)
+        encoded = encode(document)
+        assert decode(encoded) == document
+        assert len(encoded) < len(json.dumps(document, separators=(",", ":")).encode("utf-8"))
+
+    @pytest.mark.parametrize("value", [
+        None, True, False, 0, 30, 31, 1000, -1, -31, -(2 ** 63), 2 ** 64 - 1, 1.5, -0.0, 1e300,
+        "", "x" * 31, "ünïcödé ✓", [], {}, [[[]]], {"": {"a": [1, "b", None]}},
+    ])
+    def test_scalars_and_containers(self, value):
+        decoded = decode(encode(value))
+        assert decoded == value
+        assert type(decoded) is type(value)
+
+    def test_key_order_is_preserved(self):
+        document = {"steps": [], "ksml_version": "0.2.0", "zeta": 1, "alpha": 2}
+        assert list(decode(encode(document))) == list(document)
+
+    def test_interning(self):
+        steps = [{"name": f"s{i}", "action": "deploy_service", "custom_key": "shared", "on_failure": "retry"}
+                 for i in range(50)]
+        encoded = encode({"ksml_version": "0.2.0", "steps": steps})
+        assert encoded.count(b"deploy_service") == 1
+        assert encoded.count(b"custom_key") == 1
+        assert b"on_failure" not in encoded and b"retry" not in encoded
+        assert decode(encoded)["steps"] == steps
+
+    def test_many_distinct_keys(self):
+        document = {f"key_{i}": i for i in range(500)}
+        assert decode(encode(document)) == document
+
+    def test_unsupported_types(self):
+        with pytest.raises(TypeError):
+            encode({"when": object()})
+        with pytest.raises(TypeError):
+            encode({1: "x"})
+        with pytest.raises(ValueError):
+            encode(2 ** 64)
+
+class TestMalformedInput:
+    """The decoder rejects hostile payloads with BinaryDecodeError"""
+
+    @pytest.mark.parametrize("payload", [
+        b"",
+        b"{}",
+        MAGIC,
+        MAGIC + b"\xff",
+        MAGIC + b"\x00\x00",  # trailing bytes
+        MAGIC + b"\x63",  # string of 3 bytes, none present
+        MAGIC + b"\x9f\x7f",  # reference to unknown string
+        MAGIC + b"\x3f" + b"\xff" * 12,  # overlong varint
+        MAGIC + b"\xdf\xff\xff\xff\xff\x0f",  # object claiming 4 billion entries
+        MAGIC + b"\xa1" * 100 + b"\xa0",  # nesting bomb
+        MAGIC + b"\x62\xff\xfe",  # invalid UTF-8
+    ])
+    def test_rejected(self, payload):
+        with pytest.raises(BinaryDecodeError):
+            decode(payload)
+
+    def test_reference_bomb(self):
+        # One 100 KB string, then 20,000 one-byte references to it: 2 GB once serialized
+        payload = encode(["x" * 100_000] * 20_001)
+        assert len(payload) < 130_000
+        with pytest.raises(BinaryDecodeError, match="exceeds"):
+            decode(payload)
+        assert len(decode(payload, max_size=3_000_000_000)) == 20_001
+        with pytest.raises(BinaryDecodeError):
+            decode(encode({"k" * 1000: {"k" * 1000: 1}}), max_size=1500)  # keys count too
+
+class TestBinaryEndpoints:
+    """/validate and /validate/batch accept application/x-ksml-binary"""
+
+    @pytest.mark.parametrize("path", EXAMPLES, ids=lambda p: p.name)
+    def test_same_result_as_json(self, path):
+        document = load(path)
+        if not isinstance(document, dict):
+            pytest.skip("not an object")
+        via_json = client.post("/validate", json=document)
+        via_binary = client.post("/validate", content=encode(document), headers=BINARY)
+        assert via_binary.status_code == via_json.status_code
+        assert via_binary.content == via_json.content
+
+    def test_batch(self):
+        documents = [load(path) for path in EXAMPLES[:3]]
+        via_json = client.post("/validate/batch", json={"documents": documents})
+        via_binary = client.post("/validate/batch", content=encode({"documents": documents}), headers=BINARY)
+        assert via_binary.status_code == 200
+        assert via_binary.content == via_json.content
+
+    def test_reference_bomb_refused(self):
+        bomb = encode({"ksml_version": "0.2.0", "steps": ["x" * 100_000] * 20_001})
+        response = client.post("/validate", content=bomb, headers=BINARY)
+        assert response.status_code == 400
+        assert "exceeds" in response.json()["detail"]
+
+    def test_malformed_payload(self):
+        response = client.post("/validate", content=MAGIC + b"\xff", headers=BINARY)
+        assert response.status_code == 400
+        assert "KSML binary" in response.json()["detail"]
@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+import main
+from main import app, METRICS, validate_single_document
+from budget import BudgetExceeded, ValidationBudget
+
+client = TestClient(app)
+
+DOC = {
+    "ksml_version": "0.2.0",
+    "metadata": {
+        "id": "550e8400-e29b-41d4-a716-446655440000",
+        "author": "Test",
+        "title": "Budget Test",
+        "created_at": "2024-01-01T00:00:00Z"
+    },
+    "configurations": {},
+    "steps": [{"name": f"step_{i}", "action": "test", "parameters": {"target": "t" * 100}} for i in range(100)]
+}
+
+class TestValidationBudget:
+    """Per-request and per-document time budgets"""
+
+    def test_exhausted_budget_stops_cleanly(self):
+        before = METRICS["budget_exceeded"]
+        result = validate_single_document(DOC, "test", ValidationBudget(0))
+
+        assert result.valid is False
+        assert len(result.errors) == 1
+        assert result.errors[0].code == "KSML_008"
+        assert result.errors[0].path == "root"
+        assert "safety checks" in result.errors[0].message
+        assert METRICS["budget_exceeded"] == before + 1
+
+    def test_budget_applies_to_v01_schema_loop(self):
+        doc = {**DOC, "ksml_version": "0.1.0"}
+        result = validate_single_document(doc, "test", ValidationBudget(0))
+        assert [e.code for e in result.errors] == ["KSML_008"]
+
+    def test_generous_budget_is_transparent(self):
+        result = validate_single_document(DOC, "test", ValidationBudget(60))
+        assert result.valid is True
+
+    def test_child_never_outlives_parent(self):
+        parent = ValidationBudget(0)
+        child = parent.child(60)
+        assert child.deadline <= parent.deadline
+        try:
+            child.check()
+            assert False, "expected BudgetExceeded"
+        except BudgetExceeded as e:
+            assert e.stage == "validation"
+
+    def test_endpoint_reports_budget_error(self, monkeypatch):
+        monkeypatch.setattr(main, "DOCUMENT_BUDGET_SECONDS", 0)
+        response = client.post("/validate", json=DOC)
+
+        assert response.status_code == 200
+        res = response.json()
+        assert res["valid"] is False
+        assert res["errors"][0]["code"] == "KSML_008"
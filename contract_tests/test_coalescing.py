@@ -0,0 +1,138 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app, METRICS
+from coalescing import SingleFlight, validation_key
+
+client = TestClient(app)
+
+DOC = {
+    "ksml_version": "0.2.0",
+    "metadata": {
+        "id": "550e8400-e29b-41d4-a716-446655440000",
+        "author": "Test",
+        "title": "Coalescing Test",
+        "created_at": "2024-01-01T00:00:00Z"
+    },
+    "configurations": {},
+    "steps": [{"name": "test", "action": "test", "parameters": {}}]
+}
+
+class TestSingleFlight:
+    """Concurrent identical requests share one computation"""
+
+    def test_concurrent_calls_share_one_computation(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "verdict"
+
+        async def run():
+            flight = SingleFlight()
+            results = await asyncio.gather(*[flight.do("k", compute) for _ in range(5)])
+            return flight, results
+
+        flight, results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert [r for r, _ in results] == ["verdict"] * 5
+        assert sum(1 for _, shared in results if shared) == 4
+        assert len(flight) == 0
+
+    def test_errors_propagate_to_followers(self):
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run():
+            flight = SingleFlight()
+            return await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, ValueError) for r in results)
+
+    def test_leader_cancelled_while_follower_waits(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "verdict"
+
+        async def run():
+            flight = SingleFlight()
+            leader = asyncio.ensure_future(flight.do("k", compute))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("k", compute))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await follower, leader.cancelled(), len(flight)
+
+        result, leader_cancelled, inflight = asyncio.run(run())
+        assert result == ("verdict", True)
+        assert leader_cancelled and calls == [1] and inflight == 0
+
+    def test_cancelled_when_every_caller_leaves(self):
+        finished = []
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+
+        async def run():
+            flight = SingleFlight()
+            callers = [asyncio.ensure_future(flight.do("k", compute)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for caller in callers:
+                caller.cancel()
+            await asyncio.sleep(0.1)
+            return len(flight)
+
+        assert asyncio.run(run()) == 0
+        assert finished == []
+
+    def test_key_ignores_key_order(self):
+        reordered = {k: DOC[k] for k in reversed(list(DOC))}
+        assert validation_key(DOC) == validation_key(reordered)
+        assert validation_key(DOC) != validation_key({**DOC, "ksml_version": "0.1.0"})
+
+class TestBatchDeduplication:
+    """Duplicate documents inside a batch are validated once"""
+
+    def test_duplicates_fan_out(self):
+        invalid = {**DOC, "steps": []}
+        before = METRICS["batch_duplicates"]
+
+        response = client.post("/validate/batch", json={"documents": [DOC, invalid, DOC, DOC]})
+        assert response.status_code == 200
+        res = response.json()
+
+        assert [r["valid"] for r in res["results"]] == [True, False, True, True]
+        assert res["results"][0] == res["results"][2] == res["results"][3]
+        assert res["summary"] == {"valid": 3, "invalid": 1, "errors": 0}
+        assert METRICS["batch_duplicates"] - before == 2
+
+    def test_lone_surrogate_still_validated(self):
+        # "\ud800" is a valid JSON escape; json.loads yields a lone surrogate that plain UTF-8 cannot encode
+        surrogate = {**DOC, "metadata": {**DOC["metadata"], "description": "bad \ud800 text"}}
+        assert validation_key(surrogate) != validation_key(DOC)
+        headers = {"content-type": "application/json"}
+
+        single = client.post("/validate", content=json.dumps(surrogate), headers=headers)
+        assert single.status_code == 200 and single.json()["valid"] is True
+
+        batch = client.post("/validate/batch", content=json.dumps({"documents": [DOC, surrogate, DOC]}), headers=headers)
+        assert batch.status_code == 200
+        assert batch.json()["summary"] == {"valid": 3, "invalid": 0, "errors": 0}
+
+    def test_health_reports_rates(self):
+        health = client.get("/health").json()
+        assert 0 <= health["coalescing"]["dedup_rate"] <= 1
+        assert 0 <= health["coalescing"]["coalesce_rate"] <= 1
@@ -0,0 +1,139 @@
+import copy
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+import main
+from main import SCHEMA_V01, SCHEMA_V02, app, compatibility_report, validate_single_document
+from compatibility import LOCATIONS, VersionSplit, added_fields
+
+client = TestClient(app)
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+def example(name):
+    return json.loads((EXAMPLES / f"{name}.ksml.json").read_text())
+
+def variants():
+    """Examples plus documents that differ between versions in each way VersionSplit handles"""
+    docs = {path.name: json.loads(path.read_text()) for path in sorted(EXAMPLES.glob("*.ksml.json"))}
+    base = example("valid_example")
+    docs["bad_uuid"] = copy.deepcopy(base)
+    docs["bad_uuid"]["metadata"]["id"] = "doc-1"
+    docs["invalid_added_field"] = copy.deepcopy(base)
+    docs["invalid_added_field"]["steps"][0]["retry_policy"] = {"max_attempts": 99}
+    docs["unknown_and_added"] = {**copy.deepcopy(base), "capabilities": [], "colour": "red"}
+    docs["suspicious"] = copy.deepcopy(base)
+    docs["suspicious"]["metadata"]["title"] = "a; rm -rf /"
+    return docs
+
+class TestVersionSplit:
+    """compatibility.VersionSplit"""
+
+    def test_schemas_differ_only_by_added_fields(self):
+        def strip(schema):
+            if isinstance(schema, dict):
+                return {k: strip(v) for k, v in schema.items() if k != "format"}
+            if isinstance(schema, list):
+                return [strip(item) for item in schema]
+            return schema
+        old, new = strip(SCHEMA_V01), strip(SCHEMA_V02)
+        for location, fields in added_fields(SCHEMA_V01, SCHEMA_V02).items():
+            for field in fields:
+                del LOCATIONS[location](new)[field]
+        for schema in (old, new):
+            for key in ("$id", "title", "description"):
+                schema.pop(key)
+            schema["properties"].pop("ksml_version")
+        assert old == new
+
+    def test_added_fields(self):
+        split = VersionSplit(SCHEMA_V01, SCHEMA_V02)
+        assert split.added["root"] == {"capabilities", "extensions"}
+        assert split.in_added_field(["steps", 0, "retry_policy", "max_attempts"])
+        assert not split.in_added_field(["steps", 0, "parameters", "retry_policy"])
+        assert not split.in_added_field(["metadata", "id"])
+        showcase = example("valid_v02_showcase")
+        assert ((), "extensions") in list(split.added_in_use(showcase))
+
+class TestReport:
+    """main.compatibility_report agrees with /validate for each version"""
+
+    @pytest.mark.parametrize("name", sorted(variants()))
+    def test_matches_per_version_validation(self, name):
+        document = variants()[name]
+        report = compatibility_report(document)
+        as_v01 = validate_single_document({**document, "ksml_version": "0.1.0"})
+        as_v02 = validate_single_document({**document, "ksml_version": "0.2.0"})
+        assert report.verdicts["v0.1"].valid is as_v01.valid
+        assert report.verdicts["v0.2"].to_dict()["errors"] == as_v02.to_dict()["errors"]
+        assert report.upgrade_ready is as_v02.valid
+
+    def test_matrix(self):
+        showcase = compatibility_report(example("valid_v02_showcase"))
+        assert [showcase.verdicts[v].valid for v in ("v0.1", "v0.2", "v0.2-safety")] == [False, True, True]
+        assert {e.path for e in showcase.verdicts["v0.1"].errors} >= {"extensions", "metadata.dependencies"}
+
+        legacy = example("valid_example")
+        legacy["metadata"]["title"] = "a; rm -rf /"
+        report = compatibility_report(legacy)
+        assert [report.verdicts[v].valid for v in ("v0.1", "v0.2", "v0.2-safety")] == [True, False, False]
+        assert report.declared_version == "0.1.0" and not report.upgrade_ready
+
+class TestEndpoints:
+    def test_single(self):
+        body = client.post("/compatibility", json=example("valid_minimal")).json()
+        assert body["upgrade_ready"] is True and set(body["verdicts"]) == {"v0.1", "v0.2", "v0.2-safety"}
+        assert client.post("/compatibility", json=[]).status_code == 422
+
+    def test_batch(self):
+        lines = [json.dumps(example("valid_minimal")), "{not json", "", json.dumps(example("valid_v02_showcase"))]
+        response = client.post("/compatibility/batch", content="\n".join(lines).encode())
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        reports = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["upgrade_ready"] for r in reports] == [True, False, True]
+        assert reports[1]["document_hash"] is None
+        assert reports[1]["verdicts"]["v0.1"]["errors"][0]["code"] == "KSML_001"
+
+    def test_lone_surrogate(self):
+        document = example("valid_minimal")
+        document["metadata"]["description"] = "bad \ud800 text"
+        single = client.post("/compatibility", content=json.dumps(document), headers={"content-type": "application/json"})
+        assert single.status_code == 200 and single.json()["document_hash"] is not None
+
+        good = json.dumps(example("valid_minimal"))
+        response = client.post("/compatibility/batch", content="\n".join([good, json.dumps(document), good]).encode())
+        assert [json.loads(line)["upgrade_ready"] for line in response.text.splitlines()] == [True, True, True]
+
+    def test_batch_line_failure_stays_in_its_line(self, monkeypatch):
+        report = main.compatibility_report
+
+        def flaky(document, *args):
+            if document["metadata"].get("description") == "explode":
+                raise RuntimeError("boom")
+            return report(document, *args)
+
+        monkeypatch.setattr(main, "compatibility_report", flaky)
+        bad = example("valid_minimal")
+        bad["metadata"]["description"] = "explode"
+        good = json.dumps(example("valid_minimal"))
+        response = client.post("/compatibility/batch", content="\n".join([good, json.dumps(bad), good]).encode())
+        assert response.status_code == 200
+        reports = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["upgrade_ready"] for r in reports] == [True, False, True]
+        assert reports[1]["verdicts"]["v0.2"]["errors"][0] == {
+            "code": "KSML_001", "message": "Internal System Error: RuntimeError", "path": "root", "severity": "ERROR"}
+
+    def test_batch_streams_and_releases_lane(self):
+        line = json.dumps(example("valid_minimal")).encode()
+        with client.stream("POST", "/compatibility/batch", content=b"\n".join([line] * 3)) as response:
+            assert "content-length" not in response.headers
+            reports = [json.loads(chunk) for chunk in response.iter_lines()]
+        assert len(reports) == 3 and reports[0] == reports[2]
+        lane = client.get("/health").json()["admission"]["batch"]
+        assert lane["active"] == 0 and lane["cost_in_use"] == 0
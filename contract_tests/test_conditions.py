@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app
+from conditions import ExpressionError, compile_expression, condition_issues
+
+client = TestClient(app)
+
+METADATA = {"id": "5f0c6c1e-8d1a-4c59-9a55-0f3c2b7d9e10", "author": "conditions", "title": "Conditions",
+            "created_at": "2024-01-01T00:00:00Z"}
+
+def document(*conditions, version="0.2.0"):
+    step = {"id": "deploy", "name": "Deploy", "action": "run_task", "parameters": {}, "conditions": list(conditions)}
+    return {"ksml_version": version, "metadata": METADATA, "configurations": {}, "steps": [step]}
+
+class TestEvaluation:
+    """conditions.compile_expression"""
+
+    @pytest.mark.parametrize("expression,context,expected", [
+        ("environment == 'development'", {"environment": "development"}, True),
+        ("data_empty == true", {"data_empty": False}, False),
+        ("retries >= 3 and not (region in ['eu-west', 'eu-north'])", {"retries": 3, "region": "us-east"}, True),
+        ("owner.team != null or tier < 2", {"owner": {"team": "core"}}, True),
+        ("missing == null", {}, True),
+        ("name not in \"abc\"", {"name": "z"}, True),
+        ("version > 2", {"version": "3"}, False),  # incomparable types are never ordered
+        ("flag > 0", {"flag": True}, False),
+    ])
+    def test_evaluate(self, expression, context, expected):
+        assert compile_expression(expression).evaluate(context) is expected
+
+    def test_batch_matches_single(self):
+        compiled = compile_expression("env == 'prod' and retries >= 2 or canary")
+        rows = [{"env": "prod", "retries": r, "canary": r == 0} for r in range(5)] + [{}]
+        assert compiled.evaluate_batch(rows) == [compiled.evaluate(row) for row in rows]
+        assert compiled.names == {"env", "retries", "canary"}
+
+    def test_cached_by_source(self):
+        assert compile_expression("a == 1") is compile_expression("a == 1")
+
+    @pytest.mark.parametrize("expression,position", [
+        ("", 0),
+        ("env = 'prod'", 4),
+        ("a && b", 2),
+        ("a == b == c", 7),
+        ("(a == 1", 7),
+        ("'unterminated", 0),
+        ("a.and == 1", 0),
+        ("x == 1e999", 5),
+        ("x == \u0661\u0662", 5),  # Arabic-Indic digits are not numbers
+        ("(" * 40 + "a" + ")" * 40, 32),
+    ])
+    def test_syntax_errors(self, expression, position):
+        with pytest.raises(ExpressionError) as e:
+            compile_expression(expression)
+        assert e.value.position == position
+
+    def test_no_python_reachable(self):
+        # Names are context lookups, never Python attributes or builtins
+        assert compile_expression("__import__ == null").evaluate({}) is True
+        with pytest.raises(ExpressionError):
+            compile_expression("a.__class__()")
+
+class TestValidation:
+    """KSML_010 in /validate"""
+
+    def test_issue_paths(self):
+        issues = condition_issues(document({"type": "run_if", "expression": "env == 'prod'"},
+                                           {"type": "skip_if", "expression": "env =="},
+                                           {"type": "depends_on", "expression": ""}))
+        assert [issue.path for issue in issues] == ["steps.0.conditions.1.expression"]
+
+    def test_invalid_expression_reported(self):
+        response = client.post("/validate", json=document({"type": "run_if", "expression": "env == 'prod' or"}))
+        result = response.json()
+        assert result["valid"] is False
+        errors = [e for e in result["errors"] if e["code"] == "KSML_010"]
+        assert len(errors) == 1
+        assert errors[0]["path"] == "steps.0.conditions.0.expression"
+        assert "position 16" in errors[0]["message"]
+
+    def test_valid_expressions_pass(self):
+        response = client.post("/validate", json=document({"type": "run_if", "expression": "env in ['prod', 'staging']"},
+                                                           {"type": "skip_if", "expression": "not healthy"}))
+        assert response.json()["valid"] is True
@@ -0,0 +1,122 @@
+import asyncio
+import gzip
+import io
+import json
+import sys
+import tarfile
+import zlib
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+import main
+from main import app, METRICS
+from content_encoding import BodyTooLarge, EncodingError, UnsupportedEncoding, decode_body, parse_content_encoding
+
+client = TestClient(app)
+
+EXAMPLE = (Path(__file__).parent.parent / "examples" / "valid_v02_showcase.ksml.json").read_bytes()
+
+def raw_deflate(data):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+def decode(body, encoding, limit=10 ** 9, chunk=1000):
+    async def chunks():
+        for i in range(0, len(body), chunk):
+            yield body[i:i + chunk]
+    async def collect():
+        return b"".join([piece async for piece in decode_body(chunks(), encoding, limit)])
+    return asyncio.run(collect())
+
+class TestCompressedRequests:
+    """Content-Encoding: gzip / deflate on request bodies"""
+
+    @pytest.mark.parametrize("encoding,compress", [
+        ("gzip", gzip.compress), ("deflate", zlib.compress), ("deflate", raw_deflate),
+    ])
+    def test_validate(self, encoding, compress):
+        plain = client.post("/validate", content=EXAMPLE, headers={"content-type": "application/json"})
+        response = client.post("/validate", content=compress(EXAMPLE),
+                               headers={"content-type": "application/json", "content-encoding": encoding})
+        assert response.status_code == 200
+        assert response.json() == plain.json()
+
+    def test_batch(self):
+        body = json.dumps({"documents": [json.loads(EXAMPLE)] * 3}).encode("utf-8")
+        response = client.post("/validate/batch", content=gzip.compress(body),
+                               headers={"content-type": "application/json", "content-encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.json()["summary"]["valid"] == 3
+
+    def test_bomb_rejected(self):
+        before = METRICS["oversized_bodies"]
+        bomb = gzip.compress(b" " * (main.MAX_REQUEST_SIZE + 1))
+        assert len(bomb) < 100 * 1024
+        response = client.post("/validate", content=bomb,
+                               headers={"content-type": "application/json", "content-encoding": "gzip"})
+        assert response.status_code == 413
+        assert METRICS["oversized_bodies"] == before + 1
+
+    def test_plain_body_limit(self):
+        response = client.post("/validate", content=b" " * (main.MAX_REQUEST_SIZE + 1),
+                               headers={"content-type": "application/json"})
+        assert response.status_code == 413
+
+    def test_unsupported_encoding(self):
+        response = client.post("/validate", content=EXAMPLE,
+                               headers={"content-type": "application/json", "content-encoding": "br"})
+        assert response.status_code == 415
+        assert response.headers["accept-encoding"] == "gzip, deflate"
+
+    def test_corrupt_body(self):
+        response = client.post("/validate", content=gzip.compress(EXAMPLE)[:-20],
+                               headers={"content-type": "application/json", "content-encoding": "gzip"})
+        assert response.status_code == 400
+
+    def test_job_upload(self, monkeypatch):
+        lines = b"\n".join([json.dumps(json.loads(EXAMPLE)).encode("utf-8")] * 5) + b"\n"
+        response = client.post("/jobs", content=gzip.compress(lines),
+                               headers={"content-type": "application/x-ndjson", "content-encoding": "gzip"})
+        assert response.status_code == 202
+        assert response.json()["progress"]["lines_total"] == 5
+
+        monkeypatch.setattr(main, "JOB_MAX_UPLOAD_BYTES", len(lines) - 1)
+        response = client.post("/jobs", content=gzip.compress(lines),
+                               headers={"content-type": "application/x-ndjson", "content-encoding": "gzip"})
+        assert response.status_code == 413
+
+    def test_archive_upload(self):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as archive:
+            info = tarfile.TarInfo("doc.json")
+            info.size = len(EXAMPLE)
+            archive.addfile(info, io.BytesIO(EXAMPLE))
+        response = client.post("/validate/archive", content=gzip.compress(buffer.getvalue()),
+                               headers={"content-encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.json()["results"]["doc.json"]["valid"] is True
+
+class TestDecodeBody:
+    """content_encoding.decode_body"""
+
+    def test_stacked_and_multi_member(self):
+        data = b"ksml " * 50000
+        assert decode(gzip.compress(zlib.compress(data)), "deflate, gzip") == data
+        assert decode(gzip.compress(data[:7]) + gzip.compress(data[7:]), "gzip") == data
+        assert decode(data, "identity") == data
+
+    def test_limit_checked_while_inflating(self):
+        with pytest.raises(BodyTooLarge):
+            decode(gzip.compress(b"0" * 10 ** 7), "gzip", limit=10 ** 5, chunk=10 ** 6)
+
+    def test_errors(self):
+        with pytest.raises(UnsupportedEncoding):
+            parse_content_encoding("gzip, compress")
+        with pytest.raises(EncodingError):
+            decode(b"not gzip at all", "gzip")
+        with pytest.raises(EncodingError):
+            decode(zlib.compress(b"{}") + b"trailing", "deflate")
@@ -0,0 +1,116 @@
+import copy
+import json
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app
+from document_diff import build_merkle_tree, diff_documents
+
+client = TestClient(app)
+
+EXAMPLES_DIR = Path(__file__).parent.parent / "examples"
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def showcase():
+    return load_json(EXAMPLES_DIR / "valid_v02_showcase.ksml.json")
+
+class TestMerkleDiff:
+    """Structural diff between document revisions"""
+
+    def test_identical_documents(self):
+        doc = showcase()
+        diff = diff_documents(doc, copy.deepcopy(doc))
+
+        assert diff["identical"] is True
+        assert diff["old_root"] == diff["new_root"]
+        assert diff["changes"] == []
+        assert all(count == 0 for count in diff["summary"].values())
+
+    def test_hash_ignores_key_order(self):
+        a = {"x": 1, "y": [1, 2]}
+        b = {"y": [1, 2], "x": 1}
+        assert build_merkle_tree(a).digest == build_merkle_tree(b).digest
+        assert build_merkle_tree([1, 2]).digest != build_merkle_tree([2, 1]).digest
+        assert build_merkle_tree("1").digest != build_merkle_tree(1).digest
+
+    def test_field_changes(self):
+        old = showcase()
+        new = copy.deepcopy(old)
+        new["metadata"]["title"] = "Renamed"
+        del new["metadata"]["description"]
+        new["configurations"]["new_field"] = 1
+
+        diff = diff_documents(old, new)
+        by_path = {c["path"]: c for c in diff["changes"]}
+
+        assert diff["identical"] is False
+        assert by_path["metadata.title"] == {"op": "changed", "path": "metadata.title", "old": "v0.2 Feature Showcase", "new": "Renamed"}
+        assert by_path["metadata.description"]["op"] == "removed"
+        assert by_path["configurations.new_field"]["op"] == "added"
+        assert diff["summary"]["steps_modified"] == 0
+
+    def test_step_added_removed_modified(self):
+        old = showcase()
+        new = copy.deepcopy(old)
+        new["steps"][1]["parameters"]["value"] = "batch_002"
+        removed = new["steps"].pop(0)
+        new["steps"].append({"name": "Cleanup", "action": "cleanup", "parameters": {}})
+
+        diff = diff_documents(old, new)
+        steps = diff["steps"]
+
+        assert [s["step"] for s in steps["removed"]] == [removed["name"]]
+        assert [s["step"] for s in steps["added"]] == ["Cleanup"]
+        assert len(steps["modified"]) == 1
+        assert steps["modified"][0]["step"] == "Process Data"
+        assert steps["modified"][0]["changes"] == [
+            {"op": "changed", "path": "parameters.value", "old": "batch_001", "new": "batch_002"}
+        ]
+        # An index shift caused by the removal is not a move
+        assert steps["moved"] == []
+
+    def test_reordered_steps(self):
+        old = showcase()
+        old["steps"].append({"id": "s3", "name": "Third", "action": "noop", "parameters": {}})
+        new = copy.deepcopy(old)
+        new["steps"] = [new["steps"][2], new["steps"][0], new["steps"][1]]
+
+        diff = diff_documents(old, new)
+
+        assert diff["steps"]["moved"] == [{"step": "s3", "from": 2, "to": 0}]
+        assert diff["steps"]["modified"] == []
+        assert diff["changes"] == []
+
+    def test_prebuilt_trees_are_reused(self):
+        old = showcase()
+        new = copy.deepcopy(old)
+        new["steps"][0]["timeout_override"] = 30
+
+        diff = diff_documents(build_merkle_tree(old), build_merkle_tree(new))
+        assert diff["summary"]["steps_modified"] == 1
+
+class TestDiffEndpoint:
+    """POST /diff contract"""
+
+    def test_diff_endpoint(self):
+        old = showcase()
+        new = copy.deepcopy(old)
+        new["steps"][0]["retry_policy"]["max_attempts"] = 5
+
+        response = client.post("/diff", json={"old": old, "new": new})
+        assert response.status_code == 200
+        res = response.json()
+
+        assert res["identical"] is False
+        assert res["summary"]["steps_modified"] == 1
+        assert res["steps"]["modified"][0]["changes"][0]["path"] == "retry_policy.max_attempts"
+
+    def test_diff_rejects_non_objects(self):
+        response = client.post("/diff", json={"old": {}, "new": []})
+        assert response.status_code == 422
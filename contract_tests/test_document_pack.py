@@ -0,0 +1,113 @@
+import copy
+import json
+import sys
+import zlib
+from pathlib import Path
+
+import pytest
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from canonical import canonical_hash, canonical_json
+from document_pack import PackError, PackReader, PackWriter, train_dictionary, write_pack
+
+EXAMPLE = json.loads((Path(__file__).parent.parent / "examples" / "valid_example.ksml.json").read_text())
+
+def corpus(n):
+    docs = []
+    for i in range(n):
+        doc = copy.deepcopy(EXAMPLE)
+        doc["metadata"]["id"] = f"00000000-0000-4000-8000-{i:012d}"
+        doc["metadata"]["title"] = f"Workflow {i}"
+        doc["steps"][0]["parameters"] = {"target": ["main", "db", "api"][i % 3], "value": i}
+        docs.append(doc)
+    return docs
+
+class TestDictionary:
+    """document_pack.train_dictionary"""
+
+    def test_shared_fragments_only(self):
+        dictionary = train_dictionary(canonical_json(doc) for doc in corpus(20))
+        assert b'"ksml_version":"0.1.0"' in dictionary
+        assert b"Workflow 7" not in dictionary  # in one document only
+        assert train_dictionary([b'{"a":1}']) == b""
+
+    def test_size_bound(self):
+        assert len(train_dictionary((canonical_json(doc) for doc in corpus(20)), size=64)) <= 64
+        with pytest.raises(ValueError):
+            train_dictionary([], size=64 * 1024)
+
+class TestPack:
+    """document_pack.PackWriter / PackReader"""
+
+    def test_round_trip_and_random_access(self, tmp_path):
+        docs = corpus(50)
+        path = str(tmp_path / "corpus.ksmlz")
+        stats = write_pack(path, docs + [docs[3]], sample_size=10)
+        assert stats["documents"] == 50 and stats["duplicates"] == 1
+
+        with PackReader(path) as reader:
+            assert len(reader) == 50
+            assert list(reader) == docs
+            assert reader.get(canonical_hash(docs[17])) == docs[17]
+            assert canonical_hash(docs[17]) in reader and "zz" not in reader
+            assert reader.by_id(docs[42]["metadata"]["id"]) == docs[42]
+            assert reader.by_id("missing") is None and reader.get("00" * 32) is None
+
+    def test_smaller_than_compressing_alone(self, tmp_path):
+        docs = corpus(200)
+        stats = write_pack(str(tmp_path / "corpus.ksmlz"), docs, sample_size=50)
+        alone = sum(len(zlib.compress(canonical_json(doc), 9)) for doc in docs)
+        assert stats["stored_bytes"] * 2 < alone
+
+    def test_versions_by_id(self, tmp_path):
+        first, second = corpus(1)[0], corpus(1)[0]
+        second["metadata"]["title"] = "Renamed"
+        path = str(tmp_path / "versions.ksmlz")
+        with PackWriter(path, b"") as writer:
+            hashes = [writer.add(first), writer.add(second)]
+        with PackReader(path) as reader:
+            assert reader.hashes_for_id(first["metadata"]["id"]) == hashes
+            assert reader.by_id(first["metadata"]["id"])["metadata"]["title"] == "Renamed"
+
+    def test_damage_detected(self, tmp_path):
+        path = tmp_path / "corpus.ksmlz"
+        write_pack(str(path), corpus(5), sample_size=5)
+        data = bytearray(path.read_bytes())
+
+        (tmp_path / "not_a_pack").write_bytes(b"{}")
+        with pytest.raises(PackError):
+            PackReader(str(tmp_path / "not_a_pack"))
+
+        index_damaged = bytearray(data)
+        index_damaged[-30] ^= 0xFF
+        (tmp_path / "index.ksmlz").write_bytes(index_damaged)
+        with pytest.raises(PackError):
+            PackReader(str(tmp_path / "index.ksmlz"))
+
+        with PackReader(str(path)) as reader:
+            offset = 8 + len(reader.dictionary)  # the first record follows the header
+        record_damaged = bytearray(data)
+        record_damaged[offset + 5] ^= 0xFF
+        (tmp_path / "record.ksmlz").write_bytes(record_damaged)
+        with PackReader(str(tmp_path / "record.ksmlz")) as reader:
+            with pytest.raises(PackError):
+                list(reader)
+
+    def test_failed_write_leaves_nothing(self, tmp_path):
+        path = tmp_path / "partial.ksmlz"
+        with pytest.raises(RuntimeError):
+            with PackWriter(str(path), b"") as writer:
+                writer.add(EXAMPLE)
+                raise RuntimeError("input failed")
+        assert list(tmp_path.iterdir()) == []
+
+    def test_unstorable_documents_skipped(self, tmp_path):
+        path = tmp_path / "corpus.ksmlz"
+        docs = corpus(3)
+        surrogate = json.loads('{"metadata": {"id": "x", "description": "\\ud800"}}')
+        stats = write_pack(str(path), [docs[0], surrogate, {"unserializable": object()}, docs[1], docs[2]])
+        assert (stats["documents"], stats["skipped"]) == (3, 2)
+        with PackReader(str(path)) as reader:
+            assert list(reader) == docs
+        assert [p.name for p in tmp_path.iterdir()] == ["corpus.ksmlz"]
@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app, HISTORY
+from result_log import ResultLog
+from results import ErrorRecord, ResultRecord
+
+client = TestClient(app)
+
+def invalid_document(doc_id):
+    return {"ksml_version": "0.2.0", "metadata": {"id": doc_id}, "intent": "export test", "steps": [{"name": 1}]}
+
+def export_rows(**params):
+    HISTORY.flush()
+    response = client.get("/export/json", params=params)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+class TestResultLog:
+    """Ring buffer scanned in chunks"""
+
+    def record(self, log, n, valid=True):
+        for i in range(n):
+            errors = [] if valid else [ErrorRecord("KSML_002", "bad", "steps", "ERROR")]
+            log.record({"metadata": {"id": f"doc-{i}"}}, f"hash-{i}", ResultRecord(valid, "0.2.0", errors, []), 1.0)
+
+    def test_keeps_latest_entries(self):
+        log = ResultLog(5)
+        self.record(log, 12)
+        ids = [row["document_id"] for row in log.scan(chunk=2)]
+        assert ids == ["doc-7", "doc-8", "doc-9", "doc-10", "doc-11"]
+
+    def test_filters(self):
+        log = ResultLog(100)
+        self.record(log, 3)
+        self.record(log, 2, valid=False)
+        assert len(list(log.scan(code="KSML_002"))) == 2
+        assert [row["document_id"] for row in log.scan(document_id="doc-1")] == ["doc-1", "doc-1"]
+        assert len(list(log.scan(limit=4))) == 4
+        assert list(log.scan(since=time.time() + 60)) == []
+
+    def test_scan_survives_concurrent_writes(self):
+        log = ResultLog(4)
+        self.record(log, 4)
+        scan = log.scan(chunk=1)
+        next(scan)
+        self.record(log, 10)  # everything the scan had not read yet is overwritten
+        assert list(scan) == []
+
+class TestExportEndpoint:
+    """/export/{format} streams stored results"""
+
+    def test_json_lines_filtered_by_document(self):
+        client.post("/validate", json=invalid_document("export-json"))
+        rows = export_rows(document_id="export-json")
+        assert rows and all(row["document_id"] == "export-json" for row in rows)
+        assert rows[-1]["valid"] is False
+        assert rows[-1]["errors"][0]["code"].startswith("KSML_")
+
+    def test_csv_has_one_line_per_error(self):
+        client.post("/validate", json=invalid_document("export-csv"))
+        HISTORY.flush()
+        response = client.get("/export/csv", params={"document_id": "export-csv"})
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+        lines = list(csv.DictReader(io.StringIO(response.text)))
+        assert lines and all(line["document_id"] == "export-csv" and line["code"] for line in lines)
+
+    def test_xml_is_well_formed(self):
+        client.post("/validate", json=invalid_document("export-xml"))
+        HISTORY.flush()
+        response = client.get("/export/xml", params={"document_id": "export-xml"})
+        root = ET.fromstring(response.content)
+        result = root.find("result")
+        assert result.get("document_id") == "export-xml"
+        assert result.find("error").get("code").startswith("KSML_")
+
+    def test_time_and_code_filters(self):
+        client.post("/validate", json=invalid_document("export-filter"))
+        code = export_rows(document_id="export-filter")[-1]["errors"][0]["code"]
+        assert export_rows(document_id="export-filter", code=code)
+        assert export_rows(document_id="export-filter", code="KSML_999") == []
+        assert export_rows(document_id="export-filter", since="2999-01-01T00:00:00Z") == []
+        assert export_rows(document_id="export-filter", until=str(time.time() + 60))
+
+    def test_bad_requests(self):
+        assert client.get("/export/yaml").status_code == 400
+        assert client.get("/export/json", params={"since": "yesterday"}).status_code == 400
@@ -0,0 +1,104 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app, EXTENSIONS
+from extension_plugins import ExtensionRegistry, PluginError
+
+client = TestClient(app)
+
+METADATA = {"id": "5f0c6c1e-8d1a-4c59-9a55-0f3c2b7d9e10", "author": "ext", "title": "Extensions",
+            "created_at": "2024-01-01T00:00:00Z"}
+
+def document(extensions):
+    return {"ksml_version": "0.2.0", "metadata": METADATA, "configurations": {},
+            "steps": [{"name": "Step", "action": "run_task", "parameters": {}}], "extensions": extensions}
+
+def even_numbers(value):
+    for i, number in enumerate(value):
+        if number % 2:
+            yield str(i), f"{number} is odd"
+
+class TestRegistry:
+    """extension_plugins.ExtensionRegistry"""
+
+    def test_schema_file_loaded_once_on_first_use(self, tmp_path):
+        (tmp_path / "x-flags.json").write_text(json.dumps({"type": "array", "items": {"type": "boolean"}}))
+        registry = ExtensionRegistry()
+        registry.discover(str(tmp_path))
+        assert "x-flags" in registry
+        assert registry.stats()["x-flags"]["loaded"] is False
+
+        assert registry.validate({"x-other": 1, "x-flags": [True]}) == []
+        issues = registry.validate({"x-flags": [True, "no"]})
+        assert [(i.path, i.details) for i in issues] == [("extensions.x-flags.1", "x-flags: 'no' is not of type 'boolean'")]
+
+        stats = registry.stats()["x-flags"]
+        assert stats["loaded"] is True and stats["calls"] == 2 and stats["issues"] == 1
+        (tmp_path / "x-flags.json").write_text("{}")  # already compiled: not read again
+        assert len(registry.validate({"x-flags": ["still checked"]})) == 1
+
+    def test_function_and_spec_plugins(self):
+        registry = ExtensionRegistry()
+        registry.register_function("x-even", even_numbers)
+        registry.discover(None, "x-spec=test_extension_plugins:even_numbers")
+        issues = registry.validate({"x-even": [2, 3], "x-spec": [5]})
+        assert [i.path for i in issues] == ["extensions.x-even.1", "extensions.x-spec.0"]
+
+    def test_failures(self, tmp_path):
+        (tmp_path / "x-broken.json").write_text(json.dumps({"type": "not-a-type"}))
+        registry = ExtensionRegistry()
+        registry.discover(str(tmp_path), "x-missing=no_such_module:check")
+        registry.register_function("x-raises", lambda value: 1 / 0)
+        registry.register_function("x-even", even_numbers)
+        issues = registry.validate({"x-broken": {}, "x-missing": {}, "x-raises": {}, "x-even": [1]})
+        # One failing plugin does not stop the others
+        assert [(i.path, i.failed) for i in issues] == [("extensions.x-broken", True), ("extensions.x-missing", True),
+                                                        ("extensions.x-raises", True), ("extensions.x-even.0", False)]
+        assert "raised ZeroDivisionError" in issues[2].details
+        with pytest.raises(PluginError):
+            registry._plugins["x-raises"].validate({})
+        assert registry.stats()["x-broken"]["load_error"].startswith("SchemaError")
+        with pytest.raises(ValueError):
+            registry.discover(None, "x-missing=other:check")
+        with pytest.raises(ValueError):
+            registry.discover(None, "no-spec")
+
+class TestService:
+    """Bundled plugins in /validate"""
+
+    def test_showcase_extensions_valid(self):
+        showcase = json.loads((Path(__file__).parent.parent / "examples" / "valid_v02_showcase.ksml.json").read_text())
+        assert client.post("/validate", json=showcase).json()["valid"] is True
+
+    def test_invalid_capabilities(self):
+        result = client.post("/validate", json=document({"x-capabilities": ["retry", "Not Valid", "retry"]})).json()
+        assert result["valid"] is False
+        assert {(e["code"], e["path"]) for e in result["errors"]} == {("KSML_005", "extensions.x-capabilities.1"),
+                                                                       ("KSML_005", "extensions.x-capabilities")}
+
+    def test_invalid_metadata_extension(self):
+        result = client.post("/validate", json=document({"x-metadata-extensions": {"schema_url": "not a uri",
+                                                                                      "nested": {"a": 1}}})).json()
+        assert sorted(e["path"] for e in result["errors"]) == ["extensions.x-metadata-extensions.nested",
+                                                               "extensions.x-metadata-extensions.schema_url"]
+
+    def test_failing_plugin_reported_on_its_namespace(self, monkeypatch):
+        registry = ExtensionRegistry()
+        registry.register_function("x-raises", lambda value: 1 / 0)
+        monkeypatch.setitem(EXTENSIONS._plugins, "x-raises", registry._plugins["x-raises"])
+        result = client.post("/validate", json=document({"x-raises": {}, "x-capabilities": ["Not Valid"]})).json()
+        assert {(e["code"], e["path"]) for e in result["errors"]} == {("KSML_001", "extensions.x-raises"),
+                                                                       ("KSML_005", "extensions.x-capabilities.0")}
+
+    def test_plugin_stats_exposed(self):
+        client.post("/validate", json=document({"x-capabilities": ["retry"]}))
+        plugins = client.get("/admin/extensions").json()["plugins"]
+        assert plugins["x-capabilities"]["loaded"] is True
+        assert plugins["x-capabilities"]["calls"] >= 1
+        assert set(plugins) == set(EXTENSIONS.stats())
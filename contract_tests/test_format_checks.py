@@ -0,0 +1,106 @@
+import copy
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app
+from format_checks import CHECKS, MEMO_MAX_LENGTH, is_date_time, is_uri, is_uuid
+
+client = TestClient(app)
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+SHOWCASE = json.loads((EXAMPLES / "valid_v02_showcase.ksml.json").read_text(encoding="utf-8"))
+
+def showcase(**metadata):
+    document = copy.deepcopy(SHOWCASE)
+    document["metadata"].update(metadata)
+    return document
+
+class TestCheckers:
+    """format_checks predicates"""
+
+    @pytest.mark.parametrize("value,expected", [
+        ("550e8400-e29b-41d4-a716-446655440000", True),
+        ("550E8400-E29B-41D4-A716-446655440000", True),
+        ("550e8400e29b41d4a716446655440000", False),
+        ("{550e8400-e29b-41d4-a716-446655440000}", False),
+        ("550e8400-e29b-41d4-a716-44665544000g", False),
+    ])
+    def test_uuid(self, value, expected):
+        assert is_uuid(value) is expected
+
+    @pytest.mark.parametrize("value,expected", [
+        ("2024-01-01T00:00:00Z", True),
+        ("2024-02-29T23:59:60.5+05:30", True),
+        ("2000-02-29t12:00:00z", True),
+        ("2023-02-29T00:00:00Z", False),
+        ("1900-02-29T00:00:00Z", False),
+        ("2024-04-31T00:00:00Z", False),
+        ("2024-01-01 00:00:00Z", False),
+        ("2024-01-01T00:00:00", False),
+        ("2024-01-01T24:00:00Z", False),
+        ("2024-01-01T00:00:00+24:00", False),
+        ("٢٠٢٤-٠١-٠١T00:00:00Z", False),
+        ("2024-01-01T00:00:00.٥Z", False),
+    ])
+    def test_date_time(self, value, expected):
+        assert is_date_time(value) is expected
+
+    @pytest.mark.parametrize("value,expected", [
+        ("https://api.example.com", True),
+        ("http://[::1]:8080/a?b=c#d", True),
+        ("urn:isbn:0451450523", True),
+        ("git+ssh://git@github.com/org/repo.git", True),
+        ("example.com", False),
+        ("/relative/path", False),
+        ("http://exa mple.com", False),
+        ("http://host/%zz", False),
+        ("https://host/a#b#c", False),
+        ("http://h:٨٠/x", False),
+    ])
+    def test_uri(self, value, expected):
+        assert is_uri(value) is expected
+
+    def test_memoization_is_bounded(self):
+        check = CHECKS["uri"]
+        check.cache_clear()
+        check("https://example.com/" + "a" * MEMO_MAX_LENGTH)
+        assert check.cache_info().currsize == 0
+        check("https://example.com/")
+        check("https://example.com/")
+        info = check.cache_info()
+        assert (info.currsize, info.hits) == (1, 1)
+
+    def test_non_strings_pass(self):
+        assert all(check(42) for check in CHECKS.values())
+
+class TestFormatErrors:
+    """Format violations in /validate results"""
+
+    def test_showcase_still_valid(self):
+        assert client.post("/validate", json=SHOWCASE).json()["valid"] is True
+
+    def test_uuid_and_date_time(self):
+        result = client.post("/validate", json=showcase(id="doc-1", created_at="yesterday")).json()
+        assert result["valid"] is False
+        errors = {e["path"]: e for e in result["errors"]}
+        assert errors["metadata.id"]["code"] == "KSML_100"
+        assert "'uuid'" in errors["metadata.id"]["message"]
+        assert errors["metadata.created_at"]["code"] == "KSML_100"
+
+    def test_dependency_source(self):
+        dependencies = [{"name": "svc", "version": "1.0.0", "source": "not a uri"}]
+        result = client.post("/validate", json=showcase(dependencies=dependencies)).json()
+        assert [(e["code"], e["path"]) for e in result["errors"]] == [("KSML_006", "metadata.dependencies.0.source")]
+        assert result["errors"][0]["message"].startswith("Malformed dependency specification:")
+
+    def test_v01_formats_not_enforced(self):
+        document = json.loads((EXAMPLES / "valid_example.ksml.json").read_text(encoding="utf-8"))
+        document.setdefault("metadata", {})["id"] = "not-a-uuid"
+        result = client.post("/validate", json=document).json()
+        assert all(e["path"] != "metadata.id" for e in result["errors"])
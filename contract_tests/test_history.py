@@ -0,0 +1,134 @@
+import sys
+import time
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+import main
+from main import app, HISTORY
+from history_store import HistoryStore
+from results import ErrorRecord, ResultRecord
+
+client = TestClient(app)
+
+def result(*codes):
+    return ResultRecord(not codes, "0.2.0", [ErrorRecord(code, "bad", "root", "ERROR") for code in codes], [])
+
+def document(doc_id, author="alice"):
+    return {"metadata": {"id": doc_id, "author": author}}
+
+class TestHistoryStore:
+    """SQLite history with a background batch writer"""
+
+    def test_batched_writes_and_queries(self, tmp_path):
+        store = HistoryStore(str(tmp_path / "history.db"), batch_size=10, flush_interval=0.05)
+        store.start()
+        try:
+            for i in range(25):
+                store.record(document(f"doc-{i % 5}"), f"hash-{i}", result("KSML_002") if i % 2 else result(), 1.5)
+            assert store.flush()
+            assert store.written == 25
+            assert store.batches >= 3
+
+            rows = list(store.scan(document_id="doc-1", newest_first=True))
+            assert [row["document_hash"] for row in rows] == ["hash-21", "hash-16", "hash-11", "hash-6", "hash-1"]
+            assert len(list(store.scan(code="KSML_002"))) == 12
+            assert len(list(store.scan(author="alice", limit=7))) == 7
+            assert rows[0]["errors"] == [{"code": "KSML_002", "message": "bad", "path": "root", "severity": "ERROR"}]
+        finally:
+            store.stop()
+
+    def test_spills_instead_of_blocking(self, tmp_path):
+        store = HistoryStore(str(tmp_path / "history.db"), queue_size=2, spill_size=3)
+        # Writer not started: the queue fills, then the spill buffer, then the oldest spilled records drop
+        for i in range(7):
+            store.record(document(f"doc-{i}"), f"hash-{i}", result(), 1.0)
+        assert store.stats()["queued"] == 2
+        assert store.spilled == 5 and store.dropped == 2
+        assert len(store) == 5
+
+        store.start()
+        try:
+            assert store.flush()
+            hashes = sorted(row["document_hash"] for row in store.scan())
+            assert hashes == ["hash-0", "hash-1", "hash-4", "hash-5", "hash-6"]
+        finally:
+            store.stop()
+
+    def test_failed_batch_overflow_counted(self, tmp_path):
+        store = HistoryStore(str(tmp_path / "history.db"), queue_size=1, spill_size=3)
+        for i in range(3):
+            store.record(document(f"doc-{i}"), f"hash-{i}", result(), 1.0)
+        batch, _ = store._take_batch()
+        store.record(document("doc-3"), "hash-3", result(), 1.0)
+        store.record(document("doc-4"), "hash-4", result(), 1.0)
+        # A failed write puts the batch back ahead of the two spilled records; one has no room
+        store._requeue(batch)
+        assert store.dropped == 1 and len(store._spill) == 3
+
+    def test_unstorable_record_dropped_alone(self, tmp_path):
+        store = HistoryStore(str(tmp_path / "history.db"))
+        store.start()
+        try:
+            store.record(document("before"), "hash-0", result(), 1.0)
+            store.record(document("bad \ud800"), "hash-1", result(), 1.0)  # sqlite cannot encode a lone surrogate
+            store.record(document("after"), "hash-2", result(), 1.0)
+            assert store.flush()
+            stats = store.stats()
+            assert stats["writer_alive"] is True
+            assert stats["written"] == 2 and stats["dropped"] == 1 and stats["write_errors"] == 1
+            assert "UnicodeEncodeError" in stats["last_error"]
+
+            store.record(document("later"), "hash-3", result(), 1.0)
+            assert store.flush()
+            assert sorted(row["document_id"] for row in store.scan()) == ["after", "before", "later"]
+        finally:
+            store.stop()
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "history.db")
+        store = HistoryStore(path)
+        store.start()
+        store.record(document("persisted"), "hash", result("KSML_004"), 2.0)
+        store.stop()
+        assert [row["document_id"] for row in HistoryStore(path).scan(code="KSML_004")] == ["persisted"]
+
+    def test_flushed_on_shutdown(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "history.db")
+        store = HistoryStore(path)
+        monkeypatch.setattr(main, "HISTORY", store)
+        monkeypatch.setattr(main, "HISTORY_DB", path)
+        with TestClient(app):
+            store.record(document("at-shutdown"), "hash", result(), 1.0)
+        assert not store._thread.is_alive()
+        assert [row["document_id"] for row in HistoryStore(path).scan()] == ["at-shutdown"]
+
+class TestHistoryEndpoints:
+    """Indexed lookups by document id, author and error code"""
+
+    def test_lookups(self):
+        doc = {"ksml_version": "0.2.0", "metadata": {"id": "history-doc", "author": "history-author"},
+               "intent": "history test", "steps": [{"name": 1}]}
+        client.post("/validate", json=doc)
+        HISTORY.flush()
+
+        by_doc = client.get("/history/documents/history-doc").json()
+        assert by_doc["count"] >= 1
+        latest = by_doc["results"][0]
+        assert latest["author"] == "history-author" and latest["valid"] is False
+
+        by_author = client.get("/history/authors/history-author").json()
+        assert by_author["results"][0]["document_id"] == "history-doc"
+
+        code = latest["errors"][0]["code"]
+        by_code = client.get(f"/history/errors/{code}", params={"limit": 1}).json()
+        assert by_code["count"] == 1
+
+    def test_limit_bounds(self):
+        assert client.get("/history/errors/KSML_001", params={"limit": 0}).status_code == 422
+
+    def test_health_reports_history(self):
+        history = client.get("/health").json()["history"]
+        assert history["backend"] == "sqlite"
+        assert history["write_errors"] == 0
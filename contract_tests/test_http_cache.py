@@ -0,0 +1,115 @@
+import json
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+import main
+from main import app, SCHEMA_V01, SCHEMA_V02
+from canonical import canonical_hash
+from http_cache import accepts_gzip
+from results import ErrorRecord, ResultRecord
+
+client = TestClient(app)
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+DOCUMENT = json.loads((EXAMPLES / "valid_v02_showcase.ksml.json").read_text(encoding="utf-8"))
+
+class FakeRequest:
+    def __init__(self, **headers):
+        self.headers = {k.replace("_", "-"): v for k, v in headers.items()}
+
+class TestSchemaCaching:
+    """Pre-encoded schema responses with ETags"""
+
+    def test_etag_and_304(self):
+        first = client.get("/schema/v0.2")
+        assert first.status_code == 200
+        assert first.json() == SCHEMA_V02
+        etag = first.headers["etag"]
+        assert etag.startswith('"') and etag.endswith('"')
+
+        again = client.get("/schema/v0.2", headers={"if-none-match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+
+        assert client.get("/schema", headers={"if-none-match": etag}).status_code == 304
+        assert client.get("/schema/v0.1", headers={"if-none-match": etag}).status_code == 200
+
+    def test_precompressed_representation(self):
+        compressed = client.get("/schema/v0.1", headers={"accept-encoding": "gzip"})
+        plain = client.get("/schema/v0.1", headers={"accept-encoding": "identity"})
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert "content-encoding" not in plain.headers
+        assert compressed.json() == plain.json() == SCHEMA_V01
+        assert compressed.headers["etag"] != plain.headers["etag"]
+        assert compressed.headers["vary"] == "Accept-Encoding"
+
+    def test_weak_and_wildcard_match(self):
+        etag = client.get("/schema?version=0.1.0").headers["etag"]
+        assert client.get("/schema?version=0.1.0", headers={"if-none-match": f'"other", W/{etag}'}).status_code == 304
+        assert client.get("/schema/v0.2", headers={"if-none-match": "*"}).status_code == 304
+
+    def test_unsupported_version(self):
+        assert client.get("/schema?version=9.9.9").status_code == 400
+
+    def test_accepts_gzip(self):
+        assert accepts_gzip(FakeRequest(accept_encoding="gzip, deflate, br"))
+        assert accepts_gzip(FakeRequest(accept_encoding="*"))
+        assert not accepts_gzip(FakeRequest(accept_encoding="gzip;q=0, br"))
+        assert not accepts_gzip(FakeRequest(accept_encoding="*;q=0"))
+        assert not accepts_gzip(FakeRequest())
+
+class TestVerdictEtags:
+    """/validate ETag = canonical document hash"""
+
+    def test_etag_is_document_hash(self):
+        response = client.post("/validate", json=DOCUMENT)
+        assert response.headers["etag"] == f'"{canonical_hash(DOCUMENT)}"'
+
+    def test_revalidate_without_body(self):
+        etag = client.post("/validate", json=DOCUMENT).headers["etag"]
+        response = client.post("/validate", headers={"if-none-match": etag, "content-length": "0"})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+    def test_stale_etag_with_different_body(self):
+        etag = client.post("/validate", json=DOCUMENT).headers["etag"]
+        other = {**DOCUMENT, "steps": "not a list"}
+        response = client.post("/validate", json=other, headers={"if-none-match": etag})
+        assert response.status_code == 200
+        assert response.json()["valid"] is False
+        assert response.headers["etag"] == f'"{canonical_hash(other)}"'
+        # The same document with its own tag is still answered from the cache
+        assert client.post("/validate", json=DOCUMENT, headers={"if-none-match": etag}).status_code == 304
+
+    def test_unknown_hash(self):
+        headers = {"if-none-match": '"' + "0" * 64 + '"', "content-length": "0"}
+        assert client.post("/validate", headers=headers).status_code == 412
+        # With the document attached, an unknown hash just means "validate it"
+        response = client.post("/validate", json=DOCUMENT, headers={"if-none-match": '"' + "0" * 64 + '"'})
+        assert response.status_code == 200
+
+    def test_get_cached_verdict(self):
+        posted = client.post("/validate", json=DOCUMENT)
+        document_hash = canonical_hash(DOCUMENT)
+        fetched = client.get(f"/validate/{document_hash}")
+        assert fetched.status_code == 200
+        assert fetched.json() == posted.json()
+        assert client.get(f"/validate/{document_hash}", headers={"if-none-match": posted.headers["etag"]}).status_code == 304
+        assert client.get("/validate/" + "f" * 64).status_code == 404
+
+    def test_batch_fills_cache(self):
+        document = {**DOCUMENT, "metadata": {**DOCUMENT["metadata"], "title": "Batch-only document"}}
+        client.post("/validate/batch", json={"documents": [document]})
+        assert client.get(f"/validate/{canonical_hash(document)}").json()["valid"] is True
+
+    def test_transient_results_not_cached(self, monkeypatch):
+        document = {**DOCUMENT, "metadata": {**DOCUMENT["metadata"], "title": "Over budget"}}
+        budget_error = ResultRecord(False, "0.2.0", [ErrorRecord("KSML_008", "budget", "root", "ERROR")], [])
+        monkeypatch.setattr(main, "validate_single_document", lambda *args: budget_error)
+        assert client.post("/validate", json=document).json()["errors"][0]["code"] == "KSML_008"
+        assert client.get(f"/validate/{canonical_hash(document)}").status_code == 404
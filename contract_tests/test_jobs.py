@@ -0,0 +1,146 @@
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import psutil
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+import main
+from main import app, JOBS
+from jobs import JobManager
+from results import ResultRecord
+
+client = TestClient(app)
+
+EXAMPLES = sorted((Path(__file__).parent.parent / "examples").glob("*.json"))
+
+def corpus_lines():
+    lines = [json.dumps(json.loads(path.read_text(encoding="utf-8"))) for path in EXAMPLES]
+    return lines + ["", "{not json"]
+
+def wait_for(job_id, status="completed", timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] == status:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} stuck in {job['status']}")
+
+def always_valid(line):
+    return ResultRecord(True, "0.2.0", [], [])
+
+class TestJobsApi:
+    """POST /jobs, progress, paged results, cancellation"""
+
+    def test_upload_job(self):
+        lines = corpus_lines()
+        response = client.post("/jobs", content="\n".join(lines).encode("utf-8"),
+                               headers={"content-type": "application/x-ndjson"})
+        assert response.status_code == 202
+        job = wait_for(response.json()["id"])
+
+        assert job["progress"] == {"lines_read": len(lines), "lines_total": len(lines), "percent": 100.0}
+        assert job["documents"] == len(lines) - 1  # the blank line is skipped
+        assert job["valid"] + job["invalid"] == job["documents"]
+        assert job["throughput"]["lines_per_second"] > 0
+        assert not os.path.exists(JOBS.upload_path(job["id"]))
+
+        collected, cursor = [], 0
+        while cursor is not None:
+            page = client.get(f"/jobs/{job['id']}/results", params={"cursor": cursor, "limit": 3}).json()
+            collected += page["results"]
+            cursor = page["next_cursor"]
+        assert [item["index"] for item in collected] == list(range(job["documents"]))
+        assert collected[-1]["line"] == len(lines)
+        assert collected[-1]["result"]["errors"][0]["code"] == "KSML_001"
+
+    def test_local_file_job(self):
+        Path(JOBS.input_root, "corpus.jsonl").write_text("\n".join(corpus_lines()[:3]) + "\n", encoding="utf-8")
+        response = client.post("/jobs", json={"path": "corpus.jsonl"})
+        assert response.status_code == 202
+        job = wait_for(response.json()["id"])
+        assert job["source"] == "file" and job["documents"] == 3
+        assert Path(JOBS.input_root, "corpus.jsonl").exists()
+
+    def test_local_file_must_stay_in_input_root(self):
+        assert client.post("/jobs", json={"path": "../../etc/passwd"}).status_code == 403
+        assert client.post("/jobs", json={"path": "missing.jsonl"}).status_code == 404
+
+    def test_unknown_job(self):
+        assert client.get("/jobs/nope").status_code == 404
+        assert client.get("/jobs/nope/results").status_code == 404
+
+class TestJobManager:
+    """Cancellation and resuming after a restart"""
+
+    def write_corpus(self, manager, job_id, count):
+        path = manager.upload_path(job_id)
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps({"n": i}) + "\n" for i in range(count))
+        return path
+
+    def test_cancel_queued_job(self, tmp_path):
+        manager = JobManager(str(tmp_path), always_valid)
+        path = self.write_corpus(manager, "job1", 5)
+        manager.submit("job1", "upload", path, 5)
+        assert manager.cancel("job1")["status"] == "cancelled"
+        assert not os.path.exists(path)
+
+    def test_reused_pid_is_orphan(self, tmp_path):
+        manager = JobManager(str(tmp_path), always_valid)
+        manager.submit("job1", "upload", self.write_corpus(manager, "job1", 1), 1)
+        started = psutil.Process().create_time()
+
+        def claim(claimed_at):
+            conn = manager._connect()
+            with conn:
+                conn.execute("UPDATE jobs SET status = 'running', owner = ?, run_started_at = ? WHERE id = 'job1'",
+                             (os.getpid(), claimed_at))
+            conn.close()
+
+        claim(time.time())  # claimed by this very process: still running
+        assert manager.requeue_orphans() == 0
+        claim(started - 60)  # claimed before this process existed: its pid was reused
+        assert manager.requeue_orphans() == 1
+        assert manager.get("job1")["status"] == "queued"
+
+    def test_failing_line_reported_in_place(self, monkeypatch):
+        def explode(document, client_ip):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(main, "validate_single_document", explode)
+        result = main.validate_raw_document(b'{"ksml_version": "0.2.0"}')
+        assert result.to_dict()["errors"] == [{"code": "KSML_001", "message": "Internal System Error: RuntimeError",
+                                                "path": "root", "severity": "ERROR"}]
+
+    def test_resumes_orphaned_job(self, tmp_path):
+        manager = JobManager(str(tmp_path), always_valid, workers=1, chunk_size=2)
+        path = self.write_corpus(manager, "job1", 5)
+        manager.submit("job1", "upload", path, 5)
+
+        # A previous process died after committing the first two documents
+        with open(path, "rb") as f:
+            offset = len(f.readline()) + len(f.readline())
+        conn = manager._connect()
+        with conn:
+            conn.execute("UPDATE jobs SET status = 'running', owner = ?, lines_read = 2, documents = 2, valid = 2,"
+                         " offset = ? WHERE id = 'job1'", (2 ** 22 + 12345, offset))
+        conn.close()
+
+        manager.start()
+        try:
+            deadline = time.time() + 10
+            while manager.get("job1")["status"] != "completed" and time.time() < deadline:
+                time.sleep(0.05)
+            job = manager.get("job1")
+        finally:
+            manager.stop()
+        assert job["status"] == "completed"
+        assert job["documents"] == 5 and job["valid"] == 5
+        page, _ = manager.results("job1", 0, 10)
+        assert [(seq, line) for seq, line, _ in page] == [(2, 3), (3, 4), (4, 5)]
@@ -0,0 +1,107 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app
+from linting.lint_engine import LintEngine
+
+client = TestClient(app)
+
+METADATA = {"id": "5f0c6c1e-8d1a-4c59-9a55-0f3c2b7d9e10", "author": "lint", "title": "Lint",
+            "created_at": "2024-01-01T00:00:00Z"}
+
+def document(version="0.2.0", **fields):
+    step = {"name": "Step", "action": "run_task", "parameters": {}}
+    return {"ksml_version": version, "metadata": dict(METADATA), "configurations": {}, "steps": [step], **fields}
+
+class TestEngine:
+    """linting.lint_engine.LintEngine"""
+
+    def test_dispatch_by_kind_and_version(self):
+        engine = LintEngine()
+        seen = []
+
+        @engine.rule("KSML_200", "step", versions=("0.2.0",))
+        def every_step(ctx, path, index, step):
+            seen.append(path)
+            yield path, step["name"]
+
+        @engine.rule("KSML_200", "extension", versions=("0.1.0",))
+        def never_on_v02(ctx, path, name, value):
+            raise AssertionError("dispatched to the wrong version")
+
+        doc = document(steps=[{"name": "a"}, {"name": "b"}, "not a step"], extensions={"x-a": 1})
+        findings = engine.lint(doc, "0.2.0")
+        assert seen == ["steps.0", "steps.1"]
+        assert [(f.code, f.path, f.severity) for f in findings] == [("KSML_200", "steps.0", "WARNING"),
+                                                                     ("KSML_200", "steps.1", "WARNING")]
+        assert str(findings[0]) == "KSML_200 steps.0: Deprecated feature used: a"
+        assert set(engine.table("0.2.0")) == {"step"}
+
+    def test_stats(self):
+        engine = LintEngine()
+
+        @engine.rule("KSML_201", "condition")
+        def conditions(ctx, path, index, condition):
+            return ()
+
+        doc = document(steps=[{"name": "a", "conditions": [{"type": "run_if"}, {"type": "skip_if"}]}])
+        engine.lint(doc, "0.2.0")
+        stats = engine.stats()["conditions"]
+        assert stats["calls"] == 2 and stats["findings"] == 0 and stats["kind"] == "condition"
+        engine.reset_stats()
+        assert engine.stats()["conditions"]["calls"] == 0
+
+    def test_registration_errors(self):
+        engine = LintEngine()
+        with pytest.raises(ValueError):
+            engine.rule("KSML_201", "parameters")
+        engine.rule("KSML_201", "step", name="dup")(lambda *args: ())
+        with pytest.raises(ValueError):
+            engine.rule("KSML_201", "step", name="dup")(lambda *args: ())
+
+class TestWarnings:
+    """Built-in rules surface in ValidationResult.warnings"""
+
+    def warnings(self, doc):
+        result = client.post("/validate", json=doc).json()
+        return result["valid"], result["warnings"]
+
+    def test_clean_document_has_no_warnings(self):
+        assert self.warnings(document()) == (True, [])
+
+    def test_showcase_has_no_warnings(self):
+        showcase = (Path(__file__).parent.parent / "examples" / "valid_v02_showcase.ksml.json").read_text()
+        result = client.post("/validate", content=showcase, headers={"content-type": "application/json"}).json()
+        assert result["valid"] is True and result["warnings"] == []
+
+    def test_v02_suspicious_constructs(self):
+        doc = document()
+        doc["metadata"]["dependencies"] = [{"name": "svc", "source": "https://example.com/svc"}]
+        doc["steps"][0]["conditions"] = [{"type": "when", "expression": "x"}]
+        valid, warnings = self.warnings(doc)
+        assert valid is True
+        assert [w.split(":")[0] for w in warnings] == ["KSML_201 metadata.dependencies.0", "KSML_202 steps.0.conditions.0.type"]
+
+    def test_v01_gets_no_warnings(self):
+        doc = document(version="0.1.0")
+        doc["metadata"]["id"] = "doc-1"
+        valid, warnings = self.warnings(doc)
+        assert valid is True
+        assert warnings == []  # v0.1 results stay exactly what the v0.1 validator returned
+
+    def test_invalid_documents_still_linted(self):
+        doc = document(steps=[{"name": "Step", "action": "Bad Action", "parameters": {},
+                               "conditions": [{"type": "when", "expression": "x"}]}])
+        valid, warnings = self.warnings(doc)
+        assert valid is False
+        assert warnings[0].startswith("KSML_202 steps.0.conditions.0.type:")
+
+    def test_rule_timings_exposed(self):
+        rules = client.get("/admin/lint").json()["rules"]
+        assert {"unpinned_dependency", "unknown_condition_type"} <= set(rules)
+        assert all({"calls", "findings", "total_ms", "mean_us"} <= set(stats) for stats in rules.values())
@@ -0,0 +1,79 @@
+import io
+import json
+import logging
+import queue
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import LOG_PIPELINE, app
+from log_pipeline import DeferredQueueHandler, JsonFormatter, LogPipeline, SuccessSampler, log_extra
+
+client = TestClient(app)
+
+def make_record(msg, *args, level=logging.INFO, **extra):
+    record = logging.LogRecord("ksml-validator", level, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+class TestStructuredLogging:
+    """Queue-based JSON logging with success sampling"""
+
+    def test_json_records(self):
+        record = make_record("Validation failed with %d errors for version %s", 2, "0.2.0",
+                             **log_extra("validation.failure", ksml_version="0.2.0", error_count=2))
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["message"] == "Validation failed with 2 errors for version 0.2.0"
+        assert entry["event"] == "validation.failure"
+        assert entry["error_count"] == 2
+        assert entry["level"] == "INFO"
+
+    def test_sampling_only_touches_success_records(self):
+        sampler = SuccessSampler(rate=0.0)
+
+        assert sampler.filter(make_record("ok", **log_extra("validation.success", sampled=True))) is False
+        assert sampler.filter(make_record("bad", **log_extra("validation.failure"))) is True
+        assert sampler.filter(make_record("warn", level=logging.WARNING, **log_extra("x", sampled=True))) is True
+        assert sampler.dropped == 1
+
+    def test_formatting_is_deferred(self):
+        handler = DeferredQueueHandler(queue.Queue())
+        record = make_record("Validation request from %s", "10.0.0.1")
+        handler.handle(record)
+
+        queued = handler.queue.get_nowait()
+        assert queued.msg == "Validation request from %s"
+        assert queued.args == ("10.0.0.1",)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = DeferredQueueHandler(queue.Queue(maxsize=1))
+        handler.handle(make_record("one"))
+        handler.handle(make_record("two"))
+        assert handler.overflowed == 1
+
+    def test_pipeline_writes_from_listener(self):
+        stream = io.StringIO()
+        pipeline = LogPipeline(logging.INFO, 1.0, 100, stream)
+        pipeline.start()
+        try:
+            logging.getLogger("ksml-pipeline-test").warning("hello %s", "world")
+        finally:
+            pipeline.stop()
+            logging.getLogger().removeHandler(pipeline.handler)
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert any(line["message"] == "hello world" for line in lines)
+
+    def test_lifespan_stops_listener(self):
+        with TestClient(app):
+            assert LOG_PIPELINE.listener._thread is not None
+        assert LOG_PIPELINE.listener._thread is None
+        LOG_PIPELINE.start()
+
+    def test_health_reports_logging(self):
+        health = client.get("/health").json()
+        assert "sample_rate" in health["logging"]
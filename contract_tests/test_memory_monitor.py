@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app
+from memory_monitor import MemorySampler
+
+client = TestClient(app)
+
+class TestMemorySampler:
+    """RSS ring buffer fed by a background thread"""
+
+    def test_ring_buffer_is_bounded(self):
+        sampler = MemorySampler(interval=0, capacity=3, gauges={"items": lambda: 42})
+        for _ in range(5):
+            sampler.sample()
+
+        history = sampler.history()
+        assert len(history) == 3
+        assert history[-1]["items"] == 42
+        assert history[-1]["rss_mb"] > 0
+        assert sampler.history(limit=1) == history[-1:]
+
+    def test_failing_gauge_is_skipped(self):
+        def resized():
+            raise RuntimeError("dictionary changed size during iteration")
+
+        sample = MemorySampler(interval=0, capacity=1, gauges={"cache": resized}).sample()
+        assert sample["cache"] is None
+
+    def test_stale_sample_is_ignored(self):
+        sampler = MemorySampler(interval=0, capacity=1)
+        sampler.sample()
+        sampler.samples[-1]["ts"] -= 60
+        assert sampler.latest(max_age=10) is None
+        assert sampler.latest() is not None
+
+class TestMemoryEndpoints:
+    """Admin memory and tracemalloc endpoints"""
+
+    def test_memory_history(self):
+        res = client.get("/admin/memory").json()
+        assert res["samples"]
+        assert "rate_limit_clients" in res["samples"][-1]
+        assert client.get("/health").json()["memory_mb"] > 0
+
+    def test_tracemalloc_cycle(self):
+        assert client.get("/admin/tracemalloc/snapshot").status_code == 409
+
+        assert client.post("/admin/tracemalloc/start").json()["tracing"] is True
+        try:
+            first = client.get("/admin/tracemalloc/snapshot?limit=5").json()
+            assert first["diff"] is None
+            assert len(first["top"]) <= 5
+
+            hoard = [bytearray(1024) for _ in range(1000)]
+            second = client.get("/admin/tracemalloc/snapshot?limit=5").json()
+            assert second["diff"] is not None
+            assert any(site["size_diff_kb"] > 0 for site in second["diff"])
+            del hoard
+        finally:
+            assert client.post("/admin/tracemalloc/stop").json()["tracing"] is False
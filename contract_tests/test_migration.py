@@ -0,0 +1,100 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app, migrate_raw_document
+from migration import MigrationError, migrate_v01, normalize_date_time
+
+client = TestClient(app)
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+def legacy(**metadata):
+    return {
+        "ksml_version": "0.1.0",
+        "metadata": {"id": "123e4567-e89b-12d3-a456-426614174000", "author": "a", "title": "t",
+                     "created_at": "2024-01-01T00:00:00Z", **metadata},
+        "configurations": {},
+        "steps": [{"name": "s", "action": "noop", "parameters": {}}],
+    }
+
+class TestRewrite:
+    """migration.migrate_v01"""
+
+    def test_version_only(self):
+        source = legacy()
+        migration = migrate_v01(source)
+        assert migration.document == {**source, "ksml_version": "0.2.0"}
+        assert [(c.path, c.action) for c in migration.changes] == [("ksml_version", "set")]
+        assert source["ksml_version"] == "0.1.0"  # input untouched
+
+    def test_legacy_id_and_fields(self):
+        migration = migrate_v01(legacy(id="doc-42", owner="ops"))
+        doc = migration.document
+        assert doc["metadata"]["id"] == migrate_v01(legacy(id="doc-42")).document["metadata"]["id"]  # deterministic
+        assert "owner" not in doc["metadata"]
+        assert doc["extensions"] == {"x-legacy": {"id": "doc-42", "metadata": {"owner": "ops"}}}
+        assert [c.path for c in migration.changes] == ["ksml_version", "metadata.id", "extensions.x-legacy.id",
+                                                       "metadata.owner"]
+
+    def test_retry_policy(self):
+        source = legacy()
+        source["configurations"] = {"max_retries": 2}
+        source["steps"][0]["on_failure"] = "retry"
+        assert migrate_v01(source).document["steps"][0]["retry_policy"] == {"max_attempts": 3}
+        source["configurations"] = {}
+        assert migrate_v01(source).document["steps"][0]["retry_policy"] == {"max_attempts": 4}
+        source["configurations"] = {"max_retries": 9}
+        change = migrate_v01(source).changes[-1]
+        assert change.path == "steps.0.retry_policy" and "capped at 5" in change.details
+
+    @pytest.mark.parametrize("value,expected", [
+        ("2024-01-01", "2024-01-01T00:00:00Z"),
+        ("2024-01-01 10:30", "2024-01-01T10:30:00Z"),
+        ("2024-01-01T10:30:15.5+0530", "2024-01-01T10:30:15.5+05:30"),
+        ("2024-01-01 10:30:15 UTC", "2024-01-01T10:30:15Z"),
+        ("2023-02-29", None),
+        ("٢٠٢٤-٠١-٠١", None),
+        ("yesterday", None),
+    ])
+    def test_normalize_date_time(self, value, expected):
+        assert normalize_date_time(value) == expected
+
+    def test_unmigratable(self):
+        with pytest.raises(MigrationError):
+            migrate_v01([])
+        with pytest.raises(MigrationError):
+            migrate_v01({"ksml_version": "0.3.0"})
+        v02 = json.loads((EXAMPLES / "valid_v02_showcase.ksml.json").read_text())
+        assert migrate_v01(v02).changes == []
+
+class TestValidatedMigration:
+    """Migrated documents are validated in the same pass"""
+
+    @pytest.mark.parametrize("name", ["valid_example", "valid_minimal", "valid_complex"])
+    def test_examples_migrate_to_valid_v02(self, name):
+        record = migrate_raw_document((EXAMPLES / f"{name}.ksml.json").read_bytes())
+        assert record.document["ksml_version"] == "0.2.0"
+        assert record.result.valid is True, record.result.to_dict()
+
+    def test_unfixable_reported(self):
+        source = legacy(created_at="last tuesday")
+        record = migrate_raw_document(json.dumps(source).encode())
+        assert record.result.valid is False
+        assert [e.path for e in record.result.errors] == ["metadata.created_at"]
+
+    def test_unparseable(self):
+        record = migrate_raw_document(b"{not json")
+        assert record.document is None and record.result.errors[0].code == "KSML_001"
+
+    def test_endpoint(self):
+        body = client.post("/migrate", json=legacy(id="doc-1")).json()
+        assert body["document"]["ksml_version"] == "0.2.0"
+        assert body["result"]["valid"] is True
+        assert {"path": "metadata.id", "action": "set"}.items() <= body["changes"][1].items()
+        assert client.post("/migrate", json={"ksml_version": "0.3.0"}).status_code == 400
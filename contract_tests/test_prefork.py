@@ -0,0 +1,53 @@
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+import main
+import run_prefork
+from run_prefork import EXAMPLES_DIR, Supervisor, warm_up
+
+class TestWarmUp:
+    def test_compiles_and_validates_examples(self):
+        documents = len(list(EXAMPLES_DIR.glob("*.json")))
+        assert warm_up(main) == documents > 0
+        for version in main.SUPPORTED_VERSIONS:
+            schema = main.get_schema_for_version(version)
+            assert main.get_validator(version, schema) is main.get_validator(version, schema)
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork needs os.fork()")
+class TestSupervisor:
+    def test_respawns_dead_worker(self, tmp_path, monkeypatch):
+        def fake_worker(app, sock, log_level):
+            # The first worker exits at once; its replacement serves until stopped
+            (tmp_path / str(os.getpid())).touch()
+            if len(list(tmp_path.iterdir())) > 1:
+                time.sleep(30)
+
+        monkeypatch.setattr(run_prefork, "run_worker", fake_worker)
+        supervisor = Supervisor(None, None, 1, "warning")
+
+        def stop_after_respawn():
+            deadline = time.monotonic() + 10
+            while len(list(tmp_path.iterdir())) < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            supervisor.stop(None, None)
+
+        handlers = signal.getsignal(signal.SIGTERM), signal.getsignal(signal.SIGINT)
+        stopper = threading.Thread(target=stop_after_respawn)
+        stopper.start()
+        try:
+            supervisor.run()
+        finally:
+            stopper.join()
+            signal.signal(signal.SIGTERM, handlers[0])
+            signal.signal(signal.SIGINT, handlers[1])
+
+        assert len(list(tmp_path.iterdir())) == 2
+        assert supervisor.children == {} and supervisor.backoff == 0.5
@@ -0,0 +1,46 @@
+import json
+import sys
+from pathlib import Path
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app, BatchValidationResult, ValidationResult, validate_single_document
+from results import BatchRecord
+
+client = TestClient(app)
+
+EXAMPLES_DIR = Path(__file__).parent.parent / "examples"
+
+def fastapi_bytes(model) -> bytes:
+    return json.dumps(
+        jsonable_encoder(model), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+class TestResultSerialization:
+    """Slotted result records serialize exactly like the pydantic response models"""
+
+    def test_examples_match_response_model_bytes(self):
+        for path in sorted(EXAMPLES_DIR.glob("*.json")):
+            document = json.loads(path.read_text(encoding="utf-8"))
+            record = validate_single_document(document, "test")
+            assert record.to_json_bytes() == fastapi_bytes(ValidationResult(**record.to_dict())), path.name
+
+    def test_escaping_matches(self):
+        document = {"ksml_version": "0.2.0", "intent": "ünïcode \"quotes\" \\ \n", "steps": [{"name": "é\t", "action": 1}]}
+        record = validate_single_document(document, "test")
+        assert not record.valid
+        assert record.to_json_bytes() == fastapi_bytes(ValidationResult(**record.to_dict()))
+
+    def test_batch_matches(self):
+        records = [validate_single_document({"ksml_version": "0.2.0"}, "test")] * 3
+        summary = {"valid": 0, "invalid": 3, "errors": 0}
+        expected = BatchValidationResult(results=[r.to_dict() for r in records], summary=summary)
+        assert BatchRecord(records, summary).to_json_bytes() == fastapi_bytes(expected)
+
+    def test_endpoint_returns_json(self):
+        response = client.post("/validate", json={"ksml_version": "0.2.0", "intent": "x", "steps": []})
+        assert response.headers["content-type"] == "application/json"
+        body = response.json()
+        assert list(body) == ["valid", "ksml_version", "errors", "warnings"]
@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app
+from shared_metrics import SharedMetrics
+
+client = TestClient(app)
+
+COUNTERS = ["total_requests", "errors"]
+
+def _worker(path, ready, done):
+    metrics = SharedMetrics(COUNTERS, path=path, slots=4)
+    metrics.inc("total_requests", 5)
+    ready.set()
+    done.wait(10)
+
+class TestSharedMetrics:
+    """Counters aggregated across worker processes"""
+
+    def test_private_store_behaves_like_dict(self):
+        metrics = SharedMetrics(COUNTERS, gauges={"memory_usage": 0})
+        metrics.inc("total_requests")
+        metrics["errors"] = 3
+        metrics["memory_usage"] = 1.5
+
+        assert metrics["total_requests"] == 1
+        assert dict(metrics.items()) == {"total_requests": 1, "errors": 3, "memory_usage": 1.5}
+        assert metrics.aggregate() == {"total_requests": 1, "errors": 3}
+
+    def test_aggregate_across_processes(self, tmp_path):
+        path = str(tmp_path / "metrics.mmap")
+        metrics = SharedMetrics(COUNTERS, path=path, slots=4)
+        metrics.inc("total_requests", 2)
+
+        ctx = multiprocessing.get_context("spawn")
+        ready, done = ctx.Event(), ctx.Event()
+        proc = ctx.Process(target=_worker, args=(path, ready, done))
+        proc.start()
+        try:
+            assert ready.wait(30)
+            assert metrics["total_requests"] == 2
+            assert metrics.aggregate()["total_requests"] == 7
+            pids = {w["pid"] for w in metrics.workers()}
+            assert {os.getpid(), proc.pid} <= pids
+        finally:
+            done.set()
+            proc.join(30)
+
+        # An exited worker's counts are kept once its slot is reclaimed
+        assert metrics.aggregate()["total_requests"] == 7
+        SharedMetrics(COUNTERS, path=path, slots=4)
+        assert metrics.aggregate()["total_requests"] == 7
+
+    def test_metrics_endpoint(self):
+        res = client.get("/metrics").json()
+        assert res["worker_pid"] == os.getpid()
+        assert res["aggregate"]["total_requests"] >= res["worker"]["total_requests"]
+
+        health = client.get("/health").json()
+        assert "aggregate" in health and "workers" in health
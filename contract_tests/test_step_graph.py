@@ -0,0 +1,106 @@
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+# Add validator service to path
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from main import app
+from step_graph import analyze_steps, worst_case_seconds
+
+client = TestClient(app)
+
+def step(step_id, depends_on=None, **fields):
+    body = {"id": step_id, "name": f"Step {step_id}", "action": "run_task", "parameters": {}, **fields}
+    if depends_on is not None:
+        body["conditions"] = [{"type": "depends_on", "expression": depends_on}]
+    return body
+
+METADATA = {"id": "5f0c6c1e-8d1a-4c59-9a55-0f3c2b7d9e10", "author": "graph", "title": "Graph",
+            "created_at": "2024-01-01T00:00:00Z"}
+
+def document(*steps):
+    return {"ksml_version": "0.2.0", "metadata": METADATA, "configurations": {}, "steps": list(steps)}
+
+class TestAnalysis:
+    """step_graph.analyze_steps"""
+
+    def test_sequential_by_default(self):
+        plan = analyze_steps(document(step("a"), step("b"), step("c"))).plan
+        assert plan.order == [0, 1, 2]
+        assert plan.stages == [[0], [1], [2]]
+        assert plan.critical_path == [0, 1, 2]
+
+    def test_parallel_stages(self):
+        plan = analyze_steps(document(
+            step("fetch"), step("lint", ""), step("build", "fetch, lint"), step("test", "build"), step("docs", "fetch"),
+        )).plan
+        assert plan.stages == [[0, 1], [2, 4], [3]]
+        assert [s.depends_on for s in plan.steps] == [[], [], [0, 1], [2], [0]]
+
+    def test_critical_path_durations(self):
+        plan = analyze_steps({**document(
+            step("a", "", timeout_override=10),
+            step("b", "", timeout_override=20, retry_policy={"max_attempts": 3, "backoff_seconds": 5}),
+            step("c", "a b", timeout_override=1),
+        ), "configurations": {"timeout_seconds": 30}}).plan
+        assert plan.steps[1].worst_case_seconds == 3 * 20 + 2 * 5
+        assert plan.critical_path == [1, 2]
+        assert plan.worst_case_seconds == 71.0
+        assert plan.steps[2].earliest_start == 70.0
+
+    def test_worst_case_defaults(self):
+        assert worst_case_seconds({}, {}) == 60.0
+        assert worst_case_seconds({"on_failure": "retry"}, {"max_retries": 2, "timeout_seconds": 5}) == 15.0
+
+    def test_issues(self):
+        analysis = analyze_steps(document(
+            step("a", "c"), step("b", "a"), step("c", "b"), step("self", "self"), step("a"), step("x", "missing"),
+        ))
+        assert analysis.plan is None
+        assert [(i.path, i.details) for i in analysis.issues] == [
+            ("steps.0", "Circular dependency between steps: a, b, c"),
+            ("steps.3", "Circular dependency between steps: self"),
+            ("steps.4.id", "Duplicate step id 'a' (already used by steps.0)"),
+            ("steps.5.conditions.0.expression", "Unknown step id 'missing' in depends_on"),
+        ]
+
+    def test_large_chain(self):
+        n = 20000
+        steps = [step(str(i), str(i - 1) if i else "") for i in range(n)]
+        assert len(analyze_steps(document(*steps)).plan.stages) == n
+        steps[0] = step("0", str(n - 1))
+        issues = analyze_steps(document(*steps)).issues
+        assert len(issues) == 1 and issues[0].details.endswith(f"and {n - 10} more")
+
+class TestValidationAndPlan:
+    """KSML_009 in /validate and the /plan endpoint"""
+
+    def test_graph_errors_reported(self):
+        result = client.post("/validate", json=document(step("a", "b"), step("b", "a"), step("a", ""))).json()
+        assert result["valid"] is False
+        assert {e["code"] for e in result["errors"]} == {"KSML_009"}
+        assert [e["path"] for e in result["errors"]] == ["steps.0", "steps.2.id"]
+        assert result["errors"][0]["message"].startswith("Invalid step graph: Circular dependency")
+
+    def test_v01_unchanged(self):
+        doc = {"ksml_version": "0.1.0", "metadata": {"author": "x"},
+               "steps": [{"id": "a", "name": "A", "action": "run", "parameters": {}},
+                         {"id": "a", "name": "B", "action": "run", "parameters": {}}]}
+        result = client.post("/validate", json=doc).json()
+        assert all(e["code"] != "KSML_009" for e in result["errors"])
+
+    def test_plan(self):
+        doc = document(step("fetch"), step("lint", ""), step("build", "fetch, lint"))
+        response = client.post("/plan", json=doc)
+        assert response.status_code == 200
+        body = response.json()
+        assert response.headers["etag"] == f'"{body["document_hash"]}"'
+        assert body["result"]["valid"] is True
+        assert body["plan"]["stages"] == [[0, 1], [2]]
+        assert body["plan"]["steps"][2]["depends_on"] == [0, 1]
+
+    def test_plan_of_invalid_document(self):
+        body = client.post("/plan", json=document(step("a", "a"))).json()
+        assert body["result"]["valid"] is False
+        assert body["plan"] is None
@@ -0,0 +1,158 @@
+# Lint Rule Engine
+#
+# Rules register for one kind of node (document, metadata, dependency,
+# step, condition, extension) and the KSML versions they apply to. For each
+# version the engine precomputes a kind -> rules table, so a document is
+# walked once and every node goes only to the rules registered for its kind;
+# parts of the document no rule looks at are not walked at all. Each rule's
+# call count, findings and time are recorded.
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from linting.lint_rules import get_rule_v2
+
+NODE_KINDS = ("document", "metadata", "dependency", "step", "condition", "extension")
+VERSIONS = ("0.1.0", "0.2.0")
+
+
+class LintContext(NamedTuple):
+    document: dict
+    version: str
+
+
+class LintFinding(NamedTuple):
+    code: str
+    path: str
+    message: str
+    severity: str
+
+    def __str__(self) -> str:
+        return f"{self.code} {self.path}: {self.message}"
+
+
+# check(ctx, path, key, node) -> iterable of (path, details); key is the
+# step / dependency / condition index, or the extension name
+Check = Callable[[LintContext, str, Any, Any], Iterable[Tuple[str, str]]]
+
+
+class LintRule:
+    __slots__ = ("name", "code", "kind", "versions", "check", "calls", "findings", "nanoseconds")
+
+    def __init__(self, name: str, code: str, kind: str, versions: Tuple[str, ...], check: Check):
+        self.name = name
+        self.code = code
+        self.kind = kind
+        self.versions = versions
+        self.check = check
+        self.calls = self.findings = self.nanoseconds = 0
+
+    def stats(self) -> dict:
+        return {
+            "code": self.code,
+            "kind": self.kind,
+            "versions": list(self.versions),
+            "calls": self.calls,
+            "findings": self.findings,
+            "total_ms": round(self.nanoseconds / 1e6, 3),
+            "mean_us": round(self.nanoseconds / 1e3 / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+class LintEngine:
+    def __init__(self):
+        self._rules: Dict[str, LintRule] = {}
+        self._tables: Dict[str, Dict[str, Tuple[LintRule, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def rule(self, code: str, kind: str, versions: Tuple[str, ...] = VERSIONS, name: Optional[str] = None):
+        """Decorator registering ``check`` for nodes of ``kind`` in documents of ``versions``"""
+        if kind not in NODE_KINDS:
+            raise ValueError(f"Unknown node kind '{kind}' (expected one of {', '.join(NODE_KINDS)})")
+
+        def register(check: Check) -> Check:
+            rule_name = name or check.__name__
+            with self._lock:
+                if rule_name in self._rules:
+                    raise ValueError(f"Lint rule '{rule_name}' is already registered")
+                self._rules[rule_name] = LintRule(rule_name, code, kind, tuple(versions), check)
+                self._tables.clear()
+            return check
+        return register
+
+    def table(self, version: str) -> Dict[str, Tuple[LintRule, ...]]:
+        """Rules by node kind for ``version``; only kinds with at least one rule appear"""
+        table = self._tables.get(version)
+        if table is None:
+            with self._lock:
+                by_kind: Dict[str, List[LintRule]] = {}
+                for rule in self._rules.values():
+                    if version in rule.versions:
+                        by_kind.setdefault(rule.kind, []).append(rule)
+                table = self._tables[version] = {kind: tuple(rules) for kind, rules in by_kind.items()}
+        return table
+
+    def lint(self, document: dict, version: str) -> List[LintFinding]:
+        """One walk over ``document``, dispatching each node to the rules for its kind"""
+        table = self.table(version)
+        findings: List[LintFinding] = []
+        if not table or not isinstance(document, dict):
+            return findings
+        ctx = LintContext(document, version)
+
+        def visit(kind: str, path: str, key, node):
+            for rule in table[kind]:
+                started = time.perf_counter_ns()
+                results = list(rule.check(ctx, path, key, node))
+                rule.nanoseconds += time.perf_counter_ns() - started
+                rule.calls += 1
+                if results:
+                    rule.findings += len(results)
+                    severity, template = get_rule_v2(rule.code)
+                    for finding_path, details in results:
+                        findings.append(LintFinding(rule.code, finding_path, template.format(details=details), severity))
+
+        if "document" in table:
+            visit("document", "root", None, document)
+
+        metadata = document.get("metadata")
+        if isinstance(metadata, dict):
+            if "metadata" in table:
+                visit("metadata", "metadata", None, metadata)
+            dependencies = metadata.get("dependencies")
+            if "dependency" in table and isinstance(dependencies, list):
+                for i, dependency in enumerate(dependencies):
+                    if isinstance(dependency, dict):
+                        visit("dependency", f"metadata.dependencies.{i}", i, dependency)
+
+        steps = document.get("steps")
+        if ("step" in table or "condition" in table) and isinstance(steps, list):
+            for i, step in enumerate(steps):
+                if not isinstance(step, dict):
+                    continue
+                if "step" in table:
+                    visit("step", f"steps.{i}", i, step)
+                conditions = step.get("conditions")
+                if "condition" in table and isinstance(conditions, list):
+                    for j, condition in enumerate(conditions):
+                        if isinstance(condition, dict):
+                            visit("condition", f"steps.{i}.conditions.{j}", j, condition)
+
+        extensions = document.get("extensions")
+        if "extension" in table and isinstance(extensions, dict):
+            for name, value in extensions.items():
+                visit("extension", f"extensions.{name}", name, value)
+        return findings
+
+    def rules(self) -> List[LintRule]:
+        return list(self._rules.values())
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-rule calls, findings and time, most expensive first"""
+        ranked = sorted(self._rules.values(), key=lambda rule: rule.nanoseconds, reverse=True)
+        return {rule.name: rule.stats() for rule in ranked}
+
+    def reset_stats(self):
+        for rule in self._rules.values():
+            rule.calls = rule.findings = rule.nanoseconds = 0
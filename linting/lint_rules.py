@@ -30,6 +30,14 @@ KSML_V2_RULES = {
     "KSML_005": (Severity.ERROR, "Invalid extension configuration: {details}"),
     "KSML_006": (Severity.ERROR, "Malformed dependency specification: {details}"),
     "KSML_007": (Severity.WARNING, "Deprecated v0.2 feature used: {details}"),
+    "KSML_008": (Severity.ERROR, "Validation budget exceeded: {details}"),
+    "KSML_009": (Severity.ERROR, "Invalid step graph: {details}"),
+    "KSML_010": (Severity.ERROR, "Invalid condition expression: {details}"),
+    "KSML_011": (Severity.ERROR, "Invalid action parameters: {details}"),
+
+    # Lint warnings
+    "KSML_201": (Severity.WARNING, "Unpinned dependency: {details}"),
+    "KSML_202": (Severity.WARNING, "Unknown condition type: {details}"),
 }
 
 def get_rule(code):
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark: KSML binary vs JSON for the examples/ corpus
+
+For each example, reports payload size and the time to parse it, and to
+parse plus validate it, from JSON text and from the binary encoding.
+
+Usage:
+    python bench_binary.py [--rounds 2000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from ksml_binary import decode, encode
+from main import validate_single_document
+
+EXAMPLES_DIR = Path(__file__).parent.parent / "examples"
+
+
+def per_call(fn, rounds: int) -> float:
+    return min(timeit.repeat(fn, number=rounds, repeat=3)) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare KSML binary and JSON parse/validate cost")
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'example':40} {'json B':>7} {'bin B':>7} {'loads us':>9} {'decode us':>10} {'json+val us':>12} {'bin+val us':>11}")
+    for path in sorted(EXAMPLES_DIR.glob("*.json")):
+        document = json.loads(path.read_text(encoding="utf-8"))
+        text = json.dumps(document, separators=(",", ":")).encode("utf-8")
+        binary = encode(document)
+        assert decode(binary) == document
+
+        validate_rounds = max(args.rounds // 10, 1)
+        print(f"{path.name:40} {len(text):7} {len(binary):7}"
+              f" {per_call(lambda: json.loads(text), args.rounds):9.1f}"
+              f" {per_call(lambda: decode(binary), args.rounds):10.1f}"
+              f" {per_call(lambda: validate_single_document(json.loads(text), 'bench'), validate_rounds):12.1f}"
+              f" {per_call(lambda: validate_single_document(decode(binary), 'bench'), validate_rounds):11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dedicated uuid / date-time / uri checkers vs jsonschema's FormatChecker
+
+Times checking a mix of valid and invalid values for each format through
+jsonschema's generic FormatChecker and through format_checks (memoized, and
+with the memo bypassed), then times validating the v0.2 showcase document
+with no format checking, with the generic checker and with ours. Formats the
+generic checker cannot enforce here (its optional packages are missing) are
+reported as such.
+
+Usage:
+    python bench_formats.py [--rounds 20000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from jsonschema import FormatChecker
+from jsonschema.validators import validator_for
+import format_checks
+
+VALUES = {
+    "uuid": ["550e8400-e29b-41d4-a716-446655440000", "550e8400e29b41d4a716446655440000", "doc-1"],
+    "date-time": ["2024-01-01T00:00:00Z", "2024-02-29T23:59:59.250+05:30", "2023-02-29T00:00:00Z"],
+    "uri": ["https://api.example.com/v2/items?page=1", "urn:isbn:0451450523", "not a uri"],
+}
+RAW = {"uuid": format_checks.is_uuid, "date-time": format_checks.is_date_time, "uri": format_checks.is_uri}
+
+
+def per_value(fn, values, rounds) -> float:
+    def run():
+        for value in values:
+            fn(value)
+    return min(timeit.repeat(run, number=rounds, repeat=3)) / (rounds * len(values))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    generic = FormatChecker()
+    dedicated = format_checks.build_format_checker()
+    unmemoized = FormatChecker(formats=())
+    for name, check in RAW.items():
+        unmemoized.checks(name)(check)
+
+    print("Per value, through FormatChecker.conforms (the path jsonschema takes):")
+    print(f"{'format':10} {'generic':>12} {'unmemoized':>12} {'memoized':>12}")
+    for name, values in VALUES.items():
+        if name in generic.checkers:
+            generic_us = f"{per_value(lambda v: generic.conforms(v, name), values, args.rounds) * 1e6:9.2f} us"
+        else:
+            generic_us = "not enforced"
+        raw_us = per_value(lambda v: unmemoized.conforms(v, name), values, args.rounds) * 1e6
+        memo_us = per_value(lambda v: dedicated.conforms(v, name), values, args.rounds) * 1e6
+        print(f"{name:10} {generic_us:>12} {raw_us:9.2f} us {memo_us:9.2f} us")
+
+    root = Path(__file__).parent.parent
+    schema = json.loads((root / "schema" / "ksml_schema_v0.2.json").read_text(encoding="utf-8"))
+    document = json.loads((root / "examples" / "valid_v02_showcase.ksml.json").read_text(encoding="utf-8"))
+    validator_cls = validator_for(schema)
+    print("\nv0.2 showcase document, full schema validation:")
+    for label, checker in (("no format checks", None), ("generic FormatChecker", generic), ("format_checks", dedicated)):
+        validator = validator_cls(schema, format_checker=checker)
+        rounds = max(args.rounds // 20, 1)
+        seconds = min(timeit.repeat(lambda: list(validator.iter_errors(document)), number=rounds, repeat=3)) / rounds
+        print(f"  {label:22} {seconds * 1e6:9.1f} us/document")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: slotted result records vs pydantic response models
+
+Validates an error-heavy document once, then times building and serializing
+its result both ways: the old path (pydantic models, re-validated and encoded
+the way FastAPI's response_model does it) and the new path (slotted records
+written straight to JSON bytes). Also checks the two outputs are identical.
+
+Usage:
+    python bench_results.py [--steps 100] [--rounds 2000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from fastapi.encoders import jsonable_encoder
+from main import BatchRecord, BatchValidationResult, ValidationError, ValidationResult, validate_single_document
+
+
+def error_heavy_document(steps: int) -> dict:
+    """Every step breaks several schema rules, so each one reports multiple errors"""
+    return {
+        "ksml_version": "0.2.0",
+        "intent": "Benchmark an error-heavy document",
+        "steps": [{"name": 42, "action": "", "parameters": "not-an-object", "extra": i} for i in range(steps)],
+    }
+
+
+def fastapi_bytes(model) -> bytes:
+    """What FastAPI's serialize_response + JSONResponse.render produce for a model"""
+    return json.dumps(
+        jsonable_encoder(model), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def pydantic_path(record) -> bytes:
+    result = ValidationResult(
+        valid=record.valid,
+        ksml_version=record.ksml_version,
+        errors=[ValidationError(code=e.code, message=e.message, path=e.path, severity=e.severity) for e in record.errors],
+        warnings=list(record.warnings),
+    )
+    # response_model re-validates the returned object before encoding it
+    result = ValidationResult.model_validate(result.model_dump())
+    return fastapi_bytes(result)
+
+
+def record_path(record) -> bytes:
+    fresh = type(record)(record.valid, record.ksml_version, list(record.errors), record.warnings)
+    return fresh.to_json_bytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    record = validate_single_document(error_heavy_document(args.steps), "bench")
+    assert pydantic_path(record) == record_path(record), "wire format differs"
+    batch = BatchValidationResult(results=[record.to_dict()] * 10, summary={"valid": 0, "invalid": 10, "errors": 0})
+    assert fastapi_bytes(batch) == BatchRecord([record] * 10, batch.summary).to_json_bytes()
+
+    print(f"Document: {args.steps} steps, {len(record.errors)} errors, {len(record_path(record))} bytes of JSON")
+    old = min(timeit.repeat(lambda: pydantic_path(record), number=args.rounds, repeat=3)) / args.rounds
+    new = min(timeit.repeat(lambda: record_path(record), number=args.rounds, repeat=3)) / args.rounds
+    print(f"pydantic models + response_model: {old * 1e6:9.1f} us/result")
+    print(f"slotted records + direct bytes:   {new * 1e6:9.1f} us/result")
+    print(f"speedup: {old / new:.1f}x (outputs byte-identical)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Report, for every document in a corpus, whether it validates as v0.1, as v0.2, and under the v0.2 safety layer
+
+Inputs are JSON files, directories (every *.json below them), JSON Lines
+files (*.jsonl, *.ndjson; one document per line) and "-" for JSON Lines on
+stdin. Documents are streamed in chunks to worker processes; each gets one
+parse, one safety walk and one schema pass, from which all three verdicts
+are derived (see validator_service/compatibility.py). --report writes one
+JSON line per document, in input order: its source and the report the
+service's /compatibility endpoint returns. The summary counts documents per
+combination of verdicts. Exits 1 when any document is not valid as v0.2.
+
+Usage:
+    python compatibility_report.py corpus/ more.jsonl --report report.jsonl [--workers 8]
+    zcat corpus.jsonl.gz | python compatibility_report.py - --report -
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+
+_report = _failure = None
+LINE_SUFFIXES = (".jsonl", ".ndjson")
+COLUMNS = ("v0.1", "v0.2", "v0.2-safety")
+
+
+def init_worker():
+    global _report, _failure
+    # Report only: no history database, no memory sampler thread, no per-document logs
+    os.environ["KSML_HISTORY_DB"] = ""
+    os.environ["KSML_MEMORY_SAMPLE_INTERVAL"] = "0"
+    import main as service
+    logging.getLogger("ksml-validator").setLevel(logging.WARNING)
+    _report = service.compatibility_raw_document
+    _failure = service.compatibility_failure
+
+
+def report_chunk(raws: list) -> list:
+    """Serialized report and verdict row per document; a row of None for input that does not parse or fails"""
+    out = []
+    for raw in raws:
+        try:
+            record = _report(raw)
+            report_json = record.to_json_bytes()
+        except Exception as e:  # one document must not lose the whole chunk
+            record = _failure(f"Internal System Error: {type(e).__name__}")
+            report_json = record.to_json_bytes()
+        row = tuple(record.verdicts[c].valid for c in COLUMNS) if record.document_hash is not None else None
+        out.append((report_json, row))
+    return out
+
+
+def iter_inputs(paths):
+    """(source, raw bytes) per document"""
+    for path in paths:
+        if str(path) == "-":
+            for number, line in enumerate(sys.stdin.buffer, 1):
+                if line.strip():
+                    yield f"<stdin>:{number}", line
+        elif path.is_dir():
+            for file in sorted(path.rglob("*.json")):
+                yield str(file), file.read_bytes()
+        elif path.suffix in LINE_SUFFIXES:
+            with open(path, "rb") as f:
+                for number, line in enumerate(f, 1):
+                    if line.strip():
+                        yield f"{path}:{number}", line
+        else:
+            yield str(path), path.read_bytes()
+
+
+def chunks(inputs, size: int):
+    chunk = []
+    for item in inputs:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", type=Path, nargs="+", help='files, directories, or "-" for JSON Lines on stdin')
+    parser.add_argument("--report", help='JSON Lines report, one entry per document ("-" for stdout)')
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=200, help="documents per worker task")
+    args = parser.parse_args()
+
+    to_stdout = args.report == "-"
+    report = sys.stdout.buffer if to_stdout else open(args.report, "wb") if args.report else None
+    rows = Counter()
+
+    def handle(chunk, entries):
+        for (source, _), (report_json, row) in zip(chunk, entries):
+            rows[row] += 1
+            if report is not None:
+                source_json = json.dumps(source, ensure_ascii=False).encode("utf-8")
+                report.write(b'{"source":' + source_json + b',"report":' + report_json + b"}\n")
+
+    try:
+        with ProcessPoolExecutor(args.workers, initializer=init_worker) as pool:
+            pending = deque()
+            for chunk in chunks(iter_inputs(args.inputs), args.chunk_size):
+                # Reports are written in input order; at most two chunks per worker in flight
+                if len(pending) >= 2 * args.workers:
+                    done_chunk, future = pending.popleft()
+                    handle(done_chunk, future.result())
+                pending.append((chunk, pool.submit(report_chunk, [raw for _, raw in chunk])))
+            while pending:
+                done_chunk, future = pending.popleft()
+                handle(done_chunk, future.result())
+    finally:
+        if report is not None and not to_stdout:
+            report.close()
+
+    summary = sys.stderr if to_stdout else sys.stdout
+    documents = sum(rows.values())
+    unparsed = rows.pop(None, 0)
+    print(f"{documents} documents, {unparsed} not parsed", file=summary)
+    print("  " + "".join(f"{column:>13}" for column in COLUMNS) + f"{'documents':>12}", file=summary)
+    for row, count in sorted(rows.items(), reverse=True):
+        print("  " + "".join(f"{'valid' if valid else 'invalid':>13}" for valid in row) + f"{count:>12}",
+              file=summary)
+    ready = sum(count for row, count in rows.items() if row[1])
+    print(f"{ready} of {documents} ready for v0.2", file=summary)
+    return 0 if ready == documents else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
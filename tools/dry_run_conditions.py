@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Dry-run a KSML document's step conditions against many contexts
+
+Reads one context object per line of a JSON Lines file (one per host,
+environment, tenant...) and reports, for every step, how many contexts
+would run it: all of its run_if conditions true and none of its skip_if
+conditions true. Each expression is compiled once and evaluated over all
+rows in one batch. Exits 1 when an expression does not parse.
+
+Usage:
+    python dry_run_conditions.py workflow.ksml.json contexts.jsonl [--json]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from conditions import ExpressionError, compile_expression
+
+
+def load_rows(path: Path) -> list:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise SystemExit(f"{path}:{number}: a context must be a JSON object")
+            rows.append(row)
+    return rows
+
+
+def dry_run(document: dict, rows: list) -> list:
+    """Per step: id, name and the number of rows that would run it"""
+    report = []
+    for i, step in enumerate(document.get("steps", [])):
+        runs = [True] * len(rows)
+        for condition in step.get("conditions", []):
+            kind = condition.get("type")
+            if kind not in ("run_if", "skip_if"):
+                continue
+            results = compile_expression(condition.get("expression", "")).evaluate_batch(rows)
+            want = kind == "run_if"
+            runs = [run and result == want for run, result in zip(runs, results)]
+        report.append({"index": i, "id": step.get("id"), "name": step.get("name"), "runs": sum(runs),
+                       "skipped": len(rows) - sum(runs)})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("document", type=Path)
+    parser.add_argument("contexts", type=Path, help="JSON Lines, one context object per line")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    document = json.loads(args.document.read_text(encoding="utf-8"))
+    rows = load_rows(args.contexts)
+    try:
+        report = dry_run(document, rows)
+    except ExpressionError as e:
+        print(f"Invalid condition expression: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps({"contexts": len(rows), "steps": report}, indent=2))
+        return
+    print(f"{len(rows)} contexts")
+    for entry in report:
+        label = entry["id"] or entry["name"] or f"steps.{entry['index']}"
+        print(f"  {label:30} runs {entry['runs']:>8}  skipped {entry['skipped']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Migrate KSML v0.1 documents to v0.2 in bulk
+
+Inputs are JSON files, directories (every *.json below them) and JSON Lines
+files (*.jsonl, *.ndjson; one document per line). Documents are streamed in
+chunks to worker processes, which rewrite each one (see
+validator_service/migration.py) and validate the rewrite with the service's
+full v0.2 checks in the same pass. With --out, migrated documents are
+written under that directory, keeping file names and line order; a document
+that cannot be migrated is written unchanged. --report writes one JSON line
+per document: its source, the changes made and the validation result.
+Exits 1 when any document failed to migrate or is invalid after migration.
+
+Usage:
+    python migrate_v01.py corpus/ more.jsonl --out migrated/ --report report.jsonl [--workers 8]
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+
+_migrate = None
+LINE_SUFFIXES = (".jsonl", ".ndjson")
+
+
+def load_service():
+    # Validate only: no history database, no memory sampler thread, no per-document logs
+    os.environ["KSML_HISTORY_DB"] = ""
+    os.environ["KSML_MEMORY_SAMPLE_INTERVAL"] = "0"
+    import main as service
+    logging.getLogger("ksml-validator").setLevel(logging.WARNING)
+    return service
+
+
+def init_worker():
+    global _migrate
+    _migrate = load_service().migrate_raw_document
+
+
+def migrate_chunk(items: list) -> list:
+    """(raw, pretty) pairs -> report entries, with the migrated document already serialized"""
+    out = []
+    for raw, pretty in items:
+        record = _migrate(raw)
+        entry = record.to_dict()
+        document = entry.pop("document")
+        if document is not None:
+            entry["output"] = json.dumps(document, indent=4 if pretty else None, ensure_ascii=False,
+                                         separators=None if pretty else (",", ":"))
+        out.append(entry)
+    return out
+
+
+def iter_inputs(paths):
+    """(source, raw bytes, output path relative to --out, is a JSON Lines record)"""
+    for path in paths:
+        if path.is_dir():
+            for file in sorted(path.rglob("*.json")):
+                yield str(file), file.read_bytes(), file.relative_to(path), False
+        elif path.suffix in LINE_SUFFIXES:
+            with open(path, "rb") as f:
+                for number, line in enumerate(f, 1):
+                    if line.strip():
+                        yield f"{path}:{number}", line, Path(path.name), True
+        else:
+            yield str(path), path.read_bytes(), Path(path.name), False
+
+
+def chunks(inputs, size: int):
+    chunk = []
+    for item in inputs:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Outputs:
+    """Writes migrated documents under ``root``: one file per JSON input, one line per JSON Lines record"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._lines = {}
+
+    def write(self, relative: Path, is_line: bool, text: str):
+        target = self.root / relative
+        if is_line:
+            handle = self._lines.get(target)
+            if handle is None:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                handle = self._lines[target] = open(target, "w", encoding="utf-8")
+            handle.write(text.rstrip("\n") + "\n")
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(text + "\n", encoding="utf-8")
+
+    def close(self):
+        for handle in self._lines.values():
+            handle.close()
+
+
+def change_kind(path: str) -> str:
+    return re.sub(r"\.\d+(?=\.|$)", ".N", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", type=Path, nargs="+")
+    parser.add_argument("--out", type=Path, help="directory for migrated documents (omit for a dry run)")
+    parser.add_argument("--report", type=Path, help="JSON Lines report, one entry per document")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=200, help="documents per worker task")
+    args = parser.parse_args()
+
+    outputs = Outputs(args.out) if args.out else None
+    report = open(args.report, "w", encoding="utf-8") if args.report else None
+    totals = Counter()
+    kinds = Counter()
+
+    def handle(chunk, entries):
+        for (source, raw, relative, is_line), entry in zip(chunk, entries):
+            migrated = "output" in entry
+            totals["documents"] += 1
+            if not migrated:
+                totals["failed"] += 1
+            else:
+                totals["valid" if entry["result"]["valid"] else "invalid"] += 1
+                totals["changed"] += bool(entry["changes"])
+            kinds.update(change_kind(change["path"]) for change in entry["changes"])
+            if outputs is not None:
+                text = entry["output"] if migrated else raw.decode("utf-8", errors="replace")
+                outputs.write(relative, is_line, text)
+            if report is not None:
+                report.write(json.dumps({"source": source, "changes": entry["changes"], "result": entry["result"]},
+                                        ensure_ascii=False) + "\n")
+
+    try:
+        with ProcessPoolExecutor(args.workers, initializer=init_worker) as pool:
+            pending = deque()
+            for chunk in chunks(iter_inputs(args.inputs), args.chunk_size):
+                # Results are written in input order; at most two chunks per worker in flight
+                if len(pending) >= 2 * args.workers:
+                    done_chunk, future = pending.popleft()
+                    handle(done_chunk, future.result())
+                pending.append((chunk, pool.submit(migrate_chunk, [(raw, not is_line)
+                                                                   for _, raw, _, is_line in chunk])))
+            while pending:
+                done_chunk, future = pending.popleft()
+                handle(done_chunk, future.result())
+    finally:
+        if outputs is not None:
+            outputs.close()
+        if report is not None:
+            report.close()
+
+    print(f"{totals['documents']} documents: {totals['changed']} changed, {totals['failed']} not migrated, "
+          f"{totals['valid']} valid and {totals['invalid']} invalid as v0.2")
+    for kind, count in kinds.most_common():
+        print(f"  {count:>10}  {kind}")
+    return 1 if totals["invalid"] or totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
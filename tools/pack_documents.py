@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Store KSML documents in a dictionary-compressed pack (.ksmlz) and read them back
+
+pack    Read JSON files, directories (every *.json below them), JSON Lines files
+        (*.jsonl, *.ndjson) or "-" (JSON Lines on stdin), train a preset
+        dictionary on the first --sample documents and write every document
+        as an independently compressed record (see validator_service/document_pack.py).
+        Identical documents are stored once; input that does not parse, or
+        cannot be stored (see document_pack.py), is skipped and counted.
+get     Print one document by metadata.id (its latest version) or canonical hash.
+unpack  Write every document as JSON Lines, in pack order.
+info    Print document count, sizes and compression ratio.
+
+Usage:
+    python pack_documents.py pack corpus/ history.jsonl -o corpus.ksmlz [--sample 1000]
+    python pack_documents.py get corpus.ksmlz --id 123e4567-e89b-12d3-a456-426614174000
+    python pack_documents.py unpack corpus.ksmlz > corpus.jsonl
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from document_pack import DICTIONARY_SIZE, PackError, PackReader, write_pack
+
+LINE_SUFFIXES = (".jsonl", ".ndjson")
+
+
+def iter_raw(paths):
+    for path in paths:
+        if str(path) == "-":
+            yield from (line for line in sys.stdin.buffer if line.strip())
+        elif path.is_dir():
+            for file in sorted(path.rglob("*.json")):
+                yield file.read_bytes()
+        elif path.suffix in LINE_SUFFIXES:
+            with open(path, "rb") as f:
+                yield from (line for line in f if line.strip())
+        else:
+            yield path.read_bytes()
+
+
+def pack(args) -> int:
+    skipped = 0
+
+    def documents():
+        nonlocal skipped
+        for raw in iter_raw(args.inputs):
+            try:
+                yield json.loads(raw)
+            except ValueError:
+                skipped += 1
+
+    stats = write_pack(str(args.output), documents(), args.sample, args.dictionary_size, args.level)
+    print(f"{stats['documents']} documents ({stats['duplicates']} duplicates, {skipped} unparseable and "
+          f"{stats['skipped']} unstorable skipped): "
+          f"{stats['raw_bytes']} bytes -> {stats['stored_bytes']} ({stats['ratio']}x), "
+          f"dictionary {stats['dictionary_bytes']} bytes")
+    return 1 if skipped or stats["skipped"] else 0
+
+
+def get(args) -> int:
+    with PackReader(str(args.pack)) as reader:
+        document = reader.by_id(args.id) if args.id is not None else reader.get(args.hash)
+    if document is None:
+        print("Not found", file=sys.stderr)
+        return 1
+    print(json.dumps(document, indent=2, ensure_ascii=False))
+    return 0
+
+
+def unpack(args) -> int:
+    out = sys.stdout
+    with PackReader(str(args.pack)) as reader:
+        for document in reader:
+            out.write(json.dumps(document, ensure_ascii=False, separators=(",", ":")) + "\n")
+    return 0
+
+
+def info(args) -> int:
+    with PackReader(str(args.pack)) as reader:
+        stats = reader.stats()
+        stats["raw_bytes"] = sum(len(reader.raw(h)) for h in reader.hashes()) if args.raw_size else None
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("pack", help="write a pack")
+    p.add_argument("inputs", type=Path, nargs="+")
+    p.add_argument("-o", "--output", type=Path, required=True)
+    p.add_argument("--sample", type=int, default=1000, help="documents to train the dictionary on")
+    p.add_argument("--dictionary-size", type=int, default=DICTIONARY_SIZE)
+    p.add_argument("--level", type=int, default=9, choices=range(1, 10), metavar="1-9")
+    p.set_defaults(run=pack)
+
+    p = commands.add_parser("get", help="print one document")
+    p.add_argument("pack", type=Path)
+    key = p.add_mutually_exclusive_group(required=True)
+    key.add_argument("--id", help="metadata.id")
+    key.add_argument("--hash", help="canonical SHA-256 (the /validate ETag)")
+    p.set_defaults(run=get)
+
+    p = commands.add_parser("unpack", help="write every document as JSON Lines to stdout")
+    p.add_argument("pack", type=Path)
+    p.set_defaults(run=unpack)
+
+    p = commands.add_parser("info", help="print pack statistics")
+    p.add_argument("pack", type=Path)
+    p.add_argument("--raw-size", action="store_true", help="also decompress everything to total the raw size")
+    p.set_defaults(run=info)
+
+    args = parser.parse_args()
+    try:
+        return args.run(args)
+    except (OSError, PackError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
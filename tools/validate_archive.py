@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Validate every KSML document in a tar or zip archive
+
+Members are streamed out of the archive (never unpacked to disk) and
+validated in parallel worker processes, with the service's limits: a member
+over the document size limit is reported as KSML_004, and an archive that
+decompresses past --max-total-mb is rejected. Exits 1 when any document is
+invalid, 2 when the archive itself is rejected. A path held by more than one
+member is reported as KSML_004 instead of any of their results.
+
+Usage:
+    python validate_archive.py corpus.tar.gz [--workers 4] [--json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "validator_service"))
+from archive_ingest import ArchiveError, iter_members
+
+_validate = None
+
+
+def load_service():
+    # Validate only: no history database, no memory sampler thread, no per-document logs
+    os.environ["KSML_HISTORY_DB"] = ""
+    os.environ["KSML_MEMORY_SAMPLE_INTERVAL"] = "0"
+    import main as service
+    logging.getLogger("ksml-validator").setLevel(logging.WARNING)
+    return service
+
+
+def init_worker():
+    global _validate
+    _validate = load_service().validate_raw_document
+
+
+def validate_member(data: bytes) -> dict:
+    return _validate(data, "cli").to_dict()
+
+
+def collect(service, future) -> dict:
+    try:
+        return future.result()
+    except Exception as e:
+        return service.internal_error_result(e).to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("archive", type=Path)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-total-mb", type=int, default=256, help="decompressed size budget")
+    parser.add_argument("--max-members", type=int, default=10000)
+    parser.add_argument("--json", action="store_true", help="print the results as one JSON object")
+    args = parser.parse_args()
+
+    service = load_service()
+
+    results = {}
+    seen, duplicates = set(), set()
+    with open(args.archive, "rb") as f, ProcessPoolExecutor(args.workers, initializer=init_worker) as pool:
+        pending = {}
+        try:
+            for member in iter_members(f, service.MAX_DOCUMENT_SIZE, args.max_total_mb * 1024 * 1024, args.max_members):
+                if member.path in seen:
+                    # Results are keyed by path: a second member there would silently replace the first
+                    duplicates.add(member.path)
+                    continue
+                seen.add(member.path)
+                if member.error is not None:
+                    results[member.path] = service.member_error(member.error).to_dict()
+                    continue
+                # Keep at most two members per worker in flight
+                if len(pending) >= 2 * args.workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[pending.pop(future)] = collect(service, future)
+                pending[pool.submit(validate_member, member.data)] = member.path
+        except ArchiveError as e:
+            for future in pending:
+                future.cancel()
+            print(f"{args.archive}: {e}", file=sys.stderr)
+            return 2
+        for future in wait(pending).done:
+            results[pending[future]] = collect(service, future)
+    for path in duplicates:
+        results[path] = service.member_error("More than one archive member has this path").to_dict()
+
+    invalid = sorted(path for path, result in results.items() if not result["valid"])
+    if args.json:
+        print(json.dumps({"results": results, "summary": {
+            "documents": len(results), "valid": len(results) - len(invalid), "invalid": len(invalid)}}, indent=2))
+    else:
+        for path in sorted(results):
+            result = results[path]
+            print(f"{'OK  ' if result['valid'] else 'FAIL'} {path}")
+            for error in result["errors"]:
+                print(f"     {error['code']} {error['path']}: {error['message']}")
+        print(f"\n{len(results)} documents, {len(invalid)} invalid")
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
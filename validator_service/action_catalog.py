@@ -0,0 +1,237 @@
+"""Action catalog: per-action parameter rules, compiled once, hot-reloaded.
+
+The catalog is every ``*.json`` file in a directory, each of the form::
+
+    {"actions": {
+        "deploy_service": {
+            "target": "required",               # required | optional | forbidden
+            "target_pattern": "^[a-z0-9-]+$",
+            "value_types": ["string", "null"],  # JSON types allowed for parameters.value
+            "value_required": false,
+            "options": ["region", "strategy"],  # allowed option keys; omit to allow any
+            "required_options": ["region"]
+        }
+    }}
+
+Each entry is compiled into a closure over precomputed sets and regexes, so
+checking a step is one dictionary lookup plus that closure, however large
+the catalog. The directory's file names, sizes and mtimes are re-read at
+most every ``check_interval`` seconds; when they change, the whole catalog
+is loaded and compiled aside and swapped in with one assignment (and
+``on_reload`` runs, so cached verdicts can be dropped). A catalog
+that fails to load leaves the previous one in place and is reported in
+``stats()``.
+"""
+
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+TARGET_MODES = ("required", "optional", "forbidden")
+JSON_TYPES = {
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+SPEC_KEYS = {"target", "target_pattern", "value_types", "value_required", "options", "required_options",
+             "description"}
+
+Check = Callable[[dict], List[Tuple[str, str]]]
+
+
+class CatalogError(ValueError):
+    """A catalog file or action entry is malformed"""
+
+
+class ActionIssue(NamedTuple):
+    path: str
+    details: str
+
+
+def _string_list(spec: dict, key: str, action: str) -> Optional[List[str]]:
+    value = spec.get(key)
+    if value is None:
+        return None
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise CatalogError(f"Action '{action}': '{key}' must be a list of strings")
+    return value
+
+
+def compile_action(action: str, spec: Any) -> Check:
+    """A parameters check for one catalog entry; CatalogError when the entry is malformed"""
+    if not isinstance(spec, dict):
+        raise CatalogError(f"Action '{action}' must be an object")
+    unknown = set(spec) - SPEC_KEYS
+    if unknown:
+        raise CatalogError(f"Action '{action}': unknown keys {', '.join(sorted(unknown))}")
+
+    target_mode = spec.get("target", "optional")
+    if target_mode not in TARGET_MODES:
+        raise CatalogError(f"Action '{action}': 'target' must be one of {', '.join(TARGET_MODES)}")
+    try:
+        target_pattern = re.compile(spec["target_pattern"]) if "target_pattern" in spec else None
+    except (re.error, TypeError) as e:
+        raise CatalogError(f"Action '{action}': invalid target_pattern ({e})") from None
+    value_types = _string_list(spec, "value_types", action)
+    if value_types is not None and not set(value_types) <= set(JSON_TYPES):
+        raise CatalogError(f"Action '{action}': value_types must be among {', '.join(JSON_TYPES)}")
+    type_checks = tuple(JSON_TYPES[t] for t in value_types) if value_types is not None else None
+    type_names = " or ".join(value_types or ())
+    value_required = bool(spec.get("value_required", False))
+    options = _string_list(spec, "options", action)
+    allowed_options = frozenset(options) if options is not None else None
+    required_options = tuple(_string_list(spec, "required_options", action) or ())
+
+    def check(parameters: dict) -> List[Tuple[str, str]]:
+        issues = []
+        if "target" in parameters:
+            target = parameters["target"]
+            if target_mode == "forbidden":
+                issues.append(("target", f"action '{action}' takes no target"))
+            elif target_pattern is not None and isinstance(target, str) and not target_pattern.search(target):
+                issues.append(("target", f"target '{target[:64]}' does not match {target_pattern.pattern} for action '{action}'"))
+        elif target_mode == "required":
+            issues.append(("target", f"action '{action}' requires a target"))
+
+        if "value" in parameters:
+            value = parameters["value"]
+            if type_checks is not None and not any(is_type(value) for is_type in type_checks):
+                issues.append(("value", f"action '{action}' takes a {type_names or 'no'} value"))
+        elif value_required:
+            issues.append(("value", f"action '{action}' requires a value"))
+
+        options_given = parameters.get("options")
+        if isinstance(options_given, dict):
+            if allowed_options is not None:
+                for key in options_given:
+                    if key not in allowed_options:
+                        issues.append((f"options.{key}", f"option '{key}' is not accepted by action '{action}'"))
+            for key in required_options:
+                if key not in options_given:
+                    issues.append(("options", f"action '{action}' requires option '{key}'"))
+        elif required_options:
+            issues.append(("options", f"action '{action}' requires options {', '.join(required_options)}"))
+        return issues
+    return check
+
+
+def load_catalog(directory: Path) -> Dict[str, Check]:
+    """Compile every action of every ``*.json`` file; an action defined twice is an error"""
+    validators: Dict[str, Check] = {}
+    sources: Dict[str, str] = {}
+    for path in sorted(directory.glob("*.json")):
+        try:
+            content = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise CatalogError(f"{path.name}: {e}") from None
+        actions = content.get("actions") if isinstance(content, dict) else None
+        if not isinstance(actions, dict):
+            raise CatalogError(f"{path.name}: expected an object with an 'actions' object")
+        for action, spec in actions.items():
+            if action in sources:
+                raise CatalogError(f"{path.name}: action '{action}' is already defined in {sources[action]}")
+            try:
+                validators[action] = compile_action(action, spec)
+            except CatalogError as e:
+                raise CatalogError(f"{path.name}: {e}") from None
+            sources[action] = path.name
+    return validators
+
+
+class ActionCatalog:
+    def __init__(self, directory: Optional[str], check_interval: float = 2.0, strict: bool = False,
+                 on_reload: Optional[Callable[[], None]] = None):
+        self.directory = Path(directory) if directory else None
+        self.check_interval = check_interval
+        self.strict = strict  # unknown actions are issues
+        self.on_reload = on_reload  # e.g. forget results computed with the previous catalog
+        self._validators: Dict[str, Check] = {}
+        self._signature: Optional[tuple] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.loaded_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._validators)
+
+    def _scan(self) -> tuple:
+        if self.directory is None or not self.directory.is_dir():
+            return ()
+        entries = []
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                stat = path.stat()
+            except OSError:  # removed between glob and stat
+                continue
+            entries.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload when the directory changed; True when a new catalog was swapped in"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        if not self._lock.acquire(blocking=force):
+            return False  # another thread is checking; keep using the current catalog
+        try:
+            self._checked_at = now
+            signature = self._scan()
+            if signature == self._signature and not force:
+                return False
+            try:
+                validators = load_catalog(self.directory) if signature else {}
+            except CatalogError as e:
+                self.last_error = str(e)
+                self._signature = signature  # retried when the files change again
+                return False
+            self._validators = validators
+            self._signature = signature
+            self.reloads += 1
+            self.loaded_at = time.time()
+            self.last_error = None
+            if self.on_reload is not None:
+                self.on_reload()
+            return True
+        finally:
+            self._lock.release()
+
+    def validate_steps(self, steps: Iterable[Any]) -> List[ActionIssue]:
+        """Parameter issues of every step whose action is in the catalog"""
+        self.refresh()
+        validators = self._validators  # one snapshot for the whole document
+        issues = []
+        if not validators and not self.strict:
+            return issues
+        for i, step in enumerate(steps):
+            if not isinstance(step, dict):
+                continue
+            action = step.get("action")
+            if not isinstance(action, str):
+                continue
+            check = validators.get(action)
+            if check is None:
+                if self.strict:
+                    issues.append(ActionIssue(f"steps.{i}.action", f"action '{action[:64]}' is not in the catalog"))
+                continue
+            parameters = step.get("parameters")
+            if isinstance(parameters, dict):
+                for path, details in check(parameters):
+                    issues.append(ActionIssue(f"steps.{i}.parameters.{path}", details))
+        return issues
+
+    def stats(self) -> dict:
+        return {
+            "directory": str(self.directory) if self.directory else None,
+            "actions": len(self._validators),
+            "files": len(self._signature or ()),
+            "strict": self.strict,
+            "reloads": self.reloads,
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,128 @@
+"""Global admission control with separate lanes per endpoint class.
+
+Each lane bounds how many requests run at once and how much estimated work
+(cost units) they hold together. Requests that do not fit wait in a bounded
+FIFO queue; when the queue is full, or the wait exceeds its limit, the request
+is shed immediately so the caller can retry later.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+COST_BYTES_PER_UNIT = 64 * 1024
+COST_STEPS_PER_UNIT = 25
+
+
+def estimate_cost(body_bytes: int, step_count: int, documents: int = 1) -> int:
+    """Estimate validation work in cost units from body size and step count"""
+    return documents + body_bytes // COST_BYTES_PER_UNIT + step_count // COST_STEPS_PER_UNIT
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"{lane} lane {reason}")
+
+
+class AdmissionLane:
+    """Concurrency and cost limit with a bounded wait queue"""
+
+    def __init__(self, name: str, max_concurrency: int, capacity: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self.active = 0
+        self.cost_in_use = 0
+        self._waiters = deque()  # (cost, future) in arrival order
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._avg_hold = 0.05  # seconds, exponentially weighted
+
+    def _fits(self, cost: int) -> bool:
+        return self.active < self.max_concurrency and self.cost_in_use + cost <= self.capacity
+
+    def _acquire(self, cost: int):
+        self.active += 1
+        self.cost_in_use += cost
+
+    def _release(self, cost: int):
+        self.active -= 1
+        self.cost_in_use -= cost
+        self._grant()
+
+    def _grant(self):
+        # Strict FIFO: a large request at the head is not overtaken by small ones
+        while self._waiters and self._fits(self._waiters[0][0]):
+            waiting_cost, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._acquire(waiting_cost)
+            future.set_result(None)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up"""
+        backlog = (len(self._waiters) + 1) / max(self.max_concurrency, 1)
+        return max(1, math.ceil(self._avg_hold * backlog))
+
+    @asynccontextmanager
+    async def admit(self, cost: int = 1):
+        cost = min(max(cost, 1), self.capacity)
+
+        if not self._waiters and self._fits(cost):
+            self._acquire(cost)
+        else:
+            if len(self._waiters) >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected(self.name, "queue full", self.retry_after())
+
+            future = asyncio.get_running_loop().create_future()
+            entry = (cost, future)
+            self._waiters.append(entry)
+            self.queued += 1
+            try:
+                await asyncio.wait_for(future, self.max_wait)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if future.done() and not future.cancelled():
+                    # Granted in the same tick we gave up: hand the slot back
+                    self._release(cost)
+                elif entry in self._waiters:
+                    self._waiters.remove(entry)
+                    # A request held back only by this one may fit now
+                    self._grant()
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timed_out += 1
+                    raise AdmissionRejected(self.name, "wait timeout", self.retry_after())
+                raise
+
+        self.admitted += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._avg_hold = 0.9 * self._avg_hold + 0.1 * (time.perf_counter() - started)
+            self._release(cost)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "cost_in_use": self.cost_in_use,
+            "capacity": self.capacity,
+            "queued_now": len(self._waiters),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
@@ -0,0 +1,119 @@
+"""Stream KSML documents out of tar or zip archives without unpacking to disk.
+
+Members are read one at a time straight from the (possibly compressed)
+archive. Decompressed bytes are counted as they are read: a member larger
+than the per-document limit is reported and skipped, and once the whole
+archive exceeds its decompressed budget (or member count) reading stops with
+``ArchiveTooLarge``, so decompression bombs cost at most the budget.
+"""
+
+import tarfile
+import zipfile
+import zlib
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+READ_CHUNK = 64 * 1024
+DOCUMENT_SUFFIX = ".json"
+
+
+class ArchiveError(ValueError):
+    """Not a readable tar or zip archive"""
+
+
+class ArchiveTooLarge(ArchiveError):
+    """The archive exceeds its decompressed size or member budget"""
+
+
+class Member(NamedTuple):
+    path: str
+    data: Optional[bytes]
+    error: Optional[str]  # set instead of data when the member was rejected
+
+
+class _Budget:
+    def __init__(self, max_total_bytes: int, max_members: int):
+        self.max_total_bytes = max_total_bytes
+        self.max_members = max_members
+        self.total_bytes = 0
+        self.members = 0
+
+    def count_member(self):
+        self.members += 1
+        if self.members > self.max_members:
+            raise ArchiveTooLarge(f"Archive has more than {self.max_members} documents")
+
+    def count_bytes(self, n: int):
+        self.total_bytes += n
+        if self.total_bytes > self.max_total_bytes:
+            raise ArchiveTooLarge(f"Archive decompresses to more than {self.max_total_bytes} bytes")
+
+
+def _read_limited(f: BinaryIO, limit: int, budget: _Budget) -> Optional[bytes]:
+    """The member's bytes, or None as soon as it grows past ``limit``"""
+    chunks = []
+    size = 0
+    while True:
+        chunk = f.read(READ_CHUNK)
+        if not chunk:
+            return b"".join(chunks)
+        size += len(chunk)
+        budget.count_bytes(len(chunk))
+        if size > limit:
+            return None
+        chunks.append(chunk)
+
+
+def _normalize(name: str) -> str:
+    while name.startswith("./"):
+        name = name[2:]
+    return name
+
+
+def _too_large(limit: int) -> str:
+    return f"Document exceeds {limit} bytes decompressed"
+
+
+def _iter_zip(fileobj: BinaryIO, max_member_bytes: int, budget: _Budget) -> Iterator[Member]:
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.endswith(DOCUMENT_SUFFIX):
+                continue
+            budget.count_member()
+            path = _normalize(info.filename)
+            if info.file_size > max_member_bytes:  # declared size; the actual size is enforced while reading
+                yield Member(path, None, _too_large(max_member_bytes))
+                continue
+            with archive.open(info) as f:
+                data = _read_limited(f, max_member_bytes, budget)
+            yield Member(path, data, None if data is not None else _too_large(max_member_bytes))
+
+
+def _iter_tar(fileobj: BinaryIO, max_member_bytes: int, budget: _Budget) -> Iterator[Member]:
+    # Stream mode ("r|*"): members are read strictly in order, with transparent gzip/bz2/xz
+    with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+        for info in archive:
+            if not info.isfile() or not info.name.endswith(DOCUMENT_SUFFIX):
+                budget.count_bytes(max(info.size, 0))  # skipping still decompresses the member
+                continue
+            budget.count_member()
+            path = _normalize(info.name)
+            if info.size > max_member_bytes:
+                budget.count_bytes(info.size)
+                yield Member(path, None, _too_large(max_member_bytes))
+                continue
+            data = _read_limited(archive.extractfile(info), max_member_bytes, budget)
+            yield Member(path, data, None if data is not None else _too_large(max_member_bytes))
+
+
+def iter_members(fileobj: BinaryIO, max_member_bytes: int, max_total_bytes: int, max_members: int) -> Iterator[Member]:
+    """``*.json`` members of a zip or (optionally compressed) tar archive, in archive order"""
+    budget = _Budget(max_total_bytes, max_members)
+    try:
+        if zipfile.is_zipfile(fileobj):
+            fileobj.seek(0)
+            yield from _iter_zip(fileobj, max_member_bytes, budget)
+        else:
+            fileobj.seek(0)
+            yield from _iter_tar(fileobj, max_member_bytes, budget)
+    except (tarfile.TarError, zipfile.BadZipFile, zlib.error, EOFError, OSError) as e:
+        raise ArchiveError(f"Unreadable archive: {e}") from None
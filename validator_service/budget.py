@@ -0,0 +1,61 @@
+"""Cooperative time budgets for validation work.
+
+Long-running loops call ``tick()`` on every unit of work; the clock is only
+read every ``CHECK_INTERVAL`` ticks, so checking is cheap enough for the
+innermost walkers. Once the deadline passes, ``BudgetExceeded`` unwinds the
+work so the caller can report a clean refusal.
+"""
+
+import math
+import time
+from typing import Optional
+
+CHECK_INTERVAL = 256
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, stage: str, elapsed: float, limit: float):
+        self.stage = stage
+        self.elapsed = elapsed
+        self.limit = limit
+        super().__init__(f"budget exceeded during {stage}")
+
+
+class ValidationBudget:
+    """Deadline for one unit of validation work (a request or a document)"""
+
+    __slots__ = ("started", "limit", "deadline", "stage", "_countdown")
+
+    def __init__(self, seconds: Optional[float] = None, deadline: Optional[float] = None):
+        self.started = time.perf_counter()
+        self.limit = math.inf if seconds is None else seconds
+        self.deadline = self.started + self.limit
+        if deadline is not None and deadline < self.deadline:
+            self.deadline = deadline
+            self.limit = deadline - self.started
+        self.stage = "validation"
+        self._countdown = CHECK_INTERVAL
+
+    def child(self, seconds: Optional[float]) -> "ValidationBudget":
+        """A budget of ``seconds`` that also ends no later than this one"""
+        return ValidationBudget(seconds, deadline=self.deadline)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def enter(self, stage: str):
+        """Record the current stage and check the deadline at the boundary"""
+        self.stage = stage
+        self.check()
+
+    def check(self):
+        now = time.perf_counter()
+        if now > self.deadline:
+            raise BudgetExceeded(self.stage, now - self.started, self.limit)
+
+    def tick(self):
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._countdown = CHECK_INTERVAL
+            self.check()
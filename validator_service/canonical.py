@@ -0,0 +1,22 @@
+"""Canonical encoding and content hashing of KSML documents.
+
+Two documents that differ only in key order or whitespace share the same
+canonical bytes and therefore the same hash.
+"""
+
+import hashlib
+import json
+
+
+def canonical_json(document) -> bytes:
+    """Compact, key-sorted UTF-8 JSON encoding of a document
+
+    Lone surrogates (valid JSON escapes such as "\\ud800") are encoded as-is
+    rather than refused, so every parseable document has a canonical form.
+    """
+    return json.dumps(document, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8", "surrogatepass")
+
+
+def canonical_hash(document) -> str:
+    """SHA-256 hex digest of the canonical encoding"""
+    return hashlib.sha256(canonical_json(document)).hexdigest()
@@ -0,0 +1,58 @@
+"""Single-flight coalescing of identical in-flight validations.
+
+Concurrent callers asking for the same key share the result of the first
+caller's computation instead of repeating it.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from canonical import canonical_hash
+
+
+def validation_key(document: Any) -> str:
+    """Coalescing key for a document: its declared version plus its canonical hash"""
+    version = document.get("ksml_version") if isinstance(document, dict) else None
+    return f"{version}:{canonical_hash(document)}"
+
+
+class SingleFlight:
+    """Share one in-flight computation between concurrent callers of the same key.
+
+    The computation runs as its own task, so it survives any one caller
+    (the first included) being cancelled; it is cancelled only when every
+    caller waiting on it has gone away.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, list] = {}  # key -> [task, callers waiting]
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def _forget(self, key: str, entry: list):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run ``fn`` unless an identical call is already running.
+
+        Returns ``(result, shared)`` where ``shared`` is True when the result
+        came from another caller's computation.
+        """
+        entry = self._inflight.get(key)
+        shared = entry is not None
+        if entry is None:
+            entry = [asyncio.ensure_future(fn()), 0]
+            self._inflight[key] = entry
+            entry[0].add_done_callback(lambda _: self._forget(key, entry))
+        task = entry[0]
+        entry[1] += 1
+        try:
+            # shield: a caller going away must not cancel work the others still wait for
+            return await asyncio.shield(task), shared
+        finally:
+            entry[1] -= 1
+            if not entry[1] and not task.done():
+                self._forget(key, entry)
+                task.cancel()
@@ -0,0 +1,71 @@
+"""Per-version verdicts from one schema pass.
+
+The v0.2 schema is v0.1 plus fields: the two agree everywhere else except
+the ``ksml_version`` tag and the formats only v0.2 checks. So one v0.2
+pass over a document also answers v0.1. Take the v0.2 errors, drop format
+errors and errors inside fields v0.1 does not define, and add the
+additionalProperties error v0.1 raises for each such field the document
+uses. The added fields are read from the two schemas, not listed by hand.
+``contract_tests/test_compatibility.py`` checks the schemas still differ
+only in this way.
+"""
+
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Sequence, Tuple
+
+# Where the schemas define object properties: root, metadata, and every step
+LOCATIONS: Dict[str, Callable[[dict], dict]] = {
+    "root": lambda schema: schema["properties"],
+    "metadata": lambda schema: schema["properties"]["metadata"]["properties"],
+    "step": lambda schema: schema["definitions"]["step"]["properties"],
+}
+
+ObjectPath = Tuple[Any, ...]
+
+
+def added_fields(old_schema: dict, new_schema: dict) -> Dict[str, FrozenSet[str]]:
+    """Properties ``new_schema`` defines and ``old_schema`` does not, per location"""
+    return {location: frozenset(properties(new_schema)) - frozenset(properties(old_schema))
+            for location, properties in LOCATIONS.items()}
+
+
+def _location(path: Sequence) -> str:
+    """The location of the object at ``path``, or "" when it is none of LOCATIONS"""
+    if not path:
+        return "root"
+    if len(path) == 1 and path[0] == "metadata":
+        return "metadata"
+    if len(path) == 2 and path[0] == "steps" and isinstance(path[1], int):
+        return "step"
+    return ""
+
+
+class VersionSplit:
+    """Derives v0.1 schema errors from v0.2 ones (jsonschema ValidationErrors)"""
+
+    def __init__(self, v01_schema: dict, v02_schema: dict):
+        self.added = added_fields(v01_schema, v02_schema)
+
+    def in_added_field(self, path: Sequence) -> bool:
+        """Whether ``path`` lies inside a field only v0.2 defines"""
+        path = list(path)  # jsonschema paths are deques
+        for depth in range(min(len(path), 3)):
+            field = path[depth]
+            if isinstance(field, str) and field in self.added.get(_location(path[:depth]), ()):
+                return True
+        return False
+
+    def applies_to_v01(self, error) -> bool:
+        return error.validator != "format" and not self.in_added_field(error.path)
+
+    def added_in_use(self, document: dict) -> Iterator[Tuple[ObjectPath, str]]:
+        """(object path, field) for each v0.2-only field the document sets"""
+        objects: List[Tuple[ObjectPath, Any]] = [((), document), (("metadata",), document.get("metadata"))]
+        steps = document.get("steps")
+        if isinstance(steps, list):
+            objects.extend((("steps", i), step) for i, step in enumerate(steps))
+        for path, node in objects:
+            if isinstance(node, dict):
+                added = self.added[_location(path)]
+                for field in node:
+                    if field in added:
+                        yield path, field
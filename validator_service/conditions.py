@@ -0,0 +1,317 @@
+"""Condition expressions for step ``run_if`` / ``skip_if`` conditions.
+
+A small, side-effect free language::
+
+    environment == 'production' and not (region in ['eu-west', 'eu-north'])
+    retries >= 3 or metadata.owner != null
+
+Operands are literals (strings, numbers, ``true``, ``false``, ``null``,
+lists), context names (dotted for nested objects; a missing name is
+``null``) and parenthesized expressions. Operators are ``== != < <= > >=
+in`` and ``not in``, combined with ``and``, ``or`` and ``not`` (words, not
+symbols: ``& |`` are refused by the safety checks). Ordering comparisons
+between incomparable values are false rather than errors.
+
+Expressions are parsed once into Python source built only from the parse
+tree (literals go in through ``repr``, names become dictionary lookups),
+compiled, and cached by source text. ``evaluate_batch`` runs one compiled
+expression over many context rows inside a single list comprehension.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+CACHE_SIZE = 1024  # compiled expressions kept, by source text
+MAX_DEPTH = 32  # nesting of parentheses, lists and "not"
+CONDITION_TYPES = ("run_if", "skip_if")
+
+KEYWORDS = {"and", "or", "not", "in", "true", "false", "null"}
+COMPARISONS = {"==", "!=", "<", "<=", ">", ">=", "in", "not in"}
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<number>-?[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)  # ASCII only: \d matches any Unicode digit
+    | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    | (?P<op>==|!=|<=|>=|<|>|\(|\)|\[|\]|,)
+    | (?P<name>[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*)
+    )""", re.VERBOSE)
+_ESCAPES = {"\\": "\\", "'": "'", '"': '"', "n": "\n", "t": "\t"}
+
+
+class ExpressionError(ValueError):
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} at position {position}")
+        self.position = position
+
+
+class ConditionIssue(NamedTuple):
+    path: str
+    details: str
+
+
+def _unescape(literal: str, position: int) -> str:
+    out = []
+    chars = iter(enumerate(literal[1:-1], position + 1))
+    for offset, char in chars:
+        if char == "\\":
+            escaped = next(chars)[1]
+            if escaped not in _ESCAPES:
+                raise ExpressionError(f"Unknown escape '\\{escaped}'", offset)
+            out.append(_ESCAPES[escaped])
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def tokenize(source: str) -> List[Tuple[str, Any, int]]:
+    """(kind, value, position) triples; kind is number, string, op, name or keyword"""
+    tokens = []
+    position = 0
+    end = len(source.rstrip())
+    while position < end:
+        match = _TOKEN.match(source, position)
+        if match is None or match.end() == position:
+            start = len(source) - len(source[position:].lstrip())
+            raise ExpressionError(f"Unexpected character {source[start]!r}", start)
+        kind = match.lastgroup
+        text = match.group(kind)
+        start = match.start(kind)
+        if kind == "number":
+            try:
+                value = float(text) if any(c in text for c in ".eE") else int(text)
+            except ValueError:  # more digits than int() accepts
+                raise ExpressionError(f"Number out of range '{text[:20]}...'", start) from None
+            if value in (float("inf"), float("-inf")):
+                raise ExpressionError(f"Number out of range '{text}'", start)
+        elif kind == "string":
+            value = _unescape(text, start)
+        elif kind == "name" and text in KEYWORDS:
+            kind, value = "keyword", text
+        elif kind == "name" and any(part in KEYWORDS for part in text.split(".")):
+            raise ExpressionError(f"Keyword used as a name in '{text}'", start)
+        else:
+            value = text
+        tokens.append((kind, value, start))
+        position = match.end()
+    return tokens
+
+
+# Helpers the generated code may call; nothing else is in its namespace
+def _lookup(row, path):
+    value = row
+    for key in path:
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _ordered(op):
+    def compare(a, b):
+        if isinstance(a, bool) or isinstance(b, bool):
+            return False
+        try:
+            return op(a, b)
+        except TypeError:
+            return False
+    return compare
+
+
+def _contains(item, container):
+    if not isinstance(container, (list, str)):
+        return False
+    try:
+        return item in container
+    except TypeError:  # a non-string in a string
+        return False
+
+
+_NAMESPACE = {
+    "__builtins__": {},
+    "bool": bool,
+    "_lookup": _lookup,
+    "_contains": _contains,
+    "_lt": _ordered(lambda a, b: a < b),
+    "_le": _ordered(lambda a, b: a <= b),
+    "_gt": _ordered(lambda a, b: a > b),
+    "_ge": _ordered(lambda a, b: a >= b),
+}
+_ORDERED = {"<": "_lt", "<=": "_le", ">": "_gt", ">=": "_ge"}
+
+
+class _Parser:
+    """Recursive descent over the tokens, emitting Python source for a row named ``r``"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = tokenize(source)
+        self.pos = 0
+        self.depth = 0
+        self.names = set()
+
+    def peek(self, offset: int = 0) -> Optional[Tuple[str, Any, int]]:
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def at(self, kind: str, value=None) -> bool:
+        token = self.peek()
+        return token is not None and token[0] == kind and (value is None or token[1] == value)
+
+    def expect(self, kind: str, value: str):
+        if not self.at(kind, value):
+            self.fail(f"Expected '{value}'")
+        self.pos += 1
+
+    def fail(self, message: str):
+        token = self.peek()
+        if token is None:
+            raise ExpressionError(f"{message}, found end of expression", len(self.source))
+        raise ExpressionError(f"{message}, found {self.source[token[2]:token[2] + 20].split()[0]!r}", token[2])
+
+    def nested(self):
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            self.fail(f"Expression nested deeper than {MAX_DEPTH}")
+
+    def parse(self) -> str:
+        if not self.tokens:
+            raise ExpressionError("Empty expression", 0)
+        code = self.disjunction()
+        if self.peek() is not None:
+            self.fail("Expected 'and', 'or' or the end of the expression")
+        return code
+
+    def disjunction(self) -> str:
+        parts = [self.conjunction()]
+        while self.at("keyword", "or"):
+            self.pos += 1
+            parts.append(self.conjunction())
+        return parts[0] if len(parts) == 1 else "(" + " or ".join(parts) + ")"
+
+    def conjunction(self) -> str:
+        parts = [self.negation()]
+        while self.at("keyword", "and"):
+            self.pos += 1
+            parts.append(self.negation())
+        return parts[0] if len(parts) == 1 else "(" + " and ".join(parts) + ")"
+
+    def negation(self) -> str:
+        if self.at("keyword", "not"):
+            self.nested()
+            self.pos += 1
+            code = f"(not {self.negation()})"
+            self.depth -= 1
+            return code
+        return self.comparison()
+
+    def comparison(self) -> str:
+        left = self.operand()
+        token = self.peek()
+        op = None
+        if token is not None and token[0] == "op" and token[1] in COMPARISONS:
+            op = token[1]
+            self.pos += 1
+        elif self.at("keyword", "in"):
+            op = "in"
+            self.pos += 1
+        elif self.at("keyword", "not") and (self.peek(1) or ())[:2] == ("keyword", "in"):
+            op = "not in"
+            self.pos += 2
+        if op is None:
+            return left
+        right = self.operand()
+        token = self.peek()
+        if token is not None and (token[0] == "op" and token[1] in COMPARISONS or token[:2] == ("keyword", "in")):
+            self.fail("Comparisons cannot be chained")
+        if op in _ORDERED:
+            return f"{_ORDERED[op]}({left}, {right})"
+        if op == "in":
+            return f"_contains({left}, {right})"
+        if op == "not in":
+            return f"(not _contains({left}, {right}))"
+        return f"({left} {op} {right})"
+
+    def operand(self) -> str:
+        token = self.peek()
+        if token is None:
+            self.fail("Expected a value")
+        kind, value, _ = token
+        if kind in ("number", "string"):
+            self.pos += 1
+            return repr(value)
+        if kind == "keyword" and value in ("true", "false", "null"):
+            self.pos += 1
+            return {"true": "True", "false": "False", "null": "None"}[value]
+        if kind == "name":
+            self.pos += 1
+            self.names.add(value)
+            path = value.split(".")
+            return f"r.get({path[0]!r})" if len(path) == 1 else f"_lookup(r, {tuple(path)!r})"
+        if kind == "op" and value == "(":
+            self.nested()
+            self.pos += 1
+            code = self.disjunction()
+            self.expect("op", ")")
+            self.depth -= 1
+            return code
+        if kind == "op" and value == "[":
+            self.nested()
+            self.pos += 1
+            items = []
+            if not self.at("op", "]"):
+                items.append(self.operand())
+                while self.at("op", ","):
+                    self.pos += 1
+                    items.append(self.operand())
+            self.expect("op", "]")
+            self.depth -= 1
+            return "[" + ", ".join(items) + "]"
+        self.fail("Expected a value")
+
+
+class CompiledExpression:
+    """A parsed condition, ready to evaluate against context mappings"""
+    __slots__ = ("source", "names", "python", "_one", "_batch")
+
+    def __init__(self, source: str):
+        parser = _Parser(source)
+        self.python = parser.parse()
+        self.source = source
+        self.names = frozenset(parser.names)
+        self._one: Callable[[Mapping], bool] = eval(f"lambda r: bool({self.python})", dict(_NAMESPACE))
+        self._batch: Callable[[Iterable[Mapping]], List[bool]] = eval(
+            f"lambda rows: [bool({self.python}) for r in rows]", dict(_NAMESPACE)
+        )
+
+    def evaluate(self, context: Mapping) -> bool:
+        return self._one(context)
+
+    def evaluate_batch(self, rows: Iterable[Mapping]) -> List[bool]:
+        """One result per row; the loop runs inside the compiled code"""
+        return self._batch(rows)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(source: str) -> CompiledExpression:
+    """Parse and compile ``source`` (cached); ExpressionError when it is not a valid expression"""
+    return CompiledExpression(source)
+
+
+def condition_issues(document: dict) -> List[ConditionIssue]:
+    """Syntax errors in the run_if / skip_if expressions of a document's steps"""
+    issues = []
+    steps = document.get("steps") if isinstance(document, dict) else None
+    for i, step in enumerate(steps if isinstance(steps, list) else []):
+        conditions = step.get("conditions") if isinstance(step, dict) else None
+        for j, condition in enumerate(conditions if isinstance(conditions, list) else []):
+            if not isinstance(condition, dict) or condition.get("type") not in CONDITION_TYPES:
+                continue
+            expression = condition.get("expression")
+            if not isinstance(expression, str):
+                continue
+            try:
+                compile_expression(expression)
+            except ExpressionError as e:
+                issues.append(ConditionIssue(f"steps.{i}.conditions.{j}.expression", str(e)))
+    return issues
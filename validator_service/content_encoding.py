@@ -0,0 +1,122 @@
+"""Incremental decoding of compressed request bodies (``Content-Encoding``).
+
+``GZipMiddleware`` only compresses responses; this module handles the other
+direction. Bodies are inflated chunk by chunk as they arrive, never more than
+``OUTPUT_CHUNK`` bytes of output per step, and the decoded size is checked
+against the caller's limit as it grows. A compression bomb is therefore
+rejected after inflating at most ``limit`` bytes, without ever holding the
+full expansion in memory.
+"""
+
+import zlib
+from typing import AsyncIterator, Iterable, Iterator, List, Optional
+
+OUTPUT_CHUNK = 64 * 1024
+ENCODINGS = ("gzip", "deflate")  # advertised in Accept-Encoding on 415
+
+
+class EncodingError(ValueError):
+    """The body cannot be decoded"""
+
+
+class UnsupportedEncoding(EncodingError):
+    """A content coding other than gzip, deflate or identity"""
+
+
+class BodyTooLarge(EncodingError):
+    """The decoded body exceeds its limit"""
+
+
+def parse_content_encoding(header: Optional[str]) -> List[str]:
+    """Codings in the order they were applied, identity dropped"""
+    codings = []
+    for coding in (header or "").split(","):
+        coding = coding.strip().lower()
+        if coding in ("", "identity"):
+            continue
+        if coding == "x-gzip":
+            coding = "gzip"
+        if coding not in ENCODINGS:
+            raise UnsupportedEncoding(f"Unsupported Content-Encoding '{coding}'")
+        codings.append(coding)
+    return codings
+
+
+def _is_zlib_header(head: bytes) -> bool:
+    # RFC 1950: deflate method, window <= 32K, header checksum divisible by 31
+    return head[0] & 0x0F == 8 and head[0] >> 4 <= 7 and (head[0] << 8 | head[1]) % 31 == 0
+
+
+class StreamDecoder:
+    """Inflates one content coding, a chunk at a time"""
+
+    def __init__(self, coding: str):
+        self.coding = coding
+        self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if coding == "gzip" else None
+        self._head = b""  # deflate: first bytes, until zlib vs raw deflate can be told apart
+
+    def _start_deflate(self, data: bytes) -> bytes:
+        # "deflate" is zlib-wrapped per RFC 9110, but some clients send raw deflate
+        self._head += data
+        if len(self._head) < 2:
+            return b""
+        wbits = zlib.MAX_WBITS if _is_zlib_header(self._head) else -zlib.MAX_WBITS
+        self._inflater = zlib.decompressobj(wbits)
+        data, self._head = self._head, b""
+        return data
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        """Decoded output of ``data``, lazily, at most OUTPUT_CHUNK bytes per piece"""
+        if self._inflater is None:
+            data = self._start_deflate(data)
+        pending = bool(data)
+        while pending:
+            inflater = self._inflater
+            if inflater.eof:
+                if self.coding == "gzip" and data.strip(b"\x00"):
+                    inflater = self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)  # next gzip member
+                elif data.strip(b"\x00"):
+                    raise EncodingError("Data after the end of the deflate stream")
+                else:
+                    return
+            try:
+                chunk = inflater.decompress(data, OUTPUT_CHUNK)
+            except zlib.error as e:
+                raise EncodingError(f"Invalid {self.coding} body: {e}") from None
+            if chunk:
+                yield chunk
+            if inflater.eof:
+                data = inflater.unused_data
+                pending = bool(data)
+            else:
+                # A full output chunk may leave more output buffered inside zlib
+                data = inflater.unconsumed_tail
+                pending = bool(data) or len(chunk) == OUTPUT_CHUNK
+
+    def finish(self):
+        if self._inflater is None or not self._inflater.eof:
+            raise EncodingError(f"Truncated {self.coding} body")
+
+
+def _through(decoder: StreamDecoder, pieces: Iterable[bytes]) -> Iterator[bytes]:
+    for piece in pieces:
+        yield from decoder.feed(piece)
+
+
+async def decode_body(chunks: AsyncIterator[bytes], content_encoding: Optional[str], limit: int) -> AsyncIterator[bytes]:
+    """Decoded body chunks; ``BodyTooLarge`` as soon as more than ``limit`` bytes come out"""
+    decoders = [StreamDecoder(coding) for coding in reversed(parse_content_encoding(content_encoding))]
+    size = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        pieces = iter((chunk,))
+        for decoder in decoders:
+            pieces = _through(decoder, pieces)
+        for piece in pieces:
+            size += len(piece)
+            if size > limit:
+                raise BodyTooLarge(f"Request body exceeds {limit} bytes")
+            yield piece
+    for decoder in decoders:
+        decoder.finish()
@@ -0,0 +1,224 @@
+"""Merkle-hashed structural diff for KSML documents.
+
+Every node of a document is hashed bottom-up, so two subtrees with equal
+digests are identical and can be skipped without being walked. Steps are
+matched by ``id`` (falling back to ``name``) so inserted, removed, reordered
+and edited steps are reported semantically instead of as index shifts.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+DIGEST_SIZE = 16
+
+
+class MerkleNode:
+    """A hashed view over one value of a document (dict, list or scalar)."""
+
+    __slots__ = ("digest", "value", "children")
+
+    def __init__(self, digest: bytes, value: Any, children: Union[Dict[str, "MerkleNode"], List["MerkleNode"], None]):
+        self.digest = digest
+        self.value = value
+        self.children = children
+
+    @property
+    def hexdigest(self) -> str:
+        return self.digest.hex()
+
+
+def build_merkle_tree(value: Any) -> MerkleNode:
+    """Hash a document (or any JSON value) into a Merkle tree.
+
+    Build the tree once per revision and pass it to ``diff_documents`` when the
+    same revision takes part in several comparisons.
+    """
+    if isinstance(value, dict):
+        children = {key: build_merkle_tree(child) for key, child in value.items()}
+        h = hashlib.blake2b(b"d", digest_size=DIGEST_SIZE)
+        for key in sorted(children):
+            encoded = key.encode("utf-8")
+            h.update(len(encoded).to_bytes(4, "big"))
+            h.update(encoded)
+            h.update(children[key].digest)
+        return MerkleNode(h.digest(), value, children)
+
+    if isinstance(value, list):
+        items = [build_merkle_tree(child) for child in value]
+        h = hashlib.blake2b(b"l", digest_size=DIGEST_SIZE)
+        for item in items:
+            h.update(item.digest)
+        return MerkleNode(h.digest(), value, items)
+
+    encoded = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    return MerkleNode(hashlib.blake2b(b"s" + encoded, digest_size=DIGEST_SIZE).digest(), value, None)
+
+
+def _join(path: str, key: Any) -> str:
+    return f"{path}.{key}" if path else str(key)
+
+
+def _diff_nodes(old: MerkleNode, new: MerkleNode, path: str, changes: List[dict]):
+    """Append field-level changes between two nodes, skipping equal subtrees."""
+    if old.digest == new.digest:
+        return
+
+    if isinstance(old.children, dict) and isinstance(new.children, dict):
+        for key, old_child in old.children.items():
+            new_child = new.children.get(key)
+            if new_child is None:
+                changes.append({"op": "removed", "path": _join(path, key), "old": old_child.value})
+            else:
+                _diff_nodes(old_child, new_child, _join(path, key), changes)
+        for key, new_child in new.children.items():
+            if key not in old.children:
+                changes.append({"op": "added", "path": _join(path, key), "new": new_child.value})
+        return
+
+    if isinstance(old.children, list) and isinstance(new.children, list):
+        common = min(len(old.children), len(new.children))
+        for i in range(common):
+            _diff_nodes(old.children[i], new.children[i], _join(path, i), changes)
+        for i in range(common, len(old.children)):
+            changes.append({"op": "removed", "path": _join(path, i), "old": old.children[i].value})
+        for i in range(common, len(new.children)):
+            changes.append({"op": "added", "path": _join(path, i), "new": new.children[i].value})
+        return
+
+    changes.append({"op": "changed", "path": path or "root", "old": old.value, "new": new.value})
+
+
+def step_key(step: Any, index: int) -> str:
+    """Identity used to match a step across revisions: ``id``, then ``name``, then position."""
+    if isinstance(step, dict):
+        for field in ("id", "name"):
+            value = step.get(field)
+            if isinstance(value, str) and value:
+                return value
+    return f"#{index}"
+
+
+def _keyed_steps(nodes: List[MerkleNode]) -> Dict[str, Tuple[int, MerkleNode]]:
+    keyed = {}
+    seen = {}
+    for index, node in enumerate(nodes):
+        key = step_key(node.value, index)
+        # Disambiguate duplicate identities by occurrence so every step still matches once
+        count = seen.get(key, 0) + 1
+        seen[key] = count
+        if count > 1:
+            key = f"{key}#{count}"
+        keyed[key] = (index, node)
+    return keyed
+
+
+def _longest_increasing_run(sequence: List[int]) -> set:
+    """Positions in ``sequence`` forming a longest strictly increasing subsequence."""
+    tails: List[int] = []  # index into sequence of the smallest tail per length
+    previous = [-1] * len(sequence)
+    for i, value in enumerate(sequence):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if sequence[tails[mid]] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo > 0:
+            previous[i] = tails[lo - 1]
+        if lo == len(tails):
+            tails.append(i)
+        else:
+            tails[lo] = i
+
+    keep = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        keep.add(i)
+        i = previous[i]
+    return keep
+
+
+def _diff_steps(old: MerkleNode, new: MerkleNode) -> Dict[str, List[dict]]:
+    result = {"added": [], "removed": [], "moved": [], "modified": []}
+    if old.digest == new.digest:
+        return result
+
+    old_keyed = _keyed_steps(old.children)
+    new_keyed = _keyed_steps(new.children)
+
+    matched = []  # (key, old_index, new_index) in new document order
+    for key, (new_index, new_node) in new_keyed.items():
+        if key not in old_keyed:
+            result["added"].append({"step": key, "index": new_index, "new": new_node.value})
+            continue
+        old_index, old_node = old_keyed[key]
+        matched.append((key, old_index, new_index))
+        if old_node.digest != new_node.digest:
+            changes: List[dict] = []
+            _diff_nodes(old_node, new_node, "", changes)
+            result["modified"].append({"step": key, "index": new_index, "changes": changes})
+
+    for key, (old_index, old_node) in old_keyed.items():
+        if key not in new_keyed:
+            result["removed"].append({"step": key, "index": old_index, "old": old_node.value})
+
+    # Steps outside the longest run that kept its relative order are the ones that moved
+    in_order = _longest_increasing_run([old_index for _, old_index, _ in matched])
+    for position, (key, old_index, new_index) in enumerate(matched):
+        if position not in in_order:
+            result["moved"].append({"step": key, "from": old_index, "to": new_index})
+
+    return result
+
+
+def diff_documents(old: Union[dict, MerkleNode], new: Union[dict, MerkleNode]) -> dict:
+    """Semantic, step-aware diff between two KSML documents.
+
+    Accepts raw documents or pre-built trees from ``build_merkle_tree``.
+    """
+    old_tree = old if isinstance(old, MerkleNode) else build_merkle_tree(old)
+    new_tree = new if isinstance(new, MerkleNode) else build_merkle_tree(new)
+
+    changes: List[dict] = []
+    steps = {"added": [], "removed": [], "moved": [], "modified": []}
+
+    if old_tree.digest != new_tree.digest:
+        if isinstance(old_tree.children, dict) and isinstance(new_tree.children, dict):
+            old_steps: Optional[MerkleNode] = old_tree.children.get("steps")
+            new_steps: Optional[MerkleNode] = new_tree.children.get("steps")
+            step_aware = (
+                old_steps is not None and new_steps is not None
+                and isinstance(old_steps.children, list) and isinstance(new_steps.children, list)
+            )
+            for key, old_child in old_tree.children.items():
+                if step_aware and key == "steps":
+                    continue
+                new_child = new_tree.children.get(key)
+                if new_child is None:
+                    changes.append({"op": "removed", "path": key, "old": old_child.value})
+                else:
+                    _diff_nodes(old_child, new_child, key, changes)
+            for key, new_child in new_tree.children.items():
+                if key not in old_tree.children:
+                    changes.append({"op": "added", "path": key, "new": new_child.value})
+            if step_aware:
+                steps = _diff_steps(old_steps, new_steps)
+        else:
+            _diff_nodes(old_tree, new_tree, "", changes)
+
+    return {
+        "identical": old_tree.digest == new_tree.digest,
+        "old_root": old_tree.hexdigest,
+        "new_root": new_tree.hexdigest,
+        "changes": changes,
+        "steps": steps,
+        "summary": {
+            "changed_fields": len(changes),
+            "steps_added": len(steps["added"]),
+            "steps_removed": len(steps["removed"]),
+            "steps_moved": len(steps["moved"]),
+            "steps_modified": len(steps["modified"]),
+        },
+    }
@@ -0,0 +1,319 @@
+"""Dictionary-compressed document packs (``.ksmlz``) with random access.
+
+KSML documents repeat the same keys, actions and metadata shapes, and a
+single document is too short for DEFLATE to learn that from itself. A pack
+stores a preset dictionary (``zlib`` ``zdict``) trained on a sample of the
+corpus. Each document is stored as its own raw DEFLATE stream primed with
+that dictionary, so any record decompresses on its own. Layout::
+
+    header   MAGIC | dictionary length (u32) | dictionary
+    records  raw DEFLATE of each document's canonical JSON, back to back
+    index    zlib-compressed; per record: SHA-256 (32 bytes) | offset (u64) |
+             length (u32) | metadata.id length (u16) | metadata.id (UTF-8)
+    footer   index offset (u64) | index length (u32) | records (u32) |
+             CRC-32 of the index (u32) | MAGIC
+
+All integers are big-endian. Records hold canonical JSON, so the index hash
+is the service's canonical document hash. A document already in the pack is
+not stored twice, and one that cannot be stored (not JSON-encodable, or
+holding a lone surrogate that would not read back as UTF-8) is skipped and
+counted rather than aborting the pack. Readers map the file and load only the index; ``get``
+(by hash) and ``by_id`` (by ``metadata.id``) decompress exactly one record.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from canonical import canonical_json
+
+MAGIC = b"KSZ\x01"
+DICTIONARY_SIZE = 16 * 1024
+MAX_DICTIONARY_SIZE = 32 * 1024  # the DEFLATE window: anything further back is never referenced
+MAX_ID_BYTES = 0xFFFF
+LEVEL = 9
+
+_HEADER = struct.Struct(">4sI")
+_ENTRY = struct.Struct(">32sQIH")
+_FOOTER = struct.Struct(">QIII4s")
+_FRAGMENT = re.compile(rb'[^,]*,?')  # canonical JSON up to and including the next comma
+_SURROGATE = re.compile(rb'\xed[\xa0-\xbf]')  # a UTF-16 surrogate; never part of valid UTF-8
+
+
+class PackError(ValueError):
+    """The file is not a well-formed document pack, or a record does not match its hash"""
+
+
+def _fragments(sample: bytes) -> set:
+    """Comma-separated pieces of one document, alone and in pairs; counted once per document"""
+    pieces = [piece for piece in _FRAGMENT.findall(sample) if len(piece) > 2]
+    return set(pieces) | {a + b for a, b in zip(pieces, pieces[1:])}
+
+
+def train_dictionary(samples: Iterable[bytes], size: int = DICTIONARY_SIZE) -> bytes:
+    """A preset dictionary from sample documents (canonical JSON bytes)
+
+    Fragments shared by several documents are kept by total bytes saved
+    (documents containing them x length), skipping any already covered by
+    a better one. The best fragments go last, closest to the data, where
+    DEFLATE back-references are cheapest.
+    """
+    if not 0 < size <= MAX_DICTIONARY_SIZE:
+        raise ValueError(f"Dictionary size must be between 1 and {MAX_DICTIONARY_SIZE} bytes")
+    counts = Counter()
+    for sample in samples:
+        counts.update(_fragments(sample))
+    ranked = sorted((fragment for fragment, count in counts.items() if count > 1),
+                    key=lambda fragment: (counts[fragment] * len(fragment), fragment), reverse=True)
+    chosen: List[bytes] = []
+    total = 0
+    for fragment in ranked:
+        if total + len(fragment) > size:
+            continue
+        if any(fragment in kept for kept in chosen):
+            continue
+        chosen.append(fragment)
+        total += len(fragment)
+    return b"".join(reversed(chosen))
+
+
+def _storable(document: Any) -> Optional[bytes]:
+    """The canonical JSON of a document, or None when it cannot be stored and read back"""
+    try:
+        data = canonical_json(document)
+    except (TypeError, ValueError):
+        return None
+    return None if _SURROGATE.search(data) else data
+
+
+def _document_id(document: Any) -> bytes:
+    metadata = document.get("metadata") if isinstance(document, dict) else None
+    doc_id = metadata.get("id") if isinstance(metadata, dict) else None
+    encoded = doc_id.encode("utf-8") if isinstance(doc_id, str) else b""
+    return encoded if len(encoded) <= MAX_ID_BYTES else b""  # too long to index by id
+
+
+class PackWriter:
+    """Writes a pack to ``path`` (via a temporary file, renamed into place on close)"""
+
+    def __init__(self, path: str, dictionary: bytes, level: int = LEVEL):
+        if len(dictionary) > MAX_DICTIONARY_SIZE:
+            raise ValueError(f"Dictionary exceeds {MAX_DICTIONARY_SIZE} bytes")
+        self.path = path
+        fd, self._temp = tempfile.mkstemp(suffix=".tmp", prefix=f"{os.path.basename(path)}.",
+                                          dir=os.path.dirname(path) or ".")
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(_HEADER.pack(MAGIC, len(dictionary)) + dictionary)
+        self._offset = _HEADER.size + len(dictionary)
+        # Priming with the dictionary is the expensive part; every record starts from a copy
+        self._primed = zlib.compressobj(level, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, dictionary) \
+            if dictionary else zlib.compressobj(level, zlib.DEFLATED, -15)
+        self._index = bytearray()
+        self._seen = set()
+        self.documents = 0
+        self.duplicates = 0
+        self.skipped = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def add(self, document: Any) -> Optional[str]:
+        """Store one document; returns its canonical hash, or None when it cannot be stored"""
+        data = _storable(document)
+        if data is None:
+            self.skipped += 1
+            return None
+        digest = hashlib.sha256(data).digest()
+        if digest in self._seen:
+            self.duplicates += 1
+            return digest.hex()
+        compressor = self._primed.copy()
+        record = compressor.compress(data) + compressor.flush()
+        doc_id = _document_id(document)
+        self._file.write(record)
+        self._index += _ENTRY.pack(digest, self._offset, len(record), len(doc_id)) + doc_id
+        self._offset += len(record)
+        self._seen.add(digest)
+        self.documents += 1
+        self.raw_bytes += len(data)
+        self.stored_bytes += len(record)
+        return digest.hex()
+
+    def close(self):
+        if self._file.closed:
+            return
+        index = zlib.compress(bytes(self._index), LEVEL)
+        self._file.write(index)
+        self._file.write(_FOOTER.pack(self._offset, len(index), self.documents, zlib.crc32(index), MAGIC))
+        self._file.close()
+        os.replace(self._temp, self.path)
+
+    def abort(self):
+        """Discard the pack written so far"""
+        if not self._file.closed:
+            self._file.close()
+            os.remove(self._temp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def stats(self) -> dict:
+        return {
+            "documents": self.documents,
+            "duplicates": self.duplicates,
+            "skipped": self.skipped,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "ratio": round(self.raw_bytes / self.stored_bytes, 2) if self.stored_bytes else None,
+        }
+
+
+def write_pack(path: str, documents: Iterable[Any], sample_size: int = 1000,
+               dictionary_size: int = DICTIONARY_SIZE, level: int = LEVEL) -> dict:
+    """Train on the first ``sample_size`` documents, then store every document; one pass over the input"""
+    documents = iter(documents)
+    sample = []
+    for document in documents:
+        sample.append(document)
+        if len(sample) >= sample_size:
+            break
+    dictionary = train_dictionary((data for data in map(_storable, sample) if data is not None), dictionary_size)
+    with PackWriter(path, dictionary, level) as writer:
+        for document in sample:
+            writer.add(document)
+        for document in documents:
+            writer.add(document)
+    return {**writer.stats(), "dictionary_bytes": len(dictionary)}
+
+
+class PackReader:
+    """Random access to a pack's documents by canonical hash or metadata.id"""
+
+    def __init__(self, path: str, verify: bool = True):
+        self.path = path
+        self.verify = verify  # re-hash each record read
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                raise PackError("Not a document pack") from None
+        try:
+            self._load()
+        except PackError:
+            self._map.close()
+            raise
+        except (struct.error, zlib.error, UnicodeDecodeError) as e:
+            self._map.close()
+            raise PackError(f"Damaged pack: {e}") from None
+
+    def _load(self):
+        data = self._map
+        if len(data) < _HEADER.size + _FOOTER.size or data[:4] != MAGIC or data[-4:] != MAGIC:
+            raise PackError("Not a document pack")
+        _, dictionary_length = _HEADER.unpack_from(data, 0)
+        self.dictionary = bytes(data[_HEADER.size:_HEADER.size + dictionary_length])
+        index_offset, index_length, count, crc, _ = _FOOTER.unpack_from(data, len(data) - _FOOTER.size)
+        if index_offset + index_length != len(data) - _FOOTER.size:
+            raise PackError("Damaged pack: index out of place")
+        compressed = data[index_offset:index_offset + index_length]
+        if zlib.crc32(compressed) != crc:
+            raise PackError("Damaged pack: index checksum mismatch")
+        index = zlib.decompress(compressed)
+
+        self._records: Dict[bytes, tuple] = {}  # digest -> (offset, length)
+        self._order: List[bytes] = []
+        self._ids: Dict[str, List[bytes]] = {}
+        pos = 0
+        for _ in range(count):
+            digest, offset, length, id_length = _ENTRY.unpack_from(index, pos)
+            pos += _ENTRY.size
+            if offset + length > index_offset:
+                raise PackError("Damaged pack: record out of range")
+            self._records[digest] = (offset, length)
+            self._order.append(digest)
+            if id_length:
+                self._ids.setdefault(index[pos:pos + id_length].decode("utf-8"), []).append(digest)
+                pos += id_length
+        if pos != len(index):
+            raise PackError("Damaged pack: index length mismatch")
+        self._primed = zlib.decompressobj(-15, self.dictionary) if self.dictionary else zlib.decompressobj(-15)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, document_hash: str) -> bool:
+        try:
+            return bytes.fromhex(document_hash) in self._records
+        except ValueError:
+            return False
+
+    def _read(self, digest: bytes) -> bytes:
+        offset, length = self._records[digest]
+        decompressor = self._primed.copy()
+        try:
+            data = decompressor.decompress(self._map[offset:offset + length]) + decompressor.flush()
+        except zlib.error as e:
+            raise PackError(f"Record {digest.hex()} is damaged: {e}") from None
+        if self.verify and hashlib.sha256(data).digest() != digest:
+            raise PackError(f"Record {digest.hex()} does not match its hash")
+        return data
+
+    def raw(self, document_hash: str) -> Optional[bytes]:
+        """The canonical JSON of a document, or None when it is not in the pack"""
+        try:
+            digest = bytes.fromhex(document_hash)
+        except ValueError:
+            return None
+        return self._read(digest) if digest in self._records else None
+
+    def get(self, document_hash: str) -> Optional[dict]:
+        data = self.raw(document_hash)
+        return json.loads(data) if data is not None else None
+
+    def hashes(self) -> List[str]:
+        """Every document hash, in pack order"""
+        return [digest.hex() for digest in self._order]
+
+    def hashes_for_id(self, document_id: str) -> List[str]:
+        """Hashes of every stored version of a document, oldest first"""
+        return [digest.hex() for digest in self._ids.get(document_id, ())]
+
+    def by_id(self, document_id: str) -> Optional[dict]:
+        """The most recently stored version of the document with this metadata.id"""
+        digests = self._ids.get(document_id)
+        return json.loads(self._read(digests[-1])) if digests else None
+
+    def __iter__(self) -> Iterator[dict]:
+        for digest in self._order:
+            yield json.loads(self._read(digest))
+
+    def stats(self) -> dict:
+        stored = sum(length for _, length in self._records.values())
+        return {
+            "documents": len(self._order),
+            "ids": len(self._ids),
+            "dictionary_bytes": len(self.dictionary),
+            "stored_bytes": stored,
+            "file_bytes": len(self._map),
+        }
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,111 @@
+"""Streaming serializers for exported validation results.
+
+Each exporter turns an iterator of result rows (as produced by the result
+store) into an iterator of text chunks, holding at most one chunk of output
+in memory, so exports of any size stream straight to the client.
+"""
+
+import csv
+import io
+import json
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+CHUNK_ROWS = 500
+CSV_COLUMNS = ["timestamp", "document_id", "author", "document_hash", "ksml_version", "valid", "duration_ms",
+               "code", "message", "path", "severity"]
+
+# Characters XML 1.0 cannot represent, even escaped
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def isoformat(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds")
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds or an ISO 8601 timestamp (naive means UTC)"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def export_json_lines(rows: Iterable[dict]) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({**row, "ts": isoformat(row["ts"])}, ensure_ascii=False, separators=(",", ":")))
+        if len(lines) >= CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def export_csv(rows: Iterable[dict]) -> Iterator[str]:
+    """One line per error; a valid document gets one line with empty error columns"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    pending = 0
+    for row in rows:
+        context = [isoformat(row["ts"]), row["document_id"] or "", row["author"] or "", row["document_hash"], row["ksml_version"],
+                   "true" if row["valid"] else "false", row["duration_ms"]]
+        for error in row["errors"] or [None]:
+            if error is None:
+                writer.writerow(context + ["", "", "", ""])
+            else:
+                writer.writerow(context + [error["code"], error["message"], error["path"], error["severity"]])
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def _attr(value) -> str:
+    return quoteattr(_XML_INVALID.sub("", str(value)))
+
+
+def export_xml(rows: Iterable[dict]) -> Iterator[str]:
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<results>\n']
+    for row in rows:
+        parts.append(
+            f'  <result timestamp={_attr(isoformat(row["ts"]))} document_id={_attr(row["document_id"] or "")}'
+            f' author={_attr(row["author"] or "")}'
+            f' document_hash={_attr(row["document_hash"])} ksml_version={_attr(row["ksml_version"])}'
+            f' valid="{"true" if row["valid"] else "false"}" duration_ms={_attr(row["duration_ms"])}'
+        )
+        if not row["errors"]:
+            parts.append("/>\n")
+        else:
+            parts.append(">\n")
+            for error in row["errors"]:
+                parts.append(
+                    f'    <error code={_attr(error["code"])} path={_attr(error["path"])}'
+                    f' severity={_attr(error["severity"])}>{escape(_XML_INVALID.sub("", error["message"]))}</error>\n'
+                )
+            parts.append("  </result>\n")
+        if len(parts) >= CHUNK_ROWS:
+            yield "".join(parts)
+            parts = []
+    parts.append("</results>\n")
+    yield "".join(parts)
+
+
+# format -> (serializer, media type, file extension)
+EXPORTERS: Dict[str, tuple] = {
+    "json": (export_json_lines, "application/x-ndjson", "jsonl"),
+    "csv": (export_csv, "text/csv", "csv"),
+    "xml": (export_xml, "application/xml", "xml"),
+}
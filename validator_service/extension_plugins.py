@@ -0,0 +1,179 @@
+"""Validator plugins for ``extensions`` namespaces (``x-*`` keys).
+
+A namespace is validated by either
+- a JSON sub-schema, ``<namespace>.json`` in the extension schema directory, or
+- a function ``fn(value) -> iterable of (relative_path, message)``, registered
+  directly or named in ``module:function`` form (``KSML_EXTENSION_PLUGINS``).
+
+Only names are indexed up front. A plugin is loaded (file read, schema
+checked and compiled, module imported) the first time a document uses its
+namespace, exactly once; a load failure is remembered too and raised as
+``PluginError``, like a plugin that raises while validating. The registry
+reports such a failure as an issue on that namespace (``failed``) and goes on
+with the others. Namespaces without a plugin are accepted as before. Calls
+and time are recorded per plugin.
+"""
+
+import importlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from jsonschema.validators import validator_for
+
+Issues = Iterable[Tuple[str, str]]
+
+
+class PluginError(RuntimeError):
+    """A plugin could not be loaded, or raised instead of reporting issues"""
+
+
+class ExtensionIssue(NamedTuple):
+    path: str
+    details: str
+    failed: bool = False  # the plugin failed; details is the PluginError message
+
+
+def _path(parts) -> str:
+    return ".".join(str(p) for p in parts)
+
+
+class ExtensionPlugin:
+    __slots__ = ("namespace", "kind", "source", "_loader", "_check", "_error", "_lock", "load_ms", "calls",
+                 "issues", "nanoseconds")
+
+    def __init__(self, namespace: str, kind: str, source: str, loader: Callable[[], Callable[[Any], Issues]]):
+        self.namespace = namespace
+        self.kind = kind  # "schema" or "function"
+        self.source = source
+        self._loader = loader
+        self._check: Optional[Callable[[Any], Issues]] = None
+        self._error: Optional[str] = None
+        self._lock = threading.Lock()
+        self.load_ms: Optional[float] = None
+        self.calls = self.issues = self.nanoseconds = 0
+
+    def check(self) -> Callable[[Any], Issues]:
+        """The compiled check, loading it on first use"""
+        if self._check is None and self._error is None:
+            with self._lock:
+                if self._check is None and self._error is None:
+                    started = time.perf_counter()
+                    try:
+                        self._check = self._loader()
+                    except Exception as e:
+                        self._error = f"{type(e).__name__}: {e}"
+                    self.load_ms = round((time.perf_counter() - started) * 1000, 3)
+        if self._error is not None:
+            raise PluginError(f"Extension plugin for '{self.namespace}' ({self.source}) failed to load: {self._error}")
+        return self._check
+
+    def validate(self, value) -> List[Tuple[str, str]]:
+        check = self.check()
+        started = time.perf_counter_ns()
+        try:
+            issues = list(check(value))
+        except Exception as e:
+            raise PluginError(f"Extension plugin for '{self.namespace}' ({self.source}) raised {type(e).__name__}: {e}") from e
+        self.nanoseconds += time.perf_counter_ns() - started
+        self.calls += 1
+        self.issues += len(issues)
+        return issues
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "source": self.source,
+            "loaded": self._check is not None,
+            "load_error": self._error,
+            "load_ms": self.load_ms,
+            "calls": self.calls,
+            "issues": self.issues,
+            "total_ms": round(self.nanoseconds / 1e6, 3),
+            "mean_us": round(self.nanoseconds / 1e3 / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+def _compile(schema: dict, format_checker) -> Callable[[Any], Issues]:
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    validator = cls(schema, format_checker=format_checker)
+
+    def check(value) -> Issues:
+        for err in validator.iter_errors(value):
+            yield _path(err.path), err.message
+    return check
+
+
+def _function_loader(spec: str) -> Callable[[], Callable[[Any], Issues]]:
+    def load():
+        module_name, _, attribute = spec.partition(":")
+        if not module_name or not attribute:
+            raise ValueError(f"expected 'module:function', got '{spec}'")
+        return getattr(importlib.import_module(module_name), attribute)
+    return load
+
+
+class ExtensionRegistry:
+    def __init__(self, format_checker=None):
+        self.format_checker = format_checker
+        self._plugins: Dict[str, ExtensionPlugin] = {}
+
+    def __contains__(self, namespace: str) -> bool:
+        return namespace in self._plugins
+
+    def _add(self, plugin: ExtensionPlugin):
+        if plugin.namespace in self._plugins:
+            raise ValueError(f"Extension namespace '{plugin.namespace}' already has a plugin")
+        self._plugins[plugin.namespace] = plugin
+
+    def register_schema_file(self, namespace: str, path: Path):
+        path = Path(path)
+        self._add(ExtensionPlugin(namespace, "schema", str(path),
+                                  lambda: _compile(json.loads(path.read_text(encoding="utf-8")), self.format_checker)))
+
+    def register_schema(self, namespace: str, schema: dict):
+        self._add(ExtensionPlugin(namespace, "schema", "<inline>", lambda: _compile(schema, self.format_checker)))
+
+    def register_function(self, namespace: str, fn: Callable[[Any], Issues]):
+        self._add(ExtensionPlugin(namespace, "function", getattr(fn, "__qualname__", repr(fn)), lambda: fn))
+
+    def register_spec(self, namespace: str, spec: str):
+        """A ``module:function`` validator, imported on first use"""
+        self._add(ExtensionPlugin(namespace, "function", spec, _function_loader(spec)))
+
+    def discover(self, schema_dir: Optional[str], specs: str = ""):
+        """Index ``<namespace>.json`` files and ``namespace=module:function`` specs without loading them"""
+        if schema_dir and Path(schema_dir).is_dir():
+            for path in sorted(Path(schema_dir).glob("x-*.json")):
+                self.register_schema_file(path.stem, path)
+        for entry in specs.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            namespace, _, spec = entry.partition("=")
+            if not spec:
+                raise ValueError(f"Extension plugin '{entry}' must look like 'x-name=module:function'")
+            self.register_spec(namespace.strip(), spec.strip())
+
+    def validate(self, extensions: dict) -> List[ExtensionIssue]:
+        """Issues of every namespace in ``extensions`` that has a plugin, plus one failed issue per plugin that failed"""
+        issues = []
+        for namespace, value in extensions.items():
+            plugin = self._plugins.get(namespace)
+            if plugin is None:
+                continue
+            try:
+                found = plugin.validate(value)
+            except PluginError as e:
+                issues.append(ExtensionIssue(_path(("extensions", namespace)), str(e), failed=True))
+                continue
+            for path, message in found:
+                issues.append(ExtensionIssue(_path(("extensions", namespace, path) if path else ("extensions", namespace)),
+                                             f"{namespace}: {message}"))
+        return issues
+
+    def stats(self) -> Dict[str, dict]:
+        return {namespace: plugin.stats() for namespace, plugin in sorted(self._plugins.items())}
@@ -0,0 +1,101 @@
+"""Dedicated checkers for the string formats the v0.2 schema declares.
+
+``uuid`` (metadata.id), ``date-time`` (metadata.created_at) and ``uri``
+(dependency ``source``) are checked with one precompiled regular expression
+each plus a few integer comparisons, instead of jsonschema's generic
+``FormatChecker`` (which parses through ``uuid.UUID`` and, for date-time and
+uri, needs optional packages that are not among our requirements). Results
+of short values are memoized in bounded LRU caches: the same ids,
+timestamps and sources recur across a corpus.
+"""
+
+import re
+from functools import lru_cache
+
+from jsonschema import FormatChecker
+
+CACHE_SIZE = 4096  # recently seen values remembered per format
+MEMO_MAX_LENGTH = 512  # longer values are checked but not remembered
+
+_UUID = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\Z")
+
+# RFC 3339 date-time; re.ASCII keeps \d to 0-9 (str patterns match any Unicode digit)
+_DATE_TIME = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[Tt](\d{2}):(\d{2}):(\d{2})(?:\.\d+)?"
+    r"(?:[Zz]|[+-](\d{2}):(\d{2}))\Z",
+    re.ASCII,
+)
+_DAYS_IN_MONTH = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# RFC 3986 URI (scheme required; relative references are not URIs)
+_PCT = r"%[0-9A-Fa-f]{2}"
+_SUB_DELIMS = r"!$&'()*+,;="
+_UNRESERVED = r"A-Za-z0-9\-._~"
+_PCHAR = rf"(?:[{_UNRESERVED}{_SUB_DELIMS}:@]|{_PCT})"
+_AUTHORITY = (
+    rf"(?:(?:[{_UNRESERVED}{_SUB_DELIMS}:]|{_PCT})*@)?"                    # userinfo
+    rf"(?:\[(?:[0-9A-Fa-f:.]+|v[0-9A-Fa-f]+\.[{_UNRESERVED}{_SUB_DELIMS}:]+)\]"  # IP-literal
+    rf"|(?:[{_UNRESERVED}{_SUB_DELIMS}]|{_PCT})*)"                          # IPv4 or reg-name
+    r"(?::\d*)?"                                                           # port
+)
+_URI = re.compile(
+    r"[A-Za-z][A-Za-z0-9+\-.]*:"
+    rf"(?://{_AUTHORITY}(?:/{_PCHAR}*)*|/?(?:{_PCHAR}+(?:/{_PCHAR}*)*)?)"
+    rf"(?:\?(?:{_PCHAR}|[/?])*)?"
+    rf"(?:#(?:{_PCHAR}|[/?])*)?\Z",
+    re.ASCII,
+)
+
+
+def is_uuid(value: str) -> bool:
+    return _UUID.match(value) is not None
+
+
+def is_date_time(value: str) -> bool:
+    match = _DATE_TIME.match(value)
+    if match is None:
+        return False
+    year, month, day, hour, minute, second, offset_hour, offset_minute = match.groups()
+    month, day = int(month), int(day)
+    if not 1 <= month <= 12 or not 1 <= day <= _DAYS_IN_MONTH[month]:
+        return False
+    if month == 2 and day == 29:
+        year = int(year)
+        if year % 4 or (year % 100 == 0 and year % 400):
+            return False
+    if int(hour) > 23 or int(minute) > 59 or int(second) > 60:  # 60: leap second
+        return False
+    return offset_hour is None or (int(offset_hour) <= 23 and int(offset_minute) <= 59)
+
+
+def is_uri(value: str) -> bool:
+    return _URI.match(value) is not None
+
+
+def _memoized(check):
+    cached = lru_cache(maxsize=CACHE_SIZE)(check)
+
+    def run(instance) -> bool:
+        # Formats constrain strings only; other types are the "type" keyword's business
+        if not isinstance(instance, str):
+            return True
+        return cached(instance) if len(instance) <= MEMO_MAX_LENGTH else check(instance)
+
+    run.cache_info = cached.cache_info
+    run.cache_clear = cached.cache_clear
+    return run
+
+
+CHECKS = {"uuid": _memoized(is_uuid), "date-time": _memoized(is_date_time), "uri": _memoized(is_uri)}
+
+
+def build_format_checker() -> FormatChecker:
+    """A FormatChecker enforcing exactly the formats in CHECKS"""
+    checker = FormatChecker(formats=())
+    for name, check in CHECKS.items():
+        checker.checks(name)(check)
+    return checker
+
+
+def cache_info() -> dict:
+    return {name: check.cache_info()._asdict() for name, check in CHECKS.items()}
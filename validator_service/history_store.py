@@ -0,0 +1,287 @@
+"""Persistent validation history in SQLite (WAL mode) with batched background writes.
+
+The request path only hands a record to an in-memory queue; a writer thread
+drains it and inserts whole batches in one transaction. When the writer
+falls behind and the queue is full, records go to a bounded spill buffer
+(oldest dropped and counted when that overflows too) instead of blocking.
+A failed batch is retried when the database errors; a record the database
+cannot take at all is dropped and counted alone, so the writer keeps running.
+
+Readers open their own connections, so queries and exports run concurrently
+with the writer. Rows are the same shape ``ResultLog.scan`` yields.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+from result_log import document_identity
+from results import ResultRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS validations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    document_id TEXT,
+    author TEXT,
+    document_hash TEXT NOT NULL,
+    ksml_version TEXT,
+    valid INTEGER NOT NULL,
+    duration_ms REAL,
+    errors TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS validation_errors (
+    validation_id INTEGER NOT NULL REFERENCES validations(id),
+    code TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_validations_ts ON validations(ts);
+CREATE INDEX IF NOT EXISTS idx_validations_document ON validations(document_id, id);
+CREATE INDEX IF NOT EXISTS idx_validations_author ON validations(author, id);
+CREATE INDEX IF NOT EXISTS idx_validations_hash ON validations(document_hash);
+CREATE INDEX IF NOT EXISTS idx_validation_errors_code ON validation_errors(code, validation_id);
+"""
+
+COLUMNS = ("ts", "document_id", "author", "document_hash", "ksml_version", "valid", "duration_ms", "errors")
+FETCH_ROWS = 500
+BUSY_TIMEOUT = 5.0  # seconds; prefork workers share the database file
+
+
+class HistoryStore:
+    """Validation history backed by a SQLite database file"""
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 0.5,
+                 queue_size: int = 10000, spill_size: int = 100000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_size = spill_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._spill = deque(maxlen=spill_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._writing = False
+        self.written = self.batches = self.spilled = self.dropped = self.write_errors = 0
+        self.last_error = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+        atexit.register(self.stop)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork_in_child)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def __len__(self) -> int:
+        """Records held in memory, not yet written"""
+        return self._queue.qsize() + len(self._spill)
+
+    # --- writing ---
+    def record(self, document, document_hash: str, result: ResultRecord, duration_ms: float):
+        """Never blocks: queue, or spill when the writer is behind"""
+        item = (time.time(), *document_identity(document), document_hash, result, round(duration_ms, 3))
+        if not self._spill:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                pass
+        if len(self._spill) == self.spill_size:
+            self.dropped += 1  # deque(maxlen) evicts the oldest
+        self._spill.append(item)
+        self.spilled += 1
+
+    def _take_batch(self) -> Tuple[list, int]:
+        """Up to batch_size records, and how many of them came from the queue"""
+        batch = []
+        try:
+            batch.append(self._queue.get(block=not self._spill, timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        queued = len(batch)
+        if self._spill:
+            self._writing = True  # keeps flush() waiting once records leave the spill buffer
+        while self._spill and len(batch) < self.batch_size:
+            batch.append(self._spill.popleft())
+        return batch, queued
+
+    def _write(self, conn: sqlite3.Connection, batch: list):
+        with conn:
+            for ts, doc_id, author, doc_hash, result, duration_ms in batch:
+                errors = json.dumps([e.to_dict() for e in result.errors], ensure_ascii=False, separators=(",", ":"))
+                cursor = conn.execute(
+                    "INSERT INTO validations (ts, document_id, author, document_hash, ksml_version, valid, duration_ms, errors)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (ts, doc_id, author, doc_hash, result.ksml_version, int(result.valid), duration_ms, errors)
+                )
+                codes = {e.code for e in result.errors}
+                if codes:
+                    conn.executemany(
+                        "INSERT INTO validation_errors (validation_id, code) VALUES (?, ?)",
+                        [(cursor.lastrowid, code) for code in sorted(codes)]
+                    )
+        self.written += len(batch)
+        self.batches += 1
+
+    def _requeue(self, batch: list):
+        """Put a failed batch back at the head of the spill buffer"""
+        # extendleft on a full deque(maxlen) evicts from the right: the newest spilled records
+        self.dropped += max(0, len(self._spill) + len(batch) - self.spill_size)
+        self._spill.extendleft(reversed(batch))
+
+    def _write_each(self, conn: sqlite3.Connection, batch: list):
+        for record in batch:
+            try:
+                self._write(conn, [record])
+            except sqlite3.Error:
+                self._requeue([record])
+            except Exception:
+                self.dropped += 1
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                batch, queued = self._take_batch()
+                try:
+                    if batch:
+                        self._write(conn, batch)
+                except sqlite3.Error as e:
+                    # Keep the records (spill is bounded) and back off before retrying
+                    self.write_errors += 1
+                    self.last_error = str(e)
+                    self._requeue(batch)
+                    if self._stop.wait(self.flush_interval):
+                        return
+                except Exception as e:
+                    # A record the database cannot take (e.g. text that does not encode) fails every
+                    # retry: write the batch record by record and drop only the ones that fail
+                    self.write_errors += 1
+                    self.last_error = repr(e)
+                    self._write_each(conn, batch)
+                finally:
+                    for _ in range(queued):
+                        self._queue.task_done()
+                    self._writing = False
+                if not batch and self._stop.is_set():
+                    return
+        finally:
+            conn.close()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ksml-history-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Flush what is queued and stop the writer"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything recorded so far is written; False on timeout or with no writer running"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks or self._spill or self._writing:
+            if time.monotonic() > deadline or not self.writer_alive:
+                return False
+            time.sleep(0.01)
+        return True
+
+    @property
+    def writer_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _after_fork_in_child(self):
+        # The writer thread stays in the parent; the child drops the parent's backlog
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._spill = deque(maxlen=self.spill_size)
+        self._stop = threading.Event()
+        if self._thread is not None:
+            self._thread = None
+            self.start()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "writer_alive": self.writer_alive,
+            "queued": self._queue.qsize(),
+            "spill": len(self._spill),
+            "written": self.written,
+            "batches": self.batches,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+            "last_error": self.last_error,
+        }
+
+    # --- reading ---
+    def scan(self, since: Optional[float] = None, until: Optional[float] = None, code: Optional[str] = None,
+             document_id: Optional[str] = None, author: Optional[str] = None, limit: Optional[int] = None,
+             newest_first: bool = False) -> Iterator[dict]:
+        """Matching rows, streamed from a cursor; oldest first unless ``newest_first``"""
+        clauses: List[str] = []
+        params: list = []
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if document_id is not None:
+            clauses.append("document_id = ?")
+            params.append(document_id)
+        if author is not None:
+            clauses.append("author = ?")
+            params.append(author)
+        if code is not None:
+            clauses.append("id IN (SELECT validation_id FROM validation_errors WHERE code = ?)")
+            params.append(code)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM validations"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC" if newest_first else " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        conn = self._connect()
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(FETCH_ROWS)
+                if not rows:
+                    return
+                for ts, doc_id, doc_author, doc_hash, version, valid, duration_ms, errors in rows:
+                    yield {
+                        "ts": ts,
+                        "document_id": doc_id,
+                        "author": doc_author,
+                        "document_hash": doc_hash,
+                        "ksml_version": version,
+                        "valid": bool(valid),
+                        "duration_ms": duration_ms,
+                        "errors": json.loads(errors),
+                    }
+        finally:
+            conn.close()
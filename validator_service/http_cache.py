@@ -0,0 +1,143 @@
+"""HTTP caching helpers: pre-encoded static bodies, ETags and a verdict cache.
+
+Bodies that never change while the service runs (the schemas) are
+serialized and gzip-compressed once, with a strong ETag per representation,
+so a request costs a header comparison. Validation verdicts are remembered
+by the document's canonical hash, which doubles as the ``/validate`` ETag:
+a client holding the hash can ask for the verdict without re-uploading the
+document.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+def parse_etags(header: Optional[str]) -> Optional[set]:
+    """Entity tags of an If-None-Match header, weak prefixes dropped; None when absent"""
+    if header is None:
+        return None
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag)
+    return tags
+
+
+def quote_etag(value: str) -> str:
+    return f'"{value}"'
+
+
+def unquote_etag(tag: str) -> str:
+    return tag[1:-1] if len(tag) >= 2 and tag[0] == tag[-1] == '"' else tag
+
+
+def none_match(request: Request, etag: str) -> bool:
+    """True when If-None-Match names ``etag`` (or ``*``): the client's copy is current"""
+    tags = parse_etags(request.headers.get("if-none-match"))
+    return tags is not None and ("*" in tags or etag in tags)
+
+
+def accepts_gzip(request: Request) -> bool:
+    """Accept-Encoding allows gzip: named explicitly, or by ``*``, with a non-zero q"""
+    weights = {}
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip().lower()] = q
+    q = weights.get("gzip", weights.get("x-gzip", weights.get("*", 0.0)))
+    return q > 0
+
+
+def not_modified(etag: str, cache_control: Optional[str] = None) -> Response:
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return Response(status_code=304, headers=headers)
+
+
+class StaticBody:
+    """A JSON body encoded once, served identity or gzip with a strong ETag per representation"""
+    __slots__ = ("body", "gzipped", "etag", "gzip_etag", "media_type", "cache_control")
+
+    def __init__(self, body: bytes, media_type: str = "application/json", cache_control: str = "public, max-age=300"):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = quote_etag(digest)
+        self.gzip_etag = quote_etag(digest + "-gzip")  # strong ETags differ per content coding
+        self.media_type = media_type
+        self.cache_control = cache_control
+
+    def response(self, request: Request) -> Response:
+        compressed = accepts_gzip(request)
+        etag = self.gzip_etag if compressed else self.etag
+        if none_match(request, etag):
+            return not_modified(etag, self.cache_control)
+        headers = {"ETag": etag, "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if compressed:
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzipped, media_type=self.media_type, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+
+class VerdictCache:
+    """LRU map of canonical document hash -> validation result"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, document_hash: str, result):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._entries[document_hash] = result
+            self._entries.move_to_end(document_hash)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def get(self, document_hash: str):
+        with self._lock:
+            result = self._entries.get(document_hash)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(document_hash)
+            return result
+
+    def first_known(self, hashes: Iterable[str]) -> Optional[str]:
+        """The first of ``hashes`` with a cached verdict"""
+        with self._lock:
+            for document_hash in hashes:
+                if document_hash in self._entries:
+                    return document_hash
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,369 @@
+"""Asynchronous validation jobs for corpora too large for a single request.
+
+A job's input is a JSON-lines file (one document per line): either an upload
+spooled into the jobs directory or a file under the configured input root.
+Runner threads claim queued jobs from a SQLite database and validate them in
+chunks; each chunk's results and the job's progress (byte offset, counts)
+commit in one transaction, so a job interrupted by a restart resumes from
+its last chunk. Claims carry the owning pid and claim time, which lets any
+process requeue jobs whose owner died (even when its pid was reused since) and
+keeps prefork workers from processing one job twice.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, List, Optional, Tuple
+
+import psutil
+
+from results import ResultRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    source TEXT NOT NULL,
+    source_path TEXT NOT NULL,
+    source_size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner INTEGER,
+    run_started_at REAL,
+    run_lines_start INTEGER NOT NULL DEFAULT 0,
+    lines_total INTEGER,
+    lines_read INTEGER NOT NULL DEFAULT 0,
+    offset INTEGER NOT NULL DEFAULT 0,
+    documents INTEGER NOT NULL DEFAULT 0,
+    valid INTEGER NOT NULL DEFAULT 0,
+    invalid INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    valid INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = "queued", "running", "completed", "failed", "cancelled"
+BUSY_TIMEOUT = 10.0  # seconds
+POLL_INTERVAL = 1.0  # seconds; picks up jobs submitted to other workers
+
+
+class JobNotFound(KeyError):
+    pass
+
+
+def owner_alive(pid: Optional[int], claimed_at: Optional[float]) -> bool:
+    """Whether the process that claimed a job at ``claimed_at`` still runs
+
+    A live pid is not enough: after a container restart the same pid usually
+    belongs to a new process, one started after the claim.
+    """
+    if pid is None:
+        return False
+    try:
+        process = psutil.Process(pid)
+        return claimed_at is None or process.create_time() <= claimed_at
+    except psutil.NoSuchProcess:
+        return False
+    except psutil.AccessDenied:
+        return True
+
+
+class JobManager:
+    """Persistent job queue plus a pool of runner threads"""
+
+    def __init__(self, directory: str, validate: Callable[[bytes], ResultRecord], workers: int = 2,
+                 chunk_size: int = 100, input_root: Optional[str] = None):
+        self.directory = directory
+        self.uploads = os.path.join(directory, "uploads")
+        self.db_path = os.path.join(directory, "jobs.db")
+        self.validate = validate
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.input_root = os.path.realpath(input_root) if input_root else None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+        os.makedirs(self.uploads, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork_in_child)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- submission ---
+    def upload_path(self, job_id: str) -> str:
+        return os.path.join(self.uploads, f"{job_id}.jsonl")
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def resolve_input(self, path: str) -> str:
+        """A local input file, which must live under the configured input root"""
+        if self.input_root is None:
+            raise PermissionError("Local file jobs are disabled (set KSML_JOBS_INPUT_ROOT)")
+        resolved = os.path.realpath(os.path.join(self.input_root, path))
+        if os.path.commonpath([resolved, self.input_root]) != self.input_root:
+            raise PermissionError("Path is outside the jobs input root")
+        if not os.path.isfile(resolved):
+            raise FileNotFoundError(path)
+        return resolved
+
+    def submit(self, job_id: str, source: str, path: str, lines_total: Optional[int] = None) -> dict:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, source, source_path, source_size, created_at, lines_total)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, source, path, os.path.getsize(path), time.time(), lines_total)
+            )
+        self._wake.set()
+        return self.get(job_id)
+
+    def cancel(self, job_id: str) -> dict:
+        """Queued jobs stop immediately; running ones after their current chunk"""
+        with self._connect() as conn:
+            was_queued = conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED)
+            ).rowcount
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, RUNNING)
+            )
+        if was_queued:
+            self._discard_upload(job_id)
+        return self.get(job_id)
+
+    def _discard_upload(self, job_id: str):
+        """Spooled uploads are only needed until the job finishes"""
+        try:
+            os.unlink(self.upload_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    # --- reporting ---
+    def get(self, job_id: str) -> dict:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            raise JobNotFound(job_id)
+        return self._describe(row)
+
+    @staticmethod
+    def _describe(row: sqlite3.Row) -> dict:
+        total, read = row["lines_total"], row["lines_read"]
+        throughput = None
+        if row["status"] == RUNNING and row["run_started_at"]:
+            elapsed = max(time.time() - row["run_started_at"], 1e-6)
+            rate = (read - row["run_lines_start"]) / elapsed
+            throughput = {
+                "lines_per_second": round(rate, 1),
+                "eta_seconds": round((total - read) / rate, 1) if total is not None and rate > 0 else None,
+            }
+        elif row["status"] == COMPLETED and row["started_at"] and row["finished_at"]:
+            elapsed = max(row["finished_at"] - row["started_at"], 1e-6)
+            throughput = {"lines_per_second": round(read / elapsed, 1), "eta_seconds": 0}
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "source": row["source"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "progress": {
+                "lines_read": read,
+                "lines_total": total,
+                "percent": round(100 * read / total, 1) if total else (100.0 if row["status"] == COMPLETED else 0.0),
+            },
+            "documents": row["documents"],
+            "valid": row["valid"],
+            "invalid": row["invalid"],
+            "throughput": throughput,
+            "error": row["error"],
+        }
+
+    def results(self, job_id: str, cursor: int = 0, limit: int = 100) -> Tuple[List[Tuple[int, int, str]], Optional[int]]:
+        """A page of (seq, line, result JSON) after ``cursor``, and the next cursor (None at the end)"""
+        self.get(job_id)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT seq, line, result FROM job_results WHERE job_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+                (job_id, cursor, limit + 1)
+            ).fetchall()
+        finally:
+            conn.close()
+        page = [(row["seq"], row["line"], row["result"]) for row in rows[:limit]]
+        return page, (rows[limit]["seq"] if len(rows) > limit else None)
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        finally:
+            conn.close()
+        return {"workers": self.workers, "running_threads": sum(t.is_alive() for t in self._threads), "jobs": counts}
+
+    # --- runners ---
+    def start(self):
+        with self._lock:
+            if any(t.is_alive() for t in self._threads):
+                return
+            self._stop.clear()
+            self.requeue_orphans()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"ksml-job-runner-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _after_fork_in_child(self):
+        # Runner threads stay in the parent; a worker starts its own on startup
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def requeue_orphans(self) -> int:
+        """Jobs left running by a process that no longer exists go back to the queue"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, owner, run_started_at FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            orphans = [row["id"] for row in rows if not owner_alive(row["owner"], row["run_started_at"])]
+            conn.executemany(
+                "UPDATE jobs SET status = ?, owner = NULL WHERE id = ? AND status = ?",
+                [(QUEUED, job_id, RUNNING) for job_id in orphans]
+            )
+        return len(orphans)
+
+    def _claim(self, conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+        while True:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            with conn:
+                claimed = conn.execute(
+                    "UPDATE jobs SET status = ?, owner = ?, started_at = COALESCE(started_at, ?),"
+                    " run_started_at = ?, run_lines_start = lines_read WHERE id = ? AND status = ?",
+                    (RUNNING, os.getpid(), now, now, row["id"], QUEUED)
+                ).rowcount
+            if claimed:
+                return conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not self._stop.is_set():
+                job = self._claim(conn)
+                if job is None:
+                    self._wake.wait(POLL_INTERVAL)
+                    self._wake.clear()
+                    continue
+                try:
+                    self._process(conn, job)
+                except Exception as e:
+                    with conn:
+                        conn.execute(
+                            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = ?",
+                            (FAILED, str(e), time.time(), job["id"], RUNNING)
+                        )
+                    if job["source"] == "upload":
+                        self._discard_upload(job["id"])
+        finally:
+            conn.close()
+
+    def _process(self, conn: sqlite3.Connection, job: sqlite3.Row):
+        path = job["source_path"]
+        if os.path.getsize(path) != job["source_size"]:
+            raise RuntimeError("Input file changed since the job was submitted")
+        if job["lines_total"] is None:
+            with conn:
+                conn.execute("UPDATE jobs SET lines_total = ? WHERE id = ?", (count_lines(path), job["id"]))
+
+        offset, line_no, seq = job["offset"], job["lines_read"], job["documents"]
+        counts = {"valid": job["valid"], "invalid": job["invalid"]}
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while not self._stop.is_set():
+                rows = []
+                for _ in range(self.chunk_size):
+                    line = f.readline()
+                    if not line:
+                        break
+                    line_no += 1
+                    offset += len(line)
+                    if not line.strip():
+                        continue
+                    result = self.validate(line)
+                    counts["valid" if result.valid else "invalid"] += 1
+                    rows.append((job["id"], seq, line_no, int(result.valid), result.to_json_bytes().decode("utf-8")))
+                    seq += 1
+                done = f.tell() == job["source_size"] or not line
+
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO job_results VALUES (?, ?, ?, ?, ?)", rows)
+                    updated = conn.execute(
+                        "UPDATE jobs SET offset = ?, lines_read = ?, documents = ?, valid = ?, invalid = ?,"
+                        " status = ?, finished_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                        (offset, line_no, seq, counts["valid"], counts["invalid"],
+                         COMPLETED if done else RUNNING, time.time() if done else None,
+                         job["id"], RUNNING, os.getpid())
+                    ).rowcount
+                    if not updated:
+                        conn.rollback()  # cancelled (or requeued) meanwhile: discard this chunk
+                        break
+                if done:
+                    break
+            else:
+                # Stopping: hand the job back so the next start resumes it
+                with conn:
+                    conn.execute("UPDATE jobs SET status = ?, owner = NULL WHERE id = ? AND status = ? AND owner = ?",
+                                 (QUEUED, job["id"], RUNNING, os.getpid()))
+                return
+        if job["source"] == "upload":
+            self._discard_upload(job["id"])
+
+
+def count_lines(path: str, block: int = 1 << 20) -> int:
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(block)
+            if not data:
+                break
+            lines += data.count(b"\n")
+            last = data[-1:]
+    return lines + (last != b"\n")
@@ -0,0 +1,269 @@
+"""Compact binary encoding of the KSML (JSON) data model.
+
+Layout: the 4-byte header ``KSB\\x01`` followed by one value. Every value
+starts with a tag byte: the high 3 bits are the kind, the low 5 bits an
+immediate (0-30), or 31 meaning an unsigned LEB128 varint follows.
+
+    kind 0  constant        immediate 0 null, 1 false, 2 true, 3 float64 (8 bytes, big-endian)
+    kind 1  int >= 0        n
+    kind 2  int < 0         -(n + 1)
+    kind 3  string          n bytes of UTF-8, appended to the string table
+    kind 4  string ref      string table[n]
+    kind 5  array           n values
+    kind 6  object          n (key, value) pairs
+
+A key is a varint: 0 introduces a new key (varint length + UTF-8, appended
+to the key table), k > 0 refers to key table[k - 1]. Both tables are seeded
+with the KSML vocabulary below, so well-known keys (``name``, ``action``,
+``parameters``...) and enum values (``on_failure``, ``environment``,
+``ksml_version``) cost one byte, and any other repeated key or string is
+sent once. The seed tables are part of format version 1: changing them
+means a new version byte.
+
+References make the decoded document larger than the payload (one byte
+can repeat a long string), so ``decode`` charges every string and key it
+emits, references included, against ``max_size`` characters.
+
+The format is a size optimization only: payloads are a third to a half the
+size of compact JSON. It does not save validator CPU. This pure-Python
+decoder is 2-5x slower than the C ``json`` parser, and decode plus validate
+is slower than JSON plus validate (tools/bench_binary.py). Producers limited
+by bandwidth or storage gain from it; a CPU-bound service should take JSON.
+"""
+
+import struct
+from typing import Any, List, Tuple
+
+MEDIA_TYPE = "application/x-ksml-binary"
+MAGIC = b"KSB\x01"
+MAX_DEPTH = 64
+MAX_INT = 1 << 64
+MAX_DECODED_SIZE = 10 * 1024 * 1024  # characters of strings and keys; the service passes its request limit
+
+STATIC_KEYS = (
+    "ksml_version", "metadata", "intent", "steps", "name", "action", "parameters", "on_failure",
+    "timeout_seconds", "max_retries", "id", "author", "created_at", "description", "tags", "title",
+    "environment", "target", "options", "configurations", "value", "version", "source",
+    "capabilities", "extensions", "features", "conditions", "dependencies", "expression", "type",
+    "hash", "retry_policy", "max_attempts", "backoff_seconds", "timeout_override", "documents",
+)
+STATIC_STRINGS = (
+    "0.1.0", "0.2.0",
+    "stop", "continue", "retry",
+    "production", "staging", "development", "test",
+)
+
+K_CONST, K_UINT, K_NINT, K_STR, K_REF, K_ARRAY, K_OBJECT = range(7)
+C_NULL, C_FALSE, C_TRUE, C_FLOAT = range(4)
+IMMEDIATE_MAX = 30
+VARINT_FOLLOWS = 31
+MAX_VARINT_BYTES = 10
+
+_DOUBLE = struct.Struct(">d")
+
+
+class BinaryDecodeError(ValueError):
+    """The payload is not a well-formed KSML binary document"""
+
+
+class _Expansion:
+    """Characters of strings and keys still allowed in the decoded document"""
+    __slots__ = ("remaining", "limit")
+
+    def __init__(self, limit: int):
+        self.remaining = self.limit = limit
+
+    def exceeded(self):
+        raise BinaryDecodeError(f"Decoded document exceeds {self.limit} characters of strings and keys")
+
+
+# --- Encoding ---
+def _put_varint(out: bytearray, n: int):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _put_head(out: bytearray, kind: int, n: int):
+    if n <= IMMEDIATE_MAX:
+        out.append(kind << 5 | n)
+    else:
+        out.append(kind << 5 | VARINT_FOLLOWS)
+        _put_varint(out, n)
+
+
+def encode(value: Any) -> bytes:
+    """Encode a JSON-compatible value (dicts with str keys, lists, str, int, float, bool, None)"""
+    out = bytearray(MAGIC)
+    keys = {key: i + 1 for i, key in enumerate(STATIC_KEYS)}
+    strings = {s: i for i, s in enumerate(STATIC_STRINGS)}
+
+    def put(v, depth):
+        if depth > MAX_DEPTH:
+            raise ValueError(f"Nesting deeper than {MAX_DEPTH} levels")
+        if isinstance(v, str):
+            ref = strings.get(v)
+            if ref is not None:
+                _put_head(out, K_REF, ref)
+            else:
+                strings[v] = len(strings)
+                raw = v.encode("utf-8")
+                _put_head(out, K_STR, len(raw))
+                out.extend(raw)
+        elif isinstance(v, dict):
+            _put_head(out, K_OBJECT, len(v))
+            for key, item in v.items():
+                if not isinstance(key, str):
+                    raise TypeError(f"Object keys must be str, not {type(key).__name__}")
+                ref = keys.get(key)
+                if ref is not None:
+                    _put_varint(out, ref)
+                else:
+                    keys[key] = len(keys) + 1
+                    raw = key.encode("utf-8")
+                    out.append(0)
+                    _put_varint(out, len(raw))
+                    out.extend(raw)
+                put(item, depth + 1)
+        elif isinstance(v, list):
+            _put_head(out, K_ARRAY, len(v))
+            for item in v:
+                put(item, depth + 1)
+        elif v is None:
+            out.append(K_CONST << 5 | C_NULL)
+        elif v is True:
+            out.append(K_CONST << 5 | C_TRUE)
+        elif v is False:
+            out.append(K_CONST << 5 | C_FALSE)
+        elif isinstance(v, int):
+            if v >= 0:
+                if v >= MAX_INT:
+                    raise ValueError(f"Integer {v} out of range")
+                _put_head(out, K_UINT, v)
+            else:
+                if -v > MAX_INT:
+                    raise ValueError(f"Integer {v} out of range")
+                _put_head(out, K_NINT, -v - 1)
+        elif isinstance(v, float):
+            out.append(K_CONST << 5 | C_FLOAT)
+            out.extend(_DOUBLE.pack(v))
+        else:
+            raise TypeError(f"Object of type {type(v).__name__} is not KSML serializable")
+
+    put(value, 0)
+    return bytes(out)
+
+
+# --- Decoding ---
+def _varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    n = shift = 0
+    for _ in range(MAX_VARINT_BYTES):
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+    raise BinaryDecodeError(f"Varint longer than {MAX_VARINT_BYTES} bytes at offset {pos}")
+
+
+def _value(buf: bytes, pos: int, depth: int, keys: List[str], strings: List[str],
+           expansion: _Expansion) -> Tuple[Any, int]:
+    tag = buf[pos]
+    pos += 1
+    kind = tag >> 5
+    n = tag & 0x1F
+    if n == VARINT_FOLLOWS:
+        n, pos = _varint(buf, pos)
+
+    if kind == K_REF:
+        s = strings[n]
+        expansion.remaining -= len(s)
+        if expansion.remaining < 0:
+            expansion.exceeded()
+        return s, pos
+    if kind == K_STR:
+        end = pos + n
+        if end > len(buf):
+            raise BinaryDecodeError(f"String overruns payload at offset {pos}")
+        s = buf[pos:end].decode("utf-8")
+        expansion.remaining -= len(s)
+        if expansion.remaining < 0:
+            expansion.exceeded()
+        strings.append(s)
+        return s, end
+    if kind == K_OBJECT:
+        if depth >= MAX_DEPTH:
+            raise BinaryDecodeError(f"Nesting deeper than {MAX_DEPTH} levels")
+        if 2 * n > len(buf) - pos:
+            raise BinaryDecodeError(f"Object size {n} exceeds payload at offset {pos}")
+        obj = {}
+        for _ in range(n):
+            k = buf[pos]
+            pos += 1
+            if k > 0x7F:
+                k, pos = _varint(buf, pos - 1)
+            if k:
+                key = keys[k - 1]
+            else:
+                size, pos = _varint(buf, pos)
+                end = pos + size
+                if end > len(buf):
+                    raise BinaryDecodeError(f"Key overruns payload at offset {pos}")
+                key = buf[pos:end].decode("utf-8")
+                keys.append(key)
+                pos = end
+            expansion.remaining -= len(key)
+            if expansion.remaining < 0:
+                expansion.exceeded()
+            obj[key], pos = _value(buf, pos, depth + 1, keys, strings, expansion)
+        return obj, pos
+    if kind == K_UINT:
+        return n, pos
+    if kind == K_ARRAY:
+        if depth >= MAX_DEPTH:
+            raise BinaryDecodeError(f"Nesting deeper than {MAX_DEPTH} levels")
+        if n > len(buf) - pos:
+            raise BinaryDecodeError(f"Array size {n} exceeds payload at offset {pos}")
+        arr = []
+        append = arr.append
+        for _ in range(n):
+            item, pos = _value(buf, pos, depth + 1, keys, strings, expansion)
+            append(item)
+        return arr, pos
+    if kind == K_NINT:
+        return -n - 1, pos
+    if kind == K_CONST:
+        if n == C_NULL:
+            return None, pos
+        if n == C_TRUE:
+            return True, pos
+        if n == C_FALSE:
+            return False, pos
+        if n == C_FLOAT:
+            return _DOUBLE.unpack_from(buf, pos)[0], pos + 8
+    raise BinaryDecodeError(f"Unknown tag 0x{tag:02x} at offset {pos - 1}")
+
+
+def decode(data: bytes, max_size: int = MAX_DECODED_SIZE) -> Any:
+    """Decode a KSML binary payload; raises BinaryDecodeError on malformed input
+
+    ``max_size`` bounds the characters of all strings and keys in the
+    result, each reference counted again: a few bytes must not expand to
+    gigabytes once the document is serialized.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise BinaryDecodeError("Missing KSML binary header (expected KSB version 1)")
+    buf = bytes(data)
+    try:
+        value, pos = _value(buf, len(MAGIC), 0, list(STATIC_KEYS), list(STATIC_STRINGS), _Expansion(max_size))
+    except BinaryDecodeError:
+        raise
+    except IndexError:
+        raise BinaryDecodeError("Truncated payload or reference to an unknown key/string") from None
+    except (UnicodeDecodeError, struct.error) as e:
+        raise BinaryDecodeError(f"Malformed payload: {e}") from None
+    if pos != len(buf):
+        raise BinaryDecodeError(f"{len(buf) - pos} trailing bytes after document")
+    return value
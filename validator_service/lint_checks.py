@@ -0,0 +1,31 @@
+"""Built-in lint rules, reported as warnings on every validation result.
+
+Each rule is registered on ``ENGINE`` for one node kind and the versions it
+applies to; see ``linting/lint_engine.py`` for the dispatch. Rules only
+look at what they are handed and tolerate malformed nodes: they also run
+on documents that failed validation.
+
+No rule emits KSML_200 or KSML_007: no KSML feature is deprecated yet, and
+the codes stay reserved until one is. v0.1 documents get no warnings, since
+v0.1 results must stay exactly what the v0.1 validator returned.
+"""
+
+from linting.lint_engine import LintEngine
+
+from conditions import CONDITION_TYPES
+from step_graph import DEPENDS_ON
+
+ENGINE = LintEngine()
+
+
+@ENGINE.rule("KSML_201", "dependency", versions=("0.2.0",))
+def unpinned_dependency(ctx, path, index, dependency):
+    if "version" not in dependency and "hash" not in dependency:
+        yield path, f"dependency '{dependency.get('name')}' pins neither a version nor a hash"
+
+
+@ENGINE.rule("KSML_202", "condition", versions=("0.2.0",))
+def unknown_condition_type(ctx, path, index, condition):
+    kind = condition.get("type")
+    if isinstance(kind, str) and kind not in CONDITION_TYPES and kind != DEPENDS_ON:
+        yield f"{path}.type", f"condition type '{kind}' is not run_if, skip_if or depends_on and is ignored"
@@ -0,0 +1,155 @@
+"""Non-blocking structured logging.
+
+Request threads only enqueue ``LogRecord`` objects; message formatting, JSON
+encoding and the actual I/O happen on a background listener thread. Records
+marked as sampled (routine success logs) are kept at a configurable rate,
+everything else is always logged. If the queue fills up, records are dropped
+and counted instead of blocking the caller.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+
+def log_extra(event: str, sampled: bool = False, **fields) -> dict:
+    """``extra=`` payload for a structured record"""
+    return {"event": event, "fields": fields, "sampled": sampled}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        event = getattr(record, "event", None)
+        if event:
+            entry["event"] = event
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SuccessSampler(logging.Filter):
+    """Keep sampled records at ``rate``; never touch unsampled ones"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False) or record.levelno >= logging.WARNING:
+            return True
+        if self.rate >= 1.0 or random.random() < self.rate:
+            return True
+        self.dropped += 1
+        return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.overflowed = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats here, on the caller's thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.overflowed += 1
+
+
+class LogPipeline:
+    def __init__(self, level: int, sample_rate: float, queue_size: int, stream=None):
+        self.level = level
+        self.sampler = SuccessSampler(sample_rate)
+        self.queue_size = queue_size
+        self.stream = stream if stream is not None else sys.stderr
+        self.handler = None
+        self.listener = None
+        self._running = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            log_queue = queue.Queue(maxsize=self.queue_size)
+            output = logging.StreamHandler(self.stream)
+            output.setFormatter(JsonFormatter())
+
+            handler = DeferredQueueHandler(log_queue)
+            handler.addFilter(self.sampler)
+
+            root = logging.getLogger()
+            if self.handler is not None:
+                root.removeHandler(self.handler)
+            root.addHandler(handler)
+            root.setLevel(self.level)
+
+            self.handler = handler
+            self.listener = QueueListener(log_queue, output, respect_handler_level=True)
+            self.listener.start()
+            self._running = True
+
+    def stop(self):
+        """Flush pending records and stop the listener thread"""
+        with self._lock:
+            if self._running:
+                self.listener.stop()
+                self._running = False
+
+    def _after_fork_in_child(self):
+        # The listener thread does not survive fork; give the child its own
+        self._lock = threading.Lock()
+        self._running = False
+        self.start()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.handler.queue.qsize() if self.handler else 0,
+            "sample_rate": self.sampler.rate,
+            "sampled_out": self.sampler.dropped,
+            "overflowed": self.handler.overflowed if self.handler else 0,
+        }
+
+
+_pipeline = None
+
+
+def configure_logging(level: int = logging.INFO, sample_rate: float = 1.0, queue_size: int = 10000, stream=None) -> LogPipeline:
+    """Install the queue-based pipeline on the root logger (idempotent)"""
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.stop()
+        _pipeline.sampler.rate = sample_rate
+        _pipeline.start()
+        return _pipeline
+
+    _pipeline = LogPipeline(level, sample_rate, queue_size, stream)
+    _pipeline.start()
+    atexit.register(_pipeline.stop)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_pipeline._after_fork_in_child)
+    return _pipeline
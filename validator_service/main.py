@@ -1,17 +1,20 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Depends, Header
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Depends, Header, Query
+from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, field_validator
-from typing import List, Optional, Any, Dict
+from pydantic import BaseModel, field_validator, ValidationError as PydanticValidationError
+from typing import List, Optional, Any, AsyncIterator, Dict
 import json
 import os
 import time
 import hashlib
-import psutil
+import asyncio
+import tempfile
 from pathlib import Path
 from collections import defaultdict, deque
+from contextlib import asynccontextmanager
 import re
 
 # --- Configuration ---
@@ -23,8 +26,62 @@ API_KEY = os.getenv("KSML_API_KEY", None)  # Optional authentication
 RATE_LIMIT_REQUESTS = 100  # requests per minute
 RATE_LIMIT_WINDOW = 60  # seconds
 
+# Admission control lanes (single and batch requests share the threadpool's 40
+# workers, so the two concurrency limits together must stay below that)
+SINGLE_MAX_CONCURRENCY = int(os.getenv("KSML_SINGLE_MAX_CONCURRENCY", "24"))
+SINGLE_CAPACITY = int(os.getenv("KSML_SINGLE_CAPACITY", "96"))  # cost units
+SINGLE_MAX_QUEUE = int(os.getenv("KSML_SINGLE_MAX_QUEUE", "256"))
+SINGLE_MAX_WAIT = float(os.getenv("KSML_SINGLE_MAX_WAIT", "2"))  # seconds
+BATCH_MAX_CONCURRENCY = int(os.getenv("KSML_BATCH_MAX_CONCURRENCY", "8"))
+BATCH_CAPACITY = int(os.getenv("KSML_BATCH_CAPACITY", "160"))  # cost units
+BATCH_MAX_QUEUE = int(os.getenv("KSML_BATCH_MAX_QUEUE", "16"))
+BATCH_MAX_WAIT = float(os.getenv("KSML_BATCH_MAX_WAIT", "10"))  # seconds
+
+# Validation time budgets (wall-clock processing time, checked cooperatively)
+REQUEST_BUDGET_SECONDS = float(os.getenv("KSML_REQUEST_BUDGET_MS", "10000")) / 1000
+DOCUMENT_BUDGET_SECONDS = float(os.getenv("KSML_DOCUMENT_BUDGET_MS", "2000")) / 1000
+
+# Background memory sampling (interval 0 disables the sampler thread)
+MEMORY_SAMPLE_INTERVAL = float(os.getenv("KSML_MEMORY_SAMPLE_INTERVAL", "5"))  # seconds
+MEMORY_SAMPLE_HISTORY = int(os.getenv("KSML_MEMORY_SAMPLE_HISTORY", "720"))  # samples kept
+
+# Validation history (SQLite file; an empty path keeps only the last RESULT_LOG_SIZE results in memory)
+HISTORY_DB = os.getenv("KSML_HISTORY_DB", str(Path(__file__).parent / "data" / "validation_history.db"))
+HISTORY_BATCH_SIZE = int(os.getenv("KSML_HISTORY_BATCH_SIZE", "500"))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("KSML_HISTORY_FLUSH_INTERVAL", "0.5"))  # seconds
+HISTORY_QUEUE_SIZE = int(os.getenv("KSML_HISTORY_QUEUE_SIZE", "10000"))
+HISTORY_SPILL_SIZE = int(os.getenv("KSML_HISTORY_SPILL_SIZE", "100000"))
+RESULT_LOG_SIZE = int(os.getenv("KSML_RESULT_LOG_SIZE", "100000"))
+
+# Asynchronous validation jobs (JSON-lines corpora)
+JOBS_DIR = os.getenv("KSML_JOBS_DIR", str(Path(__file__).parent / "data" / "jobs"))
+JOBS_INPUT_ROOT = os.getenv("KSML_JOBS_INPUT_ROOT")  # local files jobs may read; unset disables them
+JOB_WORKERS = int(os.getenv("KSML_JOB_WORKERS", "2"))
+JOB_CHUNK_SIZE = int(os.getenv("KSML_JOB_CHUNK_SIZE", "100"))  # documents per progress commit
+JOB_MAX_UPLOAD_BYTES = int(os.getenv("KSML_JOB_MAX_UPLOAD_MB", "2048")) * 1024 * 1024
+
+# Archive (tar/zip) ingestion
+ARCHIVE_MAX_UPLOAD_BYTES = int(os.getenv("KSML_ARCHIVE_MAX_UPLOAD_MB", "100")) * 1024 * 1024
+ARCHIVE_MAX_TOTAL_BYTES = int(os.getenv("KSML_ARCHIVE_MAX_TOTAL_MB", "256")) * 1024 * 1024  # decompressed
+ARCHIVE_MAX_MEMBERS = int(os.getenv("KSML_ARCHIVE_MAX_MEMBERS", "10000"))
+ARCHIVE_PARALLELISM = int(os.getenv("KSML_ARCHIVE_PARALLELISM", "4"))  # members validated at once
+ARCHIVE_SPOOL_MEMORY = 8 * 1024 * 1024  # larger uploads spool to a temporary file
+
+# Extension namespace plugins: schema/extensions/x-*.json, plus "x-name=module:function" validators
+EXTENSION_SCHEMA_DIR = os.getenv("KSML_EXTENSION_SCHEMA_DIR", str(Path(__file__).parent.parent / "schema" / "extensions"))
+EXTENSION_PLUGINS = os.getenv("KSML_EXTENSION_PLUGINS", "")
+
+# Action catalog: per-action parameter rules from schema/actions/*.json, reloaded when the files change
+ACTION_CATALOG_DIR = os.getenv("KSML_ACTION_CATALOG_DIR", str(Path(__file__).parent.parent / "schema" / "actions"))
+ACTION_CATALOG_CHECK_SECONDS = float(os.getenv("KSML_ACTION_CATALOG_CHECK_SECONDS", "2"))
+ACTION_CATALOG_STRICT = os.getenv("KSML_ACTION_CATALOG_STRICT", "0") == "1"  # unknown actions are KSML_011
+
+# Verdicts remembered by document hash, for ETag revalidation of /validate
+VERDICT_CACHE_SIZE = int(os.getenv("KSML_VERDICT_CACHE_SIZE", "10000"))
+
 # Safety Limits
 MAX_DOCUMENT_SIZE = 1024 * 1024  # 1MB
+MAX_REQUEST_SIZE = 10 * 1024 * 1024  # 10MB, decoded body of /validate and /validate/batch
 MAX_STEPS = 100
 MAX_DEPENDENCIES = 50
 MAX_NESTING_DEPTH = 10
@@ -49,24 +106,56 @@ schema_cache = {}  # Schema caching
 # --- Logging & Metrics ---
 import logging
 import time
+from log_pipeline import configure_logging, log_extra
+from shared_metrics import SharedMetrics
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Fraction of routine success logs kept; failures are always logged
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("KSML_LOG_SUCCESS_SAMPLE_RATE", "1.0"))
+
+LOG_PIPELINE = configure_logging(level=logging.INFO, sample_rate=LOG_SUCCESS_SAMPLE_RATE)
 logger = logging.getLogger("ksml-validator")
 
-METRICS = {
-    "total_requests": 0,
-    "valid_requests": 0,
-    "invalid_requests": 0,
-    "errors": 0,
-    "rate_limited": 0,
-    "memory_usage": 0,
-    "start_time": time.time()
-}
+# Counters live in an mmap'd file shared by all workers when KSML_METRICS_FILE is set
+METRICS_FILE = os.getenv("KSML_METRICS_FILE") or None
+METRICS_SLOTS = int(os.getenv("KSML_METRICS_SLOTS", "64"))
+
+METRICS = SharedMetrics(
+    counters=[
+        "total_requests",
+        "valid_requests",
+        "invalid_requests",
+        "errors",
+        "rate_limited",
+        "coalesced_requests",
+        "batch_documents",
+        "batch_duplicates",
+        "shed_requests",
+        "budget_exceeded",
+        "oversized_bodies",
+    ],
+    gauges={
+        "memory_usage": 0,
+        "start_time": time.time()
+    },
+    path=METRICS_FILE,
+    slots=METRICS_SLOTS
+)
 
-app = FastAPI(title="KSML Validator Service", version=VERSION)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Each serving process runs its own job runners; starting them resumes jobs a previous run left behind
+    LOG_PIPELINE.start()
+    JOBS.start()
+    if HISTORY_DB:
+        HISTORY.start()
+    yield
+    JOBS.stop()
+    if HISTORY_DB:
+        # Prefork workers leave through os._exit, which skips the atexit hooks; flush here
+        HISTORY.stop()
+    LOG_PIPELINE.stop()
+
+app = FastAPI(title="KSML Validator Service", version=VERSION, lifespan=lifespan)
 
 # Add middleware
 app.add_middleware(GZipMiddleware, minimum_size=1000)  # Response compression
@@ -212,6 +301,164 @@ from jsonschema.validators import validator_for
 import json
 import re
 
+from format_checks import build_format_checker
+from step_graph import analyze_steps
+from conditions import condition_issues
+from lint_checks import ENGINE as LINT
+from extension_plugins import ExtensionRegistry
+from action_catalog import ActionCatalog
+from migration import MigrationError, migrate_v01
+from compatibility import VersionSplit
+
+validator_cache = {}  # version -> (schema, compiled validator)
+
+# v0.2 enforces the uuid / date-time / uri formats it declares; v0.1 never checked formats
+FORMAT_CHECKERS = {"0.2.0": build_format_checker()}
+
+# Indexed now, each plugin loaded and compiled the first time its namespace is used
+EXTENSIONS = ExtensionRegistry(FORMAT_CHECKERS["0.2.0"])
+EXTENSIONS.discover(EXTENSION_SCHEMA_DIR, EXTENSION_PLUGINS)
+
+def get_validator(version: str, schema: dict):
+    """Compiled validator for a schema, rebuilt only when the schema is reloaded"""
+    cached = validator_cache.get(version)
+    if cached is None or cached[0] is not schema:
+        validator_cls = validator_for(schema)
+        cached = (schema, validator_cls(schema, format_checker=FORMAT_CHECKERS.get(version)))
+        validator_cache[version] = cached
+    return cached[1]
+
+from document_diff import diff_documents
+from coalescing import SingleFlight, validation_key
+from admission import AdmissionLane, AdmissionRejected, estimate_cost
+from budget import BudgetExceeded, ValidationBudget
+from memory_monitor import MemorySampler, TracemallocSession
+from results import (ArchiveRecord, BatchRecord, CompatibilityRecord, ErrorRecord, MigrationRecord, PlanRecord,
+                     ResultRecord)
+from ksml_binary import MEDIA_TYPE as BINARY_MEDIA_TYPE, BinaryDecodeError, decode as decode_binary
+from result_log import ResultLog
+from history_store import HistoryStore
+from jobs import JobManager, JobNotFound
+from archive_ingest import ArchiveError, ArchiveTooLarge, iter_members
+from content_encoding import ENCODINGS, BodyTooLarge, EncodingError, UnsupportedEncoding, decode_body
+from canonical import canonical_hash
+from http_cache import StaticBody, VerdictCache, none_match, not_modified, parse_etags, quote_etag, unquote_etag
+from export import EXPORTERS, isoformat, parse_time
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.background import BackgroundTask
+from starlette.responses import Response, StreamingResponse
+
+if HISTORY_DB:
+    HISTORY = HistoryStore(HISTORY_DB, HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL, HISTORY_QUEUE_SIZE, HISTORY_SPILL_SIZE)
+    HISTORY.start()
+else:
+    HISTORY = ResultLog(RESULT_LOG_SIZE)
+
+VERDICTS = VerdictCache(VERDICT_CACHE_SIZE)
+# Results that say nothing about the document itself are not remembered
+TRANSIENT_CODES = ("KSML_001", "KSML_008")
+
+# Verdicts depend on the catalog: a reload forgets them
+ACTIONS = ActionCatalog(ACTION_CATALOG_DIR, ACTION_CATALOG_CHECK_SECONDS, ACTION_CATALOG_STRICT, on_reload=VERDICTS.clear)
+ACTIONS.refresh(force=True)
+if ACTIONS.last_error:
+    logger.error("Action catalog not loaded: %s", ACTIONS.last_error, extra=log_extra("actions.load_error"))
+
+# Schemas never change while running: encode and compress them once
+SCHEMA_BODIES = {
+    version: StaticBody(json.dumps(schema, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    for version, schema in (("0.1.0", SCHEMA_V01), ("0.2.0", SCHEMA_V02))
+}
+
+MEMORY_SAMPLER = MemorySampler(
+    interval=MEMORY_SAMPLE_INTERVAL,
+    capacity=MEMORY_SAMPLE_HISTORY,
+    gauges={
+        # dict.copy() is atomic under the GIL, iterating the live dict is not
+        "rate_limit_clients": lambda: len(rate_limit_storage),
+        "rate_limit_entries": lambda: sum(map(len, rate_limit_storage.copy().values())),
+        "schema_cache_entries": lambda: len(schema_cache),
+        "validator_cache_entries": lambda: len(validator_cache),
+        "history_in_memory": lambda: len(HISTORY),
+        "verdict_cache_entries": lambda: len(VERDICTS),
+    }
+)
+MEMORY_SAMPLER.start()
+TRACEMALLOC = TracemallocSession()
+
+# Identical documents validated concurrently share one computation
+VALIDATION_FLIGHT = SingleFlight()
+
+ADMISSION = {
+    "single": AdmissionLane("single", SINGLE_MAX_CONCURRENCY, SINGLE_CAPACITY, SINGLE_MAX_QUEUE, SINGLE_MAX_WAIT),
+    "batch": AdmissionLane("batch", BATCH_MAX_CONCURRENCY, BATCH_CAPACITY, BATCH_MAX_QUEUE, BATCH_MAX_WAIT),
+}
+
+def request_body_size(request: Request) -> int:
+    decoded = getattr(request.state, "body_size", None)  # set by read_payload, after Content-Encoding
+    if decoded is not None:
+        return decoded
+    content_length = request.headers.get("content-length")
+    return int(content_length) if content_length and content_length.isdigit() else 0
+
+def count_steps(document: Any) -> int:
+    steps = document.get("steps") if isinstance(document, dict) else None
+    return len(steps) if isinstance(steps, list) else 0
+
+async def body_chunks(request: Request, limit: int, too_large: str = "Request too large") -> AsyncIterator[bytes]:
+    """The body as it arrives, gzip/deflate Content-Encoding undone; 413 once it decodes past ``limit``"""
+    try:
+        async for chunk in decode_body(request.stream(), request.headers.get("content-encoding"), limit):
+            yield chunk
+    except UnsupportedEncoding as e:
+        raise HTTPException(status_code=415, detail=str(e), headers={"Accept-Encoding": ", ".join(ENCODINGS)})
+    except BodyTooLarge:
+        METRICS.inc("oversized_bodies")
+        raise HTTPException(status_code=413, detail=too_large)
+    except EncodingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def read_payload(request: Request, limit: int = MAX_REQUEST_SIZE) -> Any:
+    """Parse the request body as KSML binary or JSON, depending on Content-Type"""
+    body = b"".join([chunk async for chunk in body_chunks(request, limit)])
+    request.state.body_size = len(body)
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type == BINARY_MEDIA_TYPE:
+        try:
+            return decode_binary(body, max_size=limit)
+        except BinaryDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid KSML binary payload: {e}")
+    try:
+        return json.loads(body)
+    except json.JSONDecodeError as e:
+        # Same 422 FastAPI raises for a malformed JSON body
+        raise RequestValidationError([{
+            "type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error",
+            "input": {}, "ctx": {"error": e.msg}
+        }])
+
+def body_openapi(json_schema: dict) -> dict:
+    """Document a body read by read_payload(), which FastAPI cannot infer"""
+    return {"requestBody": {"required": True, "content": {
+        "application/json": {"schema": json_schema},
+        BINARY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    }}}
+
+def shed(rejection: AdmissionRejected):
+    """Translate an admission rejection into a fast 503"""
+    METRICS.inc("shed_requests")
+    logger.warning("Load shed on %s lane: %s", rejection.lane, rejection.reason,
+                   extra=log_extra("admission.shed", lane=rejection.lane, reason=rejection.reason))
+    raise HTTPException(
+        status_code=503,
+        detail=f"Server busy: {rejection.lane} validation lane {rejection.reason}",
+        headers={"Retry-After": str(rejection.retry_after)}
+    )
+
+def json_response(record, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Results serialize themselves; the pydantic models below only document the schema"""
+    return Response(content=record.to_json_bytes(), media_type="application/json", headers=headers)
+
 # --- Models ---
 class ValidationError(BaseModel):
     code: str
@@ -239,6 +486,10 @@ class BatchValidationResult(BaseModel):
     results: List[ValidationResult]
     summary: Dict[str, int]
 
+class DiffRequest(BaseModel):
+    old: dict
+    new: dict
+
 # --- Endpoints ---
 
 from starlette.responses import RedirectResponse
@@ -255,8 +506,10 @@ def ui():
 
 @app.get("/health")
 def health():
-    # Update memory usage
-    METRICS["memory_usage"] = psutil.Process().memory_info().rss / 1024 / 1024  # MB
+    # Update memory usage from the background sampler, measuring directly only if it is stale
+    sample = MEMORY_SAMPLER.latest(max_age=2 * MEMORY_SAMPLE_INTERVAL) or MEMORY_SAMPLER.sample()
+    METRICS["memory_usage"] = sample["rss_mb"]
+    totals = METRICS.aggregate()
     
     return {
         "status": "ok", 
@@ -264,148 +517,600 @@ def health():
         "uptime_seconds": int(time.time() - METRICS["start_time"]),
         "metrics": {k:v for k,v in METRICS.items() if k != "start_time"},
         "memory_mb": METRICS["memory_usage"],
+        "worker_pid": METRICS.pid,
+        "aggregate": totals,
+        "workers": METRICS.workers(),
+        "coalescing": {
+            "in_flight": len(VALIDATION_FLIGHT),
+            "coalesce_rate": round(totals["coalesced_requests"] / max(totals["total_requests"], 1), 4),
+            "dedup_rate": round(totals["batch_duplicates"] / max(totals["batch_documents"], 1), 4),
+        },
+        "admission": {name: lane.stats() for name, lane in ADMISSION.items()},
+        "logging": LOG_PIPELINE.stats(),
+        "history": HISTORY.stats(),
+        "jobs": JOBS.stats(),
+        "verdicts": VERDICTS.stats(),
         "auth_enabled": API_KEY is not None
     }
 
+@app.get("/metrics")
+def metrics():
+    """Counters for this worker, every worker, and the aggregate across workers"""
+    return {
+        "worker_pid": METRICS.pid,
+        "shared": METRICS_FILE is not None,
+        "worker": {k: v for k, v in METRICS.items() if k != "start_time"},
+        "aggregate": METRICS.aggregate(),
+        "workers": METRICS.workers(),
+    }
+
+@app.get("/admin/memory")
+def memory_history(limit: int = 60, _: bool = Depends(verify_api_key)):
+    """Recent RSS and cache-size samples from the background sampler"""
+    return {
+        "interval_seconds": MEMORY_SAMPLE_INTERVAL,
+        "samples": MEMORY_SAMPLER.history(limit),
+        "tracemalloc": TRACEMALLOC.status(),
+    }
+
+@app.get("/admin/lint")
+def lint_stats(reset: bool = False, _: bool = Depends(verify_api_key)):
+    """Per-rule lint calls, findings and time since start (or the last reset), most expensive first"""
+    stats = LINT.stats()
+    if reset:
+        LINT.reset_stats()
+    return {"rules": stats}
+
+@app.get("/admin/actions")
+def action_catalog_stats(reload: bool = False, _: bool = Depends(verify_api_key)):
+    """Action catalog size, reloads and last load error (``reload=true`` rereads the files now)"""
+    if reload:
+        ACTIONS.refresh(force=True)
+    return ACTIONS.stats()
+
+@app.get("/admin/extensions")
+def extension_stats(_: bool = Depends(verify_api_key)):
+    """Extension plugins by namespace: load state and time, calls, issues and validation time"""
+    return {"schema_dir": EXTENSION_SCHEMA_DIR, "plugins": EXTENSIONS.stats()}
+
+@app.post("/admin/tracemalloc/start")
+def tracemalloc_start(frames: int = 1, _: bool = Depends(verify_api_key)):
+    """Start allocation tracing (adds overhead to every allocation until stopped)"""
+    return TRACEMALLOC.start(max(1, min(frames, 25)))
+
+@app.post("/admin/tracemalloc/stop")
+def tracemalloc_stop(_: bool = Depends(verify_api_key)):
+    return TRACEMALLOC.stop()
+
+@app.get("/admin/tracemalloc/snapshot")
+def tracemalloc_snapshot(limit: int = 20, _: bool = Depends(verify_api_key)):
+    """Top allocation sites, diffed against the previous snapshot"""
+    try:
+        return TRACEMALLOC.snapshot(max(1, min(limit, 200)))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @app.get("/schema")
-def get_schema(version: str = "0.2.0"):
+def get_schema(request: Request, version: str = "0.2.0"):
     """Get schema for specified version"""
-    try:
-        if version == "0.1.0":
-            return SCHEMA_V01
-        elif version == "0.2.0":
-            return SCHEMA_V02
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported schema version: {version}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Schema loading error: {str(e)}")
+    body = SCHEMA_BODIES.get(version)
+    if body is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported schema version: {version}")
+    return body.response(request)
 
 @app.get("/schema/v0.1")
-def get_schema_v01():
+def get_schema_v01(request: Request):
     """Get v0.1 schema explicitly"""
-    return SCHEMA_V01
+    return SCHEMA_BODIES["0.1.0"].response(request)
 
 @app.get("/schema/v0.2")
-def get_schema_v02():
+def get_schema_v02(request: Request):
     """Get v0.2 schema explicitly"""
-    return SCHEMA_V02
+    return SCHEMA_BODIES["0.2.0"].response(request)
 
-@app.post("/validate", response_model=ValidationResult)
-async def validate_endpoint(request: Request, document: dict, _: bool = Depends(verify_api_key)):
+@app.post("/validate", response_model=ValidationResult, openapi_extra=body_openapi({"type": "object"}))
+async def validate_endpoint(request: Request, _: bool = Depends(verify_api_key)):
     client_ip = request.client.host
     
     # Rate limiting
     if not check_rate_limit(client_ip):
-        METRICS["rate_limited"] += 1
+        METRICS.inc("rate_limited")
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
-    # Input sanitization
+    # Revalidation: If-None-Match carries the document hash (a previous response's ETag)
+    tags = parse_etags(request.headers.get("if-none-match"))
+    tagged = {unquote_etag(tag) for tag in tags} if tags else set()
+    bodyless = request.headers.get("content-length") == "0" or (
+        "content-length" not in request.headers and "transfer-encoding" not in request.headers)
+    if tagged and bodyless:
+        # No document: the tags alone name it
+        known = VERDICTS.first_known(tagged)
+        if known is not None:
+            return not_modified(quote_etag(known))
+        raise HTTPException(status_code=412, detail="No cached verdict for this document hash; send the document")
+    
+    document = await read_payload(request)
+    if not isinstance(document, dict):
+        raise RequestValidationError([{
+            "type": "dict_type", "loc": ("body",), "msg": "Input should be a valid dictionary", "input": document
+        }])
+    
+    # Input sanitization (the 10MB request limit is enforced while reading the body)
     document = sanitize_input(document)
+    key = validation_key(document)
+    document_hash = key.rpartition(":")[2]
     
-    # Check request size (10MB limit)
-    content_length = request.headers.get("content-length")
-    if content_length and int(content_length) > 10 * 1024 * 1024:
-        raise HTTPException(status_code=413, detail="Request too large")
+    # With a document, only its own hash counts: another document's tag must not answer for it
+    if document_hash in tagged and VERDICTS.first_known([document_hash]) is not None:
+        return not_modified(quote_etag(document_hash))
+    
+    METRICS.inc("total_requests")
+    logger.info("Validation request from %s", client_ip,
+                extra=log_extra("validation.request", sampled=True, client_ip=client_ip))
+    
+    cost = estimate_cost(request_body_size(request), count_steps(document))
+    try:
+        async with ADMISSION["single"].admit(cost):
+            budget = ValidationBudget(REQUEST_BUDGET_SECONDS).child(DOCUMENT_BUDGET_SECONDS)
+            result = await coalesced_validation(document, client_ip, budget, key)
+    except AdmissionRejected as rejection:
+        shed(rejection)
     
-    METRICS["total_requests"] += 1
-    logger.info(f"Validation request from {client_ip}")
+    return json_response(result, headers={"ETag": quote_etag(document_hash)})
+
+@app.get("/validate/{document_hash}", response_model=ValidationResult)
+def get_verdict(document_hash: str, request: Request, _: bool = Depends(verify_api_key)):
+    """Cached verdict by canonical document hash (the /validate ETag), without re-sending the document"""
+    if not check_rate_limit(request.client.host):
+        METRICS.inc("rate_limited")
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    result = VERDICTS.get(document_hash)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No cached verdict for this document hash")
+    etag = quote_etag(document_hash)
+    if none_match(request, etag):
+        return not_modified(etag)
+    return json_response(result, headers={"ETag": etag})
+
+@app.post("/plan", response_model=Dict[str, Any], openapi_extra=body_openapi({"type": "object"}))
+async def plan_endpoint(request: Request, _: bool = Depends(verify_api_key)):
+    """Validate a document and return its execution plan: order, parallel stages, critical path"""
+    client_ip = request.client.host
+    if not check_rate_limit(client_ip):
+        METRICS.inc("rate_limited")
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
-    result = await validate_single_document(document, client_ip)
+    document = sanitize_input(await read_payload(request))
+    METRICS.inc("total_requests")
+    key = validation_key(document)
+    document_hash = key.rpartition(":")[2]
+    try:
+        async with ADMISSION["single"].admit(estimate_cost(request_body_size(request), count_steps(document))):
+            budget = ValidationBudget(REQUEST_BUDGET_SECONDS).child(DOCUMENT_BUDGET_SECONDS)
+            result = await coalesced_validation(document, client_ip, budget, key)
+    except AdmissionRejected as rejection:
+        shed(rejection)
     
+    plan = analyze_steps(document).plan if result.valid else None
+    record = PlanRecord(document_hash, result, plan.to_dict() if plan is not None else None)
+    return json_response(record, headers={"ETag": quote_etag(document_hash)})
+
+@app.post("/migrate", response_model=Dict[str, Any], openapi_extra=body_openapi({"type": "object"}))
+async def migrate_endpoint(request: Request, _: bool = Depends(verify_api_key)):
+    """Rewrite a v0.1 document as v0.2, listing every change, and validate the result"""
+    client_ip = request.client.host
+    if not check_rate_limit(client_ip):
+        METRICS.inc("rate_limited")
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+    document = sanitize_input(await read_payload(request))
+    METRICS.inc("total_requests")
+    try:
+        migration = migrate_v01(document)
+    except MigrationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        async with ADMISSION["single"].admit(estimate_cost(request_body_size(request), count_steps(migration.document))):
+            budget = ValidationBudget(REQUEST_BUDGET_SECONDS).child(DOCUMENT_BUDGET_SECONDS)
+            result = await coalesced_validation(migration.document, client_ip, budget)
+    except AdmissionRejected as rejection:
+        shed(rejection)
+    return json_response(MigrationRecord(migration.document, migration.changes, result))
+
+async def coalesced_validation(document: dict, client_ip: str, budget: Optional[ValidationBudget] = None,
+                               key: Optional[str] = None) -> ResultRecord:
+    """Validate off the event loop, sharing the work with identical in-flight requests"""
+    started = time.perf_counter()
+    key = key or validation_key(document)
+    result, shared = await VALIDATION_FLIGHT.do(
+        key,
+        lambda: run_in_threadpool(validate_single_document, document, client_ip, budget)
+    )
+    if shared:
+        METRICS.inc("coalesced_requests")
+    document_hash = key.rpartition(":")[2]
+    HISTORY.record(document, document_hash, result, (time.perf_counter() - started) * 1000)
+    if not any(e.code in TRANSIENT_CODES for e in result.errors):
+        VERDICTS.put(document_hash, result)
     return result
 
-@app.post("/validate/batch", response_model=BatchValidationResult)
-async def batch_validate_endpoint(request: Request, batch_request: BatchValidationRequest, _: bool = Depends(verify_api_key)):
+@app.post("/validate/batch", response_model=BatchValidationResult,
+          openapi_extra=body_openapi(BatchValidationRequest.model_json_schema()))
+async def batch_validate_endpoint(request: Request, _: bool = Depends(verify_api_key)):
     client_ip = request.client.host
     
     # Rate limiting (stricter for batch)
     if not check_rate_limit(client_ip):
-        METRICS["rate_limited"] += 1
+        METRICS.inc("rate_limited")
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
-    results = []
+    try:
+        batch_request = BatchValidationRequest.model_validate(await read_payload(request))
+    except PydanticValidationError as e:
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)
+        ])
+    
+    cost = estimate_cost(
+        request_body_size(request),
+        sum(count_steps(doc) for doc in batch_request.documents),
+        documents=len(batch_request.documents)
+    )
+    try:
+        async with ADMISSION["batch"].admit(cost):
+            return json_response(await validate_batch(batch_request, client_ip))
+    except AdmissionRejected as rejection:
+        shed(rejection)
+
+async def validate_batch(batch_request: BatchValidationRequest, client_ip: str) -> BatchRecord:
+    results = [None] * len(batch_request.documents)
     summary = {"valid": 0, "invalid": 0, "errors": 0}
+    request_budget = ValidationBudget(REQUEST_BUDGET_SECONDS)
     
-    for doc in batch_request.documents:
+    # Duplicate documents are validated once and fanned out to every position
+    positions_by_key = {}
+    for i, doc in enumerate(batch_request.documents):
+        try:
+            key = validation_key(doc)
+        except Exception:
+            key = i  # validated alone; the failure is reported in its own slot below
+        positions_by_key.setdefault(key, []).append(i)
+    
+    METRICS.inc("batch_documents", len(results))
+    METRICS.inc("batch_duplicates", len(results) - len(positions_by_key))
+    
+    for positions in positions_by_key.values():
+        failed = False
         try:
             # Reuse validation logic
-            doc = sanitize_input(doc)
-            result = await validate_single_document(doc, client_ip)
-            results.append(result)
-            
-            if result.valid:
-                summary["valid"] += 1
-            else:
-                summary["invalid"] += 1
+            doc = sanitize_input(batch_request.documents[positions[0]])
+            result = await coalesced_validation(doc, client_ip, request_budget.child(DOCUMENT_BUDGET_SECONDS))
         except Exception as e:
-            summary["errors"] += 1
-            results.append(ValidationResult(
+            failed = True
+            result = ResultRecord(
                 valid=False,
                 ksml_version="unknown",
-                errors=[ValidationError(code="KSML_001", message=str(e), path="root", severity="ERROR")],
+                errors=[ErrorRecord(code="KSML_001", message=str(e), path="root", severity="ERROR")],
                 warnings=[]
-            ))
+            )
+        
+        for i in positions:
+            results[i] = result
+            if failed:
+                summary["errors"] += 1
+            elif result.valid:
+                summary["valid"] += 1
+            else:
+                summary["invalid"] += 1
     
-    return BatchValidationResult(results=results, summary=summary)
+    return BatchRecord(results, summary)
+
+def diff_checked(old: Any, new: Any) -> dict:
+    """Sanitize, depth-check and diff two documents; CPU-bound, so run in the threadpool"""
+    old_doc = sanitize_input(old)
+    new_doc = sanitize_input(new)
+
+    # Tree hashing recurses per level, so refuse what the safety layer would refuse
+    if not check_nesting_depth(old_doc) or not check_nesting_depth(new_doc):
+        raise HTTPException(status_code=413, detail=f"Nesting depth exceeds {MAX_NESTING_DEPTH}")
+
+    return diff_documents(old_doc, new_doc)
+
+@app.post("/diff")
+async def diff_endpoint(request: Request, diff_request: DiffRequest, _: bool = Depends(verify_api_key)):
+    """Step-aware structural diff between two KSML documents"""
+    client_ip = request.client.host
+
+    if not check_rate_limit(client_ip):
+        METRICS.inc("rate_limited")
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+    # Merkle hashing of two large documents would otherwise stall the event loop
+    return await run_in_threadpool(diff_checked, diff_request.old, diff_request.new)
 
 @app.get("/export/{format}")
-async def export_results(format: str, results: str = ""):
-    """Export validation results in different formats"""
-    if format not in ["json", "csv", "xml"]:
+async def export_results(format: str, since: Optional[str] = None, until: Optional[str] = None,
+                         code: Optional[str] = None, document_id: Optional[str] = None,
+                         limit: Optional[int] = None, _: bool = Depends(verify_api_key)):
+    """Stream stored validation results as JSON lines, CSV or XML"""
+    if format not in EXPORTERS:
         raise HTTPException(status_code=400, detail="Unsupported format")
+    try:
+        since_ts, until_ts = parse_time(since), parse_time(until)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since/until must be epoch seconds or ISO 8601")
     
-    # Basic export functionality
-    if format == "csv":
-        return {"content": "code,message,path,severity\n", "media_type": "text/csv"}
-    elif format == "xml":
-        return {"content": "<?xml version='1.0'?><results></results>", "media_type": "application/xml"}
-    else:
-        return {"content": "{}", "media_type": "application/json"}
+    serializer, media_type, extension = EXPORTERS[format]
+    rows = HISTORY.scan(since=since_ts, until=until_ts, code=code, document_id=document_id, limit=limit)
+    return StreamingResponse(
+        serializer(rows),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="ksml_results.{extension}"'}
+    )
+
+def history_response(rows) -> dict:
+    results = [{**row, "ts": isoformat(row["ts"])} for row in rows]
+    return {"count": len(results), "results": results}
+
+@app.get("/history/documents/{document_id}")
+def history_by_document(document_id: str, limit: int = Query(100, ge=1, le=1000), _: bool = Depends(verify_api_key)):
+    """Most recent validations of the document with this metadata.id"""
+    return history_response(HISTORY.scan(document_id=document_id, limit=limit, newest_first=True))
+
+@app.get("/history/authors/{author}")
+def history_by_author(author: str, limit: int = Query(100, ge=1, le=1000), _: bool = Depends(verify_api_key)):
+    """Most recent validations of documents by this metadata.author"""
+    return history_response(HISTORY.scan(author=author, limit=limit, newest_first=True))
+
+@app.get("/history/errors/{code}")
+def history_by_error(code: str, limit: int = Query(100, ge=1, le=1000), _: bool = Depends(verify_api_key)):
+    """Most recent validations that reported this error code"""
+    return history_response(HISTORY.scan(code=code, limit=limit, newest_first=True))
+
+# --- Validation jobs ---
+def validate_raw_document(raw: bytes, client_ip: str = "jobs") -> ResultRecord:
+    """Parse and validate one serialized document (job lines, archive members), off the event loop"""
+    started = time.perf_counter()
+    try:
+        document = sanitize_input(json.loads(raw))
+    except (ValueError, HTTPException) as e:
+        return ResultRecord(
+            valid=False,
+            ksml_version="unknown",
+            errors=[ErrorRecord(code="KSML_001", message=getattr(e, "detail", str(e)), path="root", severity="ERROR")],
+            warnings=[]
+        )
+    try:
+        result = validate_single_document(document, client_ip)
+        result.to_json_bytes()  # callers store the bytes; fail here, on this line, if they cannot be produced
+        HISTORY.record(document, canonical_hash(document), result, (time.perf_counter() - started) * 1000)
+    except Exception as e:
+        # One line must not fail the job or archive it belongs to
+        METRICS.inc("errors")
+        logger.error("Validation of a serialized document failed: %s", type(e).__name__, exc_info=True,
+                     extra=log_extra("validation.internal_error", client_ip=client_ip))
+        return internal_error_result(e)
+    return result
+
+def migrate_raw_document(raw: bytes, client_ip: str = "migrate") -> MigrationRecord:
+    """Parse one serialized v0.1 document, rewrite it as v0.2 and validate the rewrite (bulk migration)"""
+    try:
+        migration = migrate_v01(sanitize_input(json.loads(raw)))
+    except (ValueError, HTTPException) as e:
+        error = ErrorRecord(code="KSML_001", message=getattr(e, "detail", str(e)), path="root", severity="ERROR")
+        return MigrationRecord(None, [], ResultRecord(valid=False, ksml_version="unknown", errors=[error], warnings=[]))
+    return MigrationRecord(migration.document, migration.changes, validate_single_document(migration.document, client_ip))
+
+JOBS = JobManager(JOBS_DIR, validate_raw_document, JOB_WORKERS, JOB_CHUNK_SIZE, JOBS_INPUT_ROOT)
+
+def job_or_404(fn, *args):
+    try:
+        return fn(*args)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: Request, _: bool = Depends(verify_api_key)):
+    """Queue a JSON-lines corpus: upload it as the body, or send {"path": ...} for a local file"""
+    client_ip = request.client.host
+    if not check_rate_limit(client_ip):
+        METRICS.inc("rate_limited")
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    JOBS.start()
+
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type == "application/json":
+        reference = await read_payload(request)
+        path = reference.get("path") if isinstance(reference, dict) else None
+        if not isinstance(path, str):
+            raise HTTPException(status_code=400, detail='Expected {"path": "<file under the jobs input root>"}')
+        try:
+            resolved = JOBS.resolve_input(path)
+        except PermissionError as e:
+            raise HTTPException(status_code=403, detail=str(e))
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Input file not found")
+        return await run_in_threadpool(JOBS.submit, JOBS.new_id(), "file", resolved)
+
+    # Spool the upload to disk as it arrives; the corpus never sits in memory
+    job_id = JOBS.new_id()
+    path = JOBS.upload_path(job_id)
+    size = lines = 0
+    last = b"\n"
+    try:
+        with open(path, "wb") as f:
+            async for chunk in body_chunks(request, JOB_MAX_UPLOAD_BYTES, "Job upload too large"):
+                size += len(chunk)
+                f.write(chunk)
+                lines += chunk.count(b"\n")
+                last = chunk[-1:]
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty job upload")
+    except BaseException:
+        os.unlink(path)
+        raise
+    return await run_in_threadpool(JOBS.submit, job_id, "upload", path, lines + (last != b"\n"))
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, _: bool = Depends(verify_api_key)):
+    """Status, progress and throughput of a job"""
+    return job_or_404(JOBS.get, job_id)
+
+@app.get("/jobs/{job_id}/results")
+def get_job_results(job_id: str, cursor: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                    _: bool = Depends(verify_api_key)):
+    """A page of per-document results; pass next_cursor back to get the next page"""
+    page, next_cursor = job_or_404(JOBS.results, job_id, cursor, limit)
+    items = ",".join(f'{{"index":{seq},"line":{line},"result":{result}}}' for seq, line, result in page)
+    body = f'{{"job_id":{json.dumps(job_id)},"results":[{items}],"next_cursor":{json.dumps(next_cursor)}}}'
+    return Response(content=body.encode("utf-8"), media_type="application/json")
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str, _: bool = Depends(verify_api_key)):
+    return job_or_404(JOBS.cancel, job_id)
+
+# --- Archive ingestion ---
+def internal_error_result(e: Exception) -> ResultRecord:
+    """KSML_001 for a document whose validation raised; only the exception type, which cannot quote the input"""
+    sev, template = get_rule("KSML_001")
+    return ResultRecord(
+        valid=False,
+        ksml_version="unknown",
+        errors=[ErrorRecord(code="KSML_001", message=template.format(details=type(e).__name__), path="root",
+                            severity=sev)],
+        warnings=[]
+    )
+
+def member_error(message: str) -> ResultRecord:
+    sev, template = get_rule_v2("KSML_004")
+    return ResultRecord(
+        valid=False,
+        ksml_version="unknown",
+        errors=[ErrorRecord(code="KSML_004", message=template.format(details=message), path="root", severity=sev)],
+        warnings=[]
+    )
+
+async def validate_archive(fileobj, client_ip: str) -> ArchiveRecord:
+    """Validate archive members as they are decompressed, ARCHIVE_PARALLELISM at a time"""
+    results = {}
+    seen, duplicates = set(), set()
+    summary = {"valid": 0, "invalid": 0, "documents": 0}
+    slots = asyncio.Semaphore(ARCHIVE_PARALLELISM)
+    tasks = set()
+
+    async def validate_member(path: str, data: bytes):
+        try:
+            results[path] = await run_in_threadpool(validate_raw_document, data, client_ip)
+        except Exception as e:
+            # Counted in summary.documents already: the member must keep a result
+            METRICS.inc("errors")
+            logger.error("Archive member %s failed: %s", path, type(e).__name__, exc_info=True,
+                         extra=log_extra("archive.member_error"))
+            results[path] = internal_error_result(e)
+        finally:
+            slots.release()
+
+    members = iter_members(fileobj, MAX_DOCUMENT_SIZE, ARCHIVE_MAX_TOTAL_BYTES, ARCHIVE_MAX_MEMBERS)
+    try:
+        async for member in iterate_in_threadpool(members):
+            if member.path in seen:
+                # Results are keyed by path: a second member there would silently replace the first
+                duplicates.add(member.path)
+                continue
+            seen.add(member.path)
+            summary["documents"] += 1
+            if member.error is not None:
+                results[member.path] = member_error(member.error)
+                continue
+            # Backpressure: never decompress further ahead than the validators can take
+            await slots.acquire()
+            task = asyncio.ensure_future(validate_member(member.path, member.data))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    for path in duplicates:
+        results[path] = member_error("More than one archive member has this path")
+    for result in results.values():
+        summary["valid" if result.valid else "invalid"] += 1
+    return ArchiveRecord(results, summary)
+
+@app.post("/validate/archive", response_model=Dict[str, Any])
+async def validate_archive_endpoint(request: Request, _: bool = Depends(verify_api_key)):
+    """Validate every *.json member of a tar(.gz/.bz2/.xz) or zip upload, keyed by archive path"""
+    client_ip = request.client.host
+    if not check_rate_limit(client_ip):
+        METRICS.inc("rate_limited")
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+    with tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_MEMORY) as spool:
+        size = 0
+        async for chunk in body_chunks(request, ARCHIVE_MAX_UPLOAD_BYTES, "Archive upload too large"):
+            size += len(chunk)
+            spool.write(chunk)
+        spool.seek(0)
+
+        METRICS.inc("total_requests")
+        try:
+            async with ADMISSION["batch"].admit(estimate_cost(size, 0)):
+                return json_response(await validate_archive(spool, client_ip))
+        except AdmissionRejected as rejection:
+            shed(rejection)
+        except ArchiveTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ArchiveError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
 # --- Safety Check Logic ---
-def check_nesting_depth(obj: Any, current_depth: int = 0) -> bool:
+def check_nesting_depth(obj: Any, current_depth: int = 0, budget: Optional[ValidationBudget] = None) -> bool:
     if current_depth > MAX_NESTING_DEPTH:
         return False
+    if budget is not None:
+        budget.tick()
     
     if isinstance(obj, dict):
-        return all(check_nesting_depth(v, current_depth + 1) for v in obj.values())
+        return all(check_nesting_depth(v, current_depth + 1, budget) for v in obj.values())
     elif isinstance(obj, list):
-        return all(check_nesting_depth(item, current_depth + 1) for item in obj)
+        return all(check_nesting_depth(item, current_depth + 1, budget) for item in obj)
     
     return True
 
-def recursive_item_check(obj: Any, errors: List[ValidationError], path: str):
+def recursive_item_check(obj: Any, errors: List[ErrorRecord], path: str, budget: Optional[ValidationBudget] = None):
     """Check for string length, array size, object keys"""
+    if budget is not None:
+        budget.tick()
     if isinstance(obj, str):
         if len(obj) > MAX_STRING_LENGTH:
-            errors.append(ValidationError(
+            errors.append(ErrorRecord(
                 code="KSML_004", 
                 message=f"Safety limit exceeded: String length {len(obj)} exceeds {MAX_STRING_LENGTH}", 
                 path=path, severity="ERROR"))
     elif isinstance(obj, list):
         if len(obj) > MAX_ARRAY_SIZE:
-             errors.append(ValidationError(
+             errors.append(ErrorRecord(
                 code="KSML_004", 
                 message=f"Safety limit exceeded: Array size {len(obj)} exceeds {MAX_ARRAY_SIZE}", 
                 path=path, severity="ERROR"))
         for i, item in enumerate(obj):
-             recursive_item_check(item, errors, f"{path}[{i}]")
+             recursive_item_check(item, errors, f"{path}[{i}]", budget)
     elif isinstance(obj, dict):
         if len(obj) > MAX_OBJECT_KEYS:
-             errors.append(ValidationError(
+             errors.append(ErrorRecord(
                 code="KSML_004", 
                 message=f"Safety limit exceeded: Object keys {len(obj)} exceeds {MAX_OBJECT_KEYS}", 
                 path=path, severity="ERROR"))
         for k, v in obj.items():
-             recursive_item_check(v, errors, f"{path}.{k}")
+             recursive_item_check(v, errors, f"{path}.{k}", budget)
 
-def check_suspicious_patterns(document: dict) -> List[ValidationError]:
+def check_suspicious_patterns(document: dict) -> List[ErrorRecord]:
     errors = []
     doc_str = json.dumps(document)
     
     for pattern in SUSPICIOUS_PATTERNS:
         if re.search(pattern, doc_str, re.IGNORECASE):
-            errors.append(ValidationError(
+            errors.append(ErrorRecord(
                 code="KSML_004",
                 message="Safety limit exceeded: Suspicious pattern detected",
                 path="root",
@@ -414,7 +1119,7 @@ def check_suspicious_patterns(document: dict) -> List[ValidationError]:
             break
     return errors
 
-def perform_safety_checks(document: dict) -> List[ValidationError]:
+def perform_safety_checks(document: dict, budget: Optional[ValidationBudget] = None) -> List[ErrorRecord]:
     """Perform v0.2 consumer safety checks"""
     errors = []
     
@@ -422,7 +1127,7 @@ def perform_safety_checks(document: dict) -> List[ValidationError]:
     # 2. Step Count
     steps = document.get("steps", [])
     if isinstance(steps, list) and len(steps) > MAX_STEPS:
-        errors.append(ValidationError(
+        errors.append(ErrorRecord(
             code="KSML_004",
             message=f"Safety limit exceeded: More than {MAX_STEPS} steps not allowed",
             path="steps",
@@ -432,7 +1137,7 @@ def perform_safety_checks(document: dict) -> List[ValidationError]:
     # 3. Extensions Type
     extensions = document.get("extensions", {})
     if extensions and not isinstance(extensions, dict):
-        errors.append(ValidationError(
+        errors.append(ErrorRecord(
             code="KSML_005",
             message="Invalid extension configuration: Extensions must be an object",
             path="extensions",
@@ -444,7 +1149,7 @@ def perform_safety_checks(document: dict) -> List[ValidationError]:
     if isinstance(metadata, dict):
         dependencies = metadata.get("dependencies", [])
         if isinstance(dependencies, list) and len(dependencies) > MAX_DEPENDENCIES:
-            errors.append(ValidationError(
+            errors.append(ErrorRecord(
                  code="KSML_006",
                  message=f"Malformed dependency specification: Too many dependencies ({len(dependencies)}). Max {MAX_DEPENDENCIES}",
                  path="metadata.dependencies",
@@ -452,8 +1157,8 @@ def perform_safety_checks(document: dict) -> List[ValidationError]:
             ))
 
     # 5. Nesting Depth
-    if not check_nesting_depth(document):
-         errors.append(ValidationError(
+    if not check_nesting_depth(document, budget=budget):
+         errors.append(ErrorRecord(
              code="KSML_004",
              message=f"Safety limit exceeded: Nesting depth exceeds {MAX_NESTING_DEPTH}",
              path="root",
@@ -462,14 +1167,122 @@ def perform_safety_checks(document: dict) -> List[ValidationError]:
 
     # 6. Suspicious Patterns
     errors.extend(check_suspicious_patterns(document))
+    if budget is not None:
+        budget.check()
 
     # 7. Resource Usage (Strings/Arrays/Keys)
-    recursive_item_check(document, errors, "root")
+    recursive_item_check(document, errors, "root", budget)
 
     return errors
 
-async def validate_single_document(document: dict, client_ip: str = "unknown") -> ValidationResult:
-    """Unified validation logic"""
+def map_schema_error(err, doc_ver: str) -> ErrorRecord:
+    """A jsonschema error as the KSML error the given version reports for it"""
+    path = ".".join([str(p) for p in err.path]) or "root"
+    code = "KSML_100"
+    
+    # Default details
+    details = err.message
+    
+    if err.validator == "required": 
+        code = "KSML_101"
+        match = re.search(r"'(.+?)' is a required property", err.message)
+        details = match.group(1) if match else err.message
+
+    elif err.validator == "type": 
+        code = "KSML_102"
+        details = err.message 
+
+    elif err.validator == "additionalProperties": 
+        code = "KSML_103"
+        match = re.search(r"\('(.+?)' was unexpected\)", err.message)
+        details = match.group(1) if match else "unknown"
+    
+    elif err.validator == "format":
+        # A dependency's source is part of the dependency specification
+        in_dependency = len(err.path) >= 3 and err.path[-3] == "dependencies"
+        code = "KSML_006" if in_dependency else "KSML_100"
+    
+    # Use appropriate rule getter based on version
+    if doc_ver == "0.2.0":
+        sev, template = get_rule_v2(code)
+    else:
+        sev, template = get_rule(code)
+    
+    # Simple formatting logic
+    if code == "KSML_101" or code == "KSML_103":
+        final_msg = template.format(field=details)
+    elif code in ("KSML_100", "KSML_006"):
+         final_msg = template.format(details=err.message)
+    else:
+         final_msg = f"{template} [{err.message}]"
+    
+    return ErrorRecord(code=code, message=final_msg, path=path, severity=sev)
+
+def semantic_errors(document: dict, budget: ValidationBudget) -> List[ErrorRecord]:
+    """The v0.2 checks beyond the schema"""
+    errors = []
+
+    # Step graph: duplicate ids, unknown depends_on references, cycles
+    budget.enter("step graph")
+    sev, template = get_rule_v2("KSML_009")
+    for issue in analyze_steps(document).issues:
+        errors.append(ErrorRecord(code="KSML_009", message=template.format(details=issue.details),
+                                  path=issue.path, severity=sev))
+
+    # Condition expressions: run_if / skip_if must parse
+    budget.enter("conditions")
+    sev, template = get_rule_v2("KSML_010")
+    for issue in condition_issues(document):
+        errors.append(ErrorRecord(code="KSML_010", message=template.format(details=issue.details),
+                                  path=issue.path, severity=sev))
+
+    # Action parameters: the catalog entry of each step's action
+    if isinstance(document.get("steps"), list):
+        budget.enter("action catalog")
+        sev, template = get_rule_v2("KSML_011")
+        for issue in ACTIONS.validate_steps(document["steps"]):
+            errors.append(ErrorRecord(code="KSML_011", message=template.format(details=issue.details),
+                                      path=issue.path, severity=sev))
+
+    # Extension plugins: namespaces with a registered sub-schema or validator
+    extensions = document.get("extensions")
+    if isinstance(extensions, dict):
+        budget.enter("extension plugins")
+        sev, template = get_rule_v2("KSML_005")
+        for issue in EXTENSIONS.validate(extensions):
+            if issue.failed:
+                METRICS.inc("errors")
+                logger.error("%s", issue.details, extra=log_extra("validation.extension_plugin_error"))
+                failed_sev, failed_template = get_rule("KSML_001")
+                errors.append(ErrorRecord(code="KSML_001", message=failed_template.format(details=issue.details),
+                                          path=issue.path, severity=failed_sev))
+            else:
+                errors.append(ErrorRecord(code="KSML_005", message=template.format(details=issue.details),
+                                          path=issue.path, severity=sev))
+
+    return errors
+
+def budget_exceeded_result(e: BudgetExceeded, ksml_version: str, client_ip: str) -> ResultRecord:
+    METRICS.inc("budget_exceeded")
+    logger.warning("Validation budget exceeded during %s for %s", e.stage, client_ip,
+                   extra=log_extra("validation.budget_exceeded", stage=e.stage, client_ip=client_ip))
+    sev, template = get_rule_v2("KSML_008")
+    return ResultRecord(
+        valid=False,
+        ksml_version=ksml_version,
+        errors=[ErrorRecord(
+            code="KSML_008",
+            message=template.format(details=f"stopped during {e.stage} after {e.elapsed * 1000:.0f}ms (limit {e.limit * 1000:.0f}ms)"),
+            path="root",
+            severity=sev
+        )],
+        warnings=[]
+    )
+
+def validate_single_document(document: dict, client_ip: str = "unknown", budget: Optional[ValidationBudget] = None) -> ResultRecord:
+    """Unified validation logic (CPU-bound; endpoints run it in the threadpool)"""
+    if budget is None:
+        budget = ValidationBudget(DOCUMENT_BUDGET_SECONDS)
     try:
         # 1. Version Check
         doc_ver = document.get("ksml_version")
@@ -477,12 +1290,13 @@ async def validate_single_document(document: dict, client_ip: str = "unknown") -
         
         if not version_valid:
             sev, msg_template = get_rule("KSML_003")
-            METRICS["invalid_requests"] += 1
-            if client_ip: logger.warning(f"Version validation failed for {client_ip}: {version_message}")
-            return ValidationResult(
+            METRICS.inc("invalid_requests")
+            if client_ip: logger.warning("Version validation failed for %s: %s", client_ip, version_message,
+                                         extra=log_extra("validation.version_rejected", client_ip=client_ip))
+            return ResultRecord(
                 valid=False, 
                 ksml_version=str(doc_ver) if doc_ver is not None else "missing", 
-                errors=[ValidationError(
+                errors=[ErrorRecord(
                     code="KSML_003", 
                     message=version_message, 
                     path="ksml_version", 
@@ -496,12 +1310,12 @@ async def validate_single_document(document: dict, client_ip: str = "unknown") -
             schema = get_schema_for_version(doc_ver)
         except ValueError as e:
             sev, msg_template = get_rule("KSML_001")
-            METRICS["errors"] += 1
-            logger.error(f"Schema loading error: {e}")
-            return ValidationResult(
+            METRICS.inc("errors")
+            logger.error("Schema loading error: %s", e, extra=log_extra("validation.schema_error"))
+            return ResultRecord(
                 valid=False,
                 ksml_version=str(doc_ver),
-                errors=[ValidationError(
+                errors=[ErrorRecord(
                     code="KSML_001",
                     message=f"Internal System Error: {str(e)}",
                     path="root",
@@ -514,13 +1328,14 @@ async def validate_single_document(document: dict, client_ip: str = "unknown") -
 
         # 3. Consumer Safety Checks
         if doc_ver == "0.2.0":
-            safety_errors = perform_safety_checks(document)
+            budget.enter("safety checks")
+            safety_errors = perform_safety_checks(document, budget)
             errors.extend(safety_errors)
 
         # 4. Refusal if safety errors
         if errors:
-            METRICS["invalid_requests"] += 1
-            return ValidationResult(
+            METRICS.inc("invalid_requests")
+            return ResultRecord(
                 valid=False,
                 ksml_version=doc_ver,
                 errors=errors,
@@ -528,65 +1343,207 @@ async def validate_single_document(document: dict, client_ip: str = "unknown") -
             )
 
         # 5. Schema Validation
-        validator_cls = validator_for(schema)
-        validator = validator_cls(schema)
+        validator = get_validator(doc_ver, schema)
         
-        raw_errors_iter = list(validator.iter_errors(document))
+        budget.enter("schema validation")
+        raw_errors_iter = []
+        for err in validator.iter_errors(document):
+            budget.tick()
+            raw_errors_iter.append(err)
         raw_errors = sorted(raw_errors_iter, key=lambda e: (str(e.path), e.message))
         
+        budget.enter("error mapping")
         for err in raw_errors:
-            path = ".".join([str(p) for p in err.path]) or "root"
-            code = "KSML_100"
-            
-            # Default details
-            details = err.message
-            
-            if err.validator == "required": 
-                code = "KSML_101"
-                match = re.search(r"'(.+?)' is a required property", err.message)
-                details = match.group(1) if match else err.message
-    
-            elif err.validator == "type": 
-                code = "KSML_102"
-                details = err.message 
-    
-            elif err.validator == "additionalProperties": 
-                code = "KSML_103"
-                match = re.search(r"\('(.+?)' was unexpected\)", err.message)
-                details = match.group(1) if match else "unknown"
-            
-            # Use appropriate rule getter based on version
-            if doc_ver == "0.2.0":
-                sev, template = get_rule_v2(code)
-            else:
-                sev, template = get_rule(code)
-            
-            # Simple formatting logic
-            if code == "KSML_101" or code == "KSML_103":
-                final_msg = template.format(field=details)
-            elif code == "KSML_100":
-                 final_msg = template.format(details=err.message)
-            else:
-                 final_msg = f"{template} [{err.message}]"
-            
-            errors.append(ValidationError(code=code, message=final_msg, path=path, severity=sev))
+            budget.tick()
+            errors.append(map_schema_error(err, doc_ver))
+
+        # 6-9. Step graph, conditions, action parameters, extension plugins (v0.2)
+        if doc_ver == "0.2.0":
+            errors.extend(semantic_errors(document, budget))
+
+        # 10. Lint warnings (deprecations, suspicious constructs): one walk, rules dispatched by node kind
+        budget.enter("lint")
+        warnings = [str(finding) for finding in LINT.lint(document, doc_ver)]
             
         is_valid = len(errors) == 0
         if is_valid:
-            METRICS["valid_requests"] += 1
-            logger.info(f"Validation success for version {doc_ver}")
+            METRICS.inc("valid_requests")
+            logger.info("Validation success for version %s", doc_ver,
+                        extra=log_extra("validation.success", sampled=True, ksml_version=doc_ver))
         else:
-            METRICS["invalid_requests"] += 1
-            logger.info(f"Validation failed with {len(errors)} errors for version {doc_ver}")
+            METRICS.inc("invalid_requests")
+            logger.info("Validation failed with %d errors for version %s", len(errors), doc_ver,
+                        extra=log_extra("validation.failure", ksml_version=doc_ver, error_count=len(errors),
+                                        error_codes=sorted({e.code for e in errors})))
             
-        return ValidationResult(
+        return ResultRecord(
             valid=is_valid,
             ksml_version=doc_ver,
             errors=errors,
-            warnings=[]
+            warnings=warnings
         )
 
+    except BudgetExceeded as e:
+        METRICS.inc("invalid_requests")
+        return budget_exceeded_result(e, str(document.get("ksml_version")), client_ip)
+
     except Exception as e:
-        METRICS["errors"] += 1
-        logger.error(f"Internal Validator Error: {e}", exc_info=True)
+        METRICS.inc("errors")
+        logger.error("Internal Validator Error: %s", e, exc_info=True, extra=log_extra("validation.internal_error"))
         raise HTTPException(status_code=500, detail="Internal System Error: KSML_001")
+
+# --- Compatibility report ---
+# v0.1 verdicts are derived from the v0.2 schema pass (see compatibility.py)
+VERSION_SPLIT = VersionSplit(SCHEMA_V01, SCHEMA_V02)
+COMPATIBILITY_VERSIONS = {"v0.1": "0.1.0", "v0.2": "0.2.0", "v0.2-safety": "0.2.0"}
+COMPATIBILITY_REUSE_LINES = 1024  # distinct lines of a /compatibility/batch whose report is kept for repeats
+
+def compatibility_report(document: dict, client_ip: str = "compatibility",
+                         budget: Optional[ValidationBudget] = None) -> CompatibilityRecord:
+    """Verdicts under v0.1, v0.2 and the v0.2 safety layer, from one schema pass and one safety walk
+
+    The declared ksml_version does not matter: each verdict is the one /validate
+    gives the document tagged with that version, warnings aside.
+    """
+    if budget is None:
+        budget = ValidationBudget(DOCUMENT_BUDGET_SECONDS)
+    declared = document.get("ksml_version")
+    subject = {**document, "ksml_version": "0.2.0"}
+    try:
+        document_hash = canonical_hash(document)
+        budget.enter("safety checks")
+        safety_errors = perform_safety_checks(subject, budget)
+
+        budget.enter("schema validation")
+        raw_errors = []
+        for err in get_validator("0.2.0", get_schema_for_version("0.2.0")).iter_errors(subject):
+            budget.tick()
+            raw_errors.append(err)
+        raw_errors.sort(key=lambda e: (str(e.path), e.message))
+
+        budget.enter("error mapping")
+        v01_errors = [map_schema_error(err, "0.1.0") for err in raw_errors if VERSION_SPLIT.applies_to_v01(err)]
+        sev, template = get_rule("KSML_103")
+        for path, field in VERSION_SPLIT.added_in_use(subject):
+            v01_errors.append(ErrorRecord(code="KSML_103", message=template.format(field=field),
+                                          path=".".join(str(p) for p in (*path, field)), severity=sev))
+        if safety_errors:
+            v02_errors = safety_errors  # refused before schema validation, as /validate does
+        else:
+            v02_errors = [map_schema_error(err, "0.2.0") for err in raw_errors] + semantic_errors(subject, budget)
+
+        budget.enter("lint")
+        verdicts = {
+            "v0.1": ResultRecord(not v01_errors, "0.1.0", v01_errors,
+                                 [str(finding) for finding in LINT.lint(subject, "0.1.0")]),
+            "v0.2": ResultRecord(not v02_errors, "0.2.0", v02_errors,
+                                 [str(finding) for finding in LINT.lint(subject, "0.2.0")] if not safety_errors else []),
+            "v0.2-safety": ResultRecord(not safety_errors, "0.2.0", safety_errors, []),
+        }
+    except BudgetExceeded as e:
+        result = budget_exceeded_result(e, "0.2.0", client_ip)
+        verdicts = {name: result if version == "0.2.0" else ResultRecord(False, version, result.errors, [])
+                    for name, version in COMPATIBILITY_VERSIONS.items()}
+    except Exception as e:
+        METRICS.inc("errors")
+        logger.error("Internal Validator Error: %s", e, exc_info=True, extra=log_extra("validation.internal_error"))
+        raise HTTPException(status_code=500, detail="Internal System Error: KSML_001")
+
+    return CompatibilityRecord(document_hash, str(declared) if declared is not None else "missing", verdicts)
+
+def compatibility_failure(message: str) -> CompatibilityRecord:
+    """A KSML_001 report under every version, for a line that could not be reported on"""
+    error = ErrorRecord(code="KSML_001", message=message, path="root", severity="ERROR")
+    return CompatibilityRecord(None, "unknown", {
+        name: ResultRecord(valid=False, ksml_version=version, errors=[error], warnings=[])
+        for name, version in COMPATIBILITY_VERSIONS.items()
+    })
+
+def compatibility_raw_document(raw: bytes, client_ip: str = "compatibility",
+                               budget: Optional[ValidationBudget] = None) -> CompatibilityRecord:
+    """Parse one serialized document and report it (JSON Lines batches, corpus reports)"""
+    try:
+        document = sanitize_input(json.loads(raw))
+        if not isinstance(document, dict):
+            raise ValueError("Document must be a JSON object")
+    except (ValueError, HTTPException) as e:
+        return compatibility_failure(getattr(e, "detail", str(e)))
+    return compatibility_report(document, client_ip, budget)
+
+def compatibility_line(raw: bytes, client_ip: str, budget: ValidationBudget) -> bytes:
+    """One serialized report line; never raises, since it is written into a response already under way"""
+    try:
+        return compatibility_raw_document(raw, client_ip, budget).to_json_bytes() + b"\n"
+    except Exception as e:
+        logger.error("Compatibility report failed: %s", type(e).__name__, exc_info=True,
+                     extra=log_extra("compatibility.line_error"))
+        # The type name only: the message may quote the document, and that may not even encode
+        return compatibility_failure(f"Internal System Error: {type(e).__name__}").to_json_bytes() + b"\n"
+
+async def compatibility_lines(lines: List[bytes], client_ip: str, release) -> AsyncIterator[bytes]:
+    """One serialized report per line, each sent as soon as it is ready; awaits ``release`` when done"""
+    request_budget = ValidationBudget(REQUEST_BUDGET_SECONDS)
+    reports = {}  # identical lines are reported once (the first COMPATIBILITY_REUSE_LINES distinct ones)
+    try:
+        for line in lines:
+            report = reports.get(line)
+            if report is None:
+                report = await run_in_threadpool(compatibility_line, line, client_ip,
+                                                 request_budget.child(DOCUMENT_BUDGET_SECONDS))
+                if len(reports) < COMPATIBILITY_REUSE_LINES:
+                    reports[line] = report
+            yield report
+    finally:
+        await release()
+
+@app.post("/compatibility", response_model=Dict[str, Any], openapi_extra=body_openapi({"type": "object"}))
+async def compatibility_endpoint(request: Request, _: bool = Depends(verify_api_key)):
+    """Whether a document validates under v0.1, under v0.2 and under the v0.2 safety layer"""
+    client_ip = request.client.host
+    if not check_rate_limit(client_ip):
+        METRICS.inc("rate_limited")
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+    document = await read_payload(request)
+    if not isinstance(document, dict):
+        raise RequestValidationError([{
+            "type": "dict_type", "loc": ("body",), "msg": "Input should be a valid dictionary", "input": document
+        }])
+    document = sanitize_input(document)
+    METRICS.inc("total_requests")
+    try:
+        async with ADMISSION["single"].admit(estimate_cost(request_body_size(request), count_steps(document))):
+            budget = ValidationBudget(REQUEST_BUDGET_SECONDS).child(DOCUMENT_BUDGET_SECONDS)
+            record = await run_in_threadpool(compatibility_report, document, client_ip, budget)
+    except AdmissionRejected as rejection:
+        shed(rejection)
+    return json_response(record)
+
+@app.post("/compatibility/batch")
+async def compatibility_batch_endpoint(request: Request, _: bool = Depends(verify_api_key)):
+    """JSON Lines in (one document per line), one compatibility report per line out, in input order"""
+    client_ip = request.client.host
+    if not check_rate_limit(client_ip):
+        METRICS.inc("rate_limited")
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+    body = b"".join([chunk async for chunk in body_chunks(request, MAX_REQUEST_SIZE)])
+    lines = [line for line in body.splitlines() if line.strip()]
+    METRICS.inc("total_requests")
+    # The lane slot is held until the last report is sent, so it is taken here and released by the stream
+    admission = ADMISSION["batch"].admit(estimate_cost(len(body), 0, documents=len(lines)))
+    try:
+        await admission.__aenter__()
+    except AdmissionRejected as rejection:
+        shed(rejection)
+    released = False
+
+    async def release():
+        nonlocal released
+        if not released:
+            released = True
+            await admission.__aexit__(None, None, None)
+
+    # The background task covers a stream that never started (client gone before the first chunk)
+    return StreamingResponse(compatibility_lines(lines, client_ip, release), media_type="application/x-ndjson",
+                             background=BackgroundTask(release))
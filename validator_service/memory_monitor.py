@@ -0,0 +1,137 @@
+"""Background memory sampling and on-demand tracemalloc snapshots.
+
+``MemorySampler`` records RSS plus a set of cheap gauges (container sizes)
+into a ring buffer from a daemon thread, so health probes read the latest
+sample instead of querying the OS. ``TracemallocSession`` starts and stops
+allocation tracing and reports the top allocation sites, diffed against the
+previous snapshot.
+"""
+
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+_IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+class MemorySampler:
+    """Samples RSS and gauges every ``interval`` seconds into a bounded ring buffer"""
+
+    def __init__(self, interval: float, capacity: int, gauges: Optional[Dict[str, Callable[[], int]]] = None):
+        self.interval = interval
+        self.samples = deque(maxlen=capacity)
+        self.gauges = gauges or {}
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork_in_child)
+
+    def sample(self) -> dict:
+        entry = {"ts": time.time(), "rss_mb": round(self._process.memory_info().rss / 1024 / 1024, 2)}
+        for name, gauge in self.gauges.items():
+            try:
+                entry[name] = gauge()
+            except RuntimeError:  # container resized while we looked; skip this round
+                entry[name] = None
+        self.samples.append(entry)
+        return entry
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="ksml-memory-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _after_fork_in_child(self):
+        # Threads do not survive fork; the child samples its own process
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self.samples.clear()
+        if self._thread is not None:
+            self._thread = None
+            self.start()
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[dict]:
+        if not self.samples:
+            return None
+        last = self.samples[-1]
+        if max_age is not None and time.time() - last["ts"] > max_age:
+            return None
+        return last
+
+    def history(self, limit: Optional[int] = None) -> List[dict]:
+        samples = list(self.samples)
+        return samples[-limit:] if limit else samples
+
+
+def _site(stat) -> dict:
+    frame = stat.traceback[0]
+    return {"file": frame.filename, "line": frame.lineno}
+
+
+class TracemallocSession:
+    """Start/stop allocation tracing and report top sites between snapshots"""
+
+    def __init__(self):
+        self._previous = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> dict:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._previous = None
+            return self.status()
+
+    def stop(self) -> dict:
+        with self._lock:
+            tracemalloc.stop()
+            self._previous = None
+            return self.status()
+
+    def status(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {"tracing": tracemalloc.is_tracing(), "traced_kb": current // 1024, "peak_kb": peak // 1024}
+
+    def snapshot(self, limit: int = 20) -> dict:
+        """Top allocation sites now, and the largest changes since the previous snapshot"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc is not running")
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, pattern) for pattern in _IGNORED_FILES]
+            )
+
+            top = [
+                {**_site(stat), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:limit]
+            ]
+
+            diff = None
+            if self._previous is not None:
+                diff = [
+                    {**_site(stat), "size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+                    for stat in snapshot.compare_to(self._previous, "lineno")[:limit]
+                ]
+            self._previous = snapshot
+
+            return {**self.status(), "top": top, "diff": diff}
@@ -0,0 +1,136 @@
+"""Rewrite KSML v0.1 documents as v0.2 documents, recording every change.
+
+v0.2 is additive, so most documents only need the version tag. The
+rewrites beyond that target what v0.2 enforces or deprecates:
+
+- ``metadata.id`` that is not a uuid becomes a uuid5 derived from it (the
+  same legacy id always maps to the same uuid); the original is kept in
+  ``extensions.x-legacy.id``.
+- ``metadata.created_at`` in a common non-RFC 3339 shape (date only, space
+  separator, no seconds, no offset, ``+0530``, ``UTC``) is normalized; an
+  absent offset is taken as UTC.
+- ``metadata`` fields v0.2 does not define move to ``extensions.x-legacy.metadata``.
+- Steps with ``on_failure: "retry"`` and no ``retry_policy`` get the policy
+  v0.1 implied: 1 + ``configurations.max_retries`` attempts, capped at 5.
+
+Anything else (size limits, suspicious content) is left for validation to
+report: the migrator never drops data it cannot place.
+"""
+
+import copy
+import re
+import uuid
+from typing import List, NamedTuple
+
+from format_checks import is_date_time, is_uuid
+from step_graph import DEFAULT_MAX_RETRIES
+
+SOURCE_VERSION = "0.1.0"
+TARGET_VERSION = "0.2.0"
+LEGACY_EXTENSION = "x-legacy"
+LEGACY_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://schemas.ksml.io/v0.1/ksml.json")
+MAX_ATTEMPTS = 5  # retry_policy.max_attempts maximum in v0.2
+METADATA_FIELDS = ("id", "author", "title", "description", "created_at", "tags", "version", "environment",
+                   "dependencies")
+
+_LOOSE_DATE_TIME = re.compile(
+    r"\s*(\d{4}-\d{2}-\d{2})"
+    r"(?:[Tt ](\d{2}:\d{2})(:\d{2}(?:\.\d+)?)?)?"
+    r"\s*(Z|z|UTC|GMT|[+-]\d{2}:?\d{2})?\s*\Z",
+    re.ASCII,  # 0-9 only, as format_checks.is_date_time requires
+)
+
+
+class MigrationError(ValueError):
+    """The input cannot be migrated at all (not an object, unknown version)"""
+
+
+class Change(NamedTuple):
+    path: str
+    action: str  # "set", "add" or "move"
+    details: str
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class Migration(NamedTuple):
+    document: dict
+    changes: List[Change]
+
+    @property
+    def migrated(self) -> bool:
+        return bool(self.changes)
+
+
+def normalize_date_time(value: str):
+    """``value`` as RFC 3339, or None when it is not a recognizable date-time"""
+    match = _LOOSE_DATE_TIME.match(value)
+    if match is None:
+        return None
+    date, hours_minutes, seconds, offset = match.groups()
+    if offset is None or offset.upper() in ("Z", "UTC", "GMT"):
+        offset = "Z"
+    elif ":" not in offset:
+        offset = f"{offset[:3]}:{offset[3:]}"
+    normalized = f"{date}T{hours_minutes or '00:00'}{seconds or ':00'}{offset}"
+    return normalized if is_date_time(normalized) else None
+
+
+def _legacy(document: dict) -> dict:
+    extensions = document.get("extensions")
+    if not isinstance(extensions, dict):
+        extensions = document["extensions"] = {}
+    legacy = extensions.get(LEGACY_EXTENSION)
+    if not isinstance(legacy, dict):
+        legacy = extensions[LEGACY_EXTENSION] = {}
+    return legacy
+
+
+def migrate_v01(source: dict) -> Migration:
+    """A v0.2 rewrite of a v0.1 document; v0.2 documents come back unchanged"""
+    if not isinstance(source, dict):
+        raise MigrationError("Document must be a JSON object")
+    version = source.get("ksml_version")
+    if version == TARGET_VERSION:
+        return Migration(source, [])
+    if version != SOURCE_VERSION:
+        raise MigrationError(f"Cannot migrate ksml_version {version!r}; expected '{SOURCE_VERSION}'")
+
+    document = copy.deepcopy(source)
+    changes = [Change("ksml_version", "set", f"'{SOURCE_VERSION}' -> '{TARGET_VERSION}'")]
+    document["ksml_version"] = TARGET_VERSION
+
+    metadata = document.get("metadata")
+    if isinstance(metadata, dict):
+        doc_id = metadata.get("id")
+        if isinstance(doc_id, str) and not is_uuid(doc_id):
+            metadata["id"] = str(uuid.uuid5(LEGACY_ID_NAMESPACE, doc_id))
+            _legacy(document)["id"] = doc_id
+            changes.append(Change("metadata.id", "set", f"'{doc_id}' is not a uuid; derived {metadata['id']}"))
+            changes.append(Change(f"extensions.{LEGACY_EXTENSION}.id", "add", "original metadata.id"))
+
+        created_at = metadata.get("created_at")
+        if isinstance(created_at, str) and not is_date_time(created_at):
+            normalized = normalize_date_time(created_at)
+            if normalized is not None:
+                metadata["created_at"] = normalized
+                changes.append(Change("metadata.created_at", "set", f"'{created_at}' -> '{normalized}'"))
+
+        for key in [key for key in metadata if key not in METADATA_FIELDS]:
+            _legacy(document).setdefault("metadata", {})[key] = metadata.pop(key)
+            changes.append(Change(f"metadata.{key}", "move", f"to extensions.{LEGACY_EXTENSION}.metadata.{key}"))
+
+    configurations = document.get("configurations")
+    max_retries = configurations.get("max_retries") if isinstance(configurations, dict) else None
+    if not isinstance(max_retries, int) or isinstance(max_retries, bool) or max_retries < 0:
+        max_retries = DEFAULT_MAX_RETRIES
+    attempts = min(1 + max_retries, MAX_ATTEMPTS)
+    steps = document.get("steps")
+    for i, step in enumerate(steps if isinstance(steps, list) else []):
+        if isinstance(step, dict) and step.get("on_failure") == "retry" and "retry_policy" not in step:
+            step["retry_policy"] = {"max_attempts": attempts}
+            details = f"max_attempts {attempts} (1 + max_retries {max_retries}"
+            details += f", capped at {MAX_ATTEMPTS})" if 1 + max_retries > MAX_ATTEMPTS else ")"
+            changes.append(Change(f"steps.{i}.retry_policy", "add", details))
+    return Migration(document, changes)
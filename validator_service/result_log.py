@@ -0,0 +1,110 @@
+"""Bounded in-memory log of recent validation outcomes (history without a database).
+
+Entries live in a fixed-size ring addressed by a monotonically increasing
+sequence number, so a reader can walk the log in small chunks while writers
+keep appending: entries overwritten mid-scan are simply skipped, and a scan
+never copies more than one chunk.
+"""
+
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+
+from results import ResultRecord
+
+
+class LogEntry:
+    __slots__ = ("ts", "document_id", "author", "document_hash", "duration_ms", "result")
+
+    def __init__(self, ts: float, document_id: Optional[str], author: Optional[str], document_hash: str,
+                 duration_ms: float, result: ResultRecord):
+        self.ts = ts
+        self.document_id = document_id
+        self.author = author
+        self.document_hash = document_hash
+        self.duration_ms = duration_ms
+        self.result = result
+
+    def to_row(self) -> dict:
+        return {
+            "ts": self.ts,
+            "document_id": self.document_id,
+            "author": self.author,
+            "document_hash": self.document_hash,
+            "ksml_version": self.result.ksml_version,
+            "valid": self.result.valid,
+            "duration_ms": self.duration_ms,
+            "errors": [e.to_dict() for e in self.result.errors],
+        }
+
+
+def document_identity(document) -> Tuple[Optional[str], Optional[str]]:
+    """``metadata.id`` and ``metadata.author`` when the document declares them"""
+    metadata = document.get("metadata") if isinstance(document, dict) else None
+    if not isinstance(metadata, dict):
+        return None, None
+    doc_id, author = metadata.get("id"), metadata.get("author")
+    return (doc_id if isinstance(doc_id, str) else None), (author if isinstance(author, str) else None)
+
+
+class ResultLog:
+    """Ring buffer of the last ``capacity`` validations"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(capacity, 1)
+        self._ring = [None] * self.capacity
+        self._next = 0  # sequence number of the next entry
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._next, self.capacity)
+
+    def record(self, document, document_hash: str, result: ResultRecord, duration_ms: float):
+        entry = LogEntry(time.time(), *document_identity(document), document_hash, round(duration_ms, 3), result)
+        with self._lock:
+            self._ring[self._next % self.capacity] = entry
+            self._next += 1
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "entries": len(self), "capacity": self.capacity}
+
+    def _chunks(self, newest_first: bool, chunk: int) -> Iterator[list]:
+        with self._lock:
+            low = max(0, self._next - self.capacity)
+            high = self._next  # rows recorded after the scan started are not included
+        while low < high:
+            with self._lock:
+                low = max(low, self._next - self.capacity)  # skip what was overwritten meanwhile
+                if low >= high:
+                    return
+                if newest_first:
+                    start = max(low, high - chunk)
+                    batch = [self._ring[s % self.capacity] for s in range(high - 1, start - 1, -1)]
+                    high = start
+                else:
+                    stop = min(high, low + chunk)
+                    batch = [self._ring[s % self.capacity] for s in range(low, stop)]
+                    low = stop
+            yield batch
+
+    def scan(self, since: Optional[float] = None, until: Optional[float] = None, code: Optional[str] = None,
+             document_id: Optional[str] = None, author: Optional[str] = None, limit: Optional[int] = None,
+             newest_first: bool = False, chunk: int = 256) -> Iterator[dict]:
+        """Matching entries as export rows, oldest first unless ``newest_first``"""
+        emitted = 0
+        for batch in self._chunks(newest_first, chunk):
+            for entry in batch:
+                if since is not None and entry.ts < since:
+                    continue
+                if until is not None and entry.ts >= until:
+                    continue
+                if document_id is not None and entry.document_id != document_id:
+                    continue
+                if author is not None and entry.author != author:
+                    continue
+                if code is not None and not any(e.code == code for e in entry.result.errors):
+                    continue
+                yield entry.to_row()
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    return
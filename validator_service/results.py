@@ -0,0 +1,171 @@
+"""Compact internal result objects with direct JSON serialization.
+
+The validator builds these slotted records instead of pydantic models and
+writes them straight to JSON bytes. The encoding is byte-for-byte what
+FastAPI produces for the ``ValidationResult`` / ``BatchValidationResult``
+response models (compact separators, ``ensure_ascii=False``), so the wire
+format does not change.
+"""
+
+import json
+from json.encoder import encode_basestring
+from typing import Dict, List, Optional
+
+
+class ErrorRecord:
+    __slots__ = ("code", "message", "path", "severity")
+
+    def __init__(self, code: str, message: str, path: str, severity: str):
+        self.code = code
+        self.message = message
+        self.path = path
+        self.severity = severity
+
+    def to_dict(self) -> dict:
+        return {"code": self.code, "message": self.message, "path": self.path, "severity": self.severity}
+
+    def to_json(self) -> str:
+        return (
+            '{"code":' + encode_basestring(self.code)
+            + ',"message":' + encode_basestring(self.message)
+            + ',"path":' + encode_basestring(self.path)
+            + ',"severity":' + encode_basestring(self.severity) + "}"
+        )
+
+
+class ResultRecord:
+    __slots__ = ("valid", "ksml_version", "errors", "warnings", "_json")
+
+    def __init__(self, valid: bool, ksml_version: str, errors: List[ErrorRecord], warnings: List[str]):
+        self.valid = valid
+        self.ksml_version = ksml_version
+        self.errors = errors
+        self.warnings = warnings
+        self._json = None
+
+    def to_dict(self) -> dict:
+        return {
+            "valid": self.valid,
+            "ksml_version": self.ksml_version,
+            "errors": [e.to_dict() for e in self.errors],
+            "warnings": list(self.warnings),
+        }
+
+    def to_json_bytes(self) -> bytes:
+        """Serialized once; shared results (coalesced or deduplicated) reuse the bytes"""
+        if self._json is None:
+            self._json = (
+                '{"valid":' + ("true" if self.valid else "false")
+                + ',"ksml_version":' + encode_basestring(self.ksml_version)
+                + ',"errors":[' + ",".join([e.to_json() for e in self.errors])
+                + '],"warnings":[' + ",".join([encode_basestring(w) for w in self.warnings])
+                + "]}"
+            ).encode("utf-8")
+        return self._json
+
+
+class BatchRecord:
+    __slots__ = ("results", "summary")
+
+    def __init__(self, results: List[ResultRecord], summary: Dict[str, int]):
+        self.results = results
+        self.summary = summary
+
+    def to_json_bytes(self) -> bytes:
+        return (
+            b'{"results":[' + b",".join([r.to_json_bytes() for r in self.results])
+            + b'],"summary":' + json.dumps(self.summary, separators=(",", ":")).encode("utf-8") + b"}"
+        )
+
+
+class ArchiveRecord:
+    """Results keyed by archive path"""
+    __slots__ = ("results", "summary")
+
+    def __init__(self, results: Dict[str, ResultRecord], summary: Dict[str, int]):
+        self.results = results
+        self.summary = summary
+
+    def to_json_bytes(self) -> bytes:
+        return (
+            b'{"results":{' + b",".join([
+                encode_basestring(path).encode("utf-8") + b":" + r.to_json_bytes() for path, r in self.results.items()
+            ])
+            + b'},"summary":' + json.dumps(self.summary, separators=(",", ":")).encode("utf-8") + b"}"
+        )
+
+
+class PlanRecord:
+    """A validation result with the execution plan of a valid document"""
+    __slots__ = ("document_hash", "result", "plan")
+
+    def __init__(self, document_hash: str, result: ResultRecord, plan: Optional[dict]):
+        self.document_hash = document_hash
+        self.result = result
+        self.plan = plan
+
+    def to_json_bytes(self) -> bytes:
+        return (
+            b'{"document_hash":' + encode_basestring(self.document_hash).encode("utf-8")
+            + b',"result":' + self.result.to_json_bytes()
+            + b',"plan":' + json.dumps(self.plan, separators=(",", ":")).encode("utf-8") + b"}"
+        )
+
+
+class MigrationRecord:
+    """A migrated document, its changes, and the validation result of the migrated document"""
+    __slots__ = ("document", "changes", "result")
+
+    def __init__(self, document: Optional[dict], changes: list, result: ResultRecord):
+        self.document = document  # None when the input could not be migrated
+        self.changes = changes
+        self.result = result
+
+    def to_dict(self) -> dict:
+        return {
+            "document": self.document,
+            "changes": [change.to_dict() for change in self.changes],
+            "result": self.result.to_dict(),
+        }
+
+    def to_json_bytes(self) -> bytes:
+        return (
+            b'{"document":' + json.dumps(self.document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            + b',"changes":' + json.dumps([c.to_dict() for c in self.changes], ensure_ascii=False,
+                                          separators=(",", ":")).encode("utf-8")
+            + b',"result":' + self.result.to_json_bytes() + b"}"
+        )
+
+
+class CompatibilityRecord:
+    """Verdicts for one document under each version: "v0.1", "v0.2" and "v0.2-safety" (the safety layer alone)"""
+    __slots__ = ("document_hash", "declared_version", "verdicts")
+
+    def __init__(self, document_hash: Optional[str], declared_version: str, verdicts: Dict[str, ResultRecord]):
+        self.document_hash = document_hash  # None when the input could not be parsed
+        self.declared_version = declared_version
+        self.verdicts = verdicts
+
+    @property
+    def upgrade_ready(self) -> bool:
+        """Valid as v0.2, safety layer included"""
+        return self.verdicts["v0.2"].valid
+
+    def to_dict(self) -> dict:
+        return {
+            "document_hash": self.document_hash,
+            "declared_version": self.declared_version,
+            "verdicts": {version: result.to_dict() for version, result in self.verdicts.items()},
+            "upgrade_ready": self.upgrade_ready,
+        }
+
+    def to_json_bytes(self) -> bytes:
+        return (
+            b'{"document_hash":' + json.dumps(self.document_hash).encode("utf-8")
+            + b',"declared_version":' + encode_basestring(self.declared_version).encode("utf-8")
+            + b',"verdicts":{' + b",".join([
+                encode_basestring(version).encode("utf-8") + b":" + result.to_json_bytes()
+                for version, result in self.verdicts.items()
+            ])
+            + b'},"upgrade_ready":' + (b"true" if self.upgrade_ready else b"false") + b"}"
+        )
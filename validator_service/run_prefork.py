@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Production launcher: pre-warmed parent, N forked uvicorn workers on one socket.
+
+The parent loads the schemas, compiles the validators and validates the
+examples/ corpus once, then freezes its heap so the forked workers share those
+pages copy-on-write. Workers that die are restarted.
+
+Usage:
+    python run_prefork.py --port 8002 --workers 4
+"""
+
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+EXAMPLES_DIR = Path(__file__).parent.parent / "examples"
+RESTART_BACKOFF_MAX = 30  # seconds
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the KSML validator with prefork workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="warning")
+    return parser.parse_args()
+
+
+def warm_up(main):
+    """Compile validators and exercise every code path once with the examples corpus"""
+    for version in main.SUPPORTED_VERSIONS:
+        main.get_validator(version, main.get_schema_for_version(version))
+
+    warmed = 0
+    for path in sorted(EXAMPLES_DIR.glob("*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            document = json.load(f)
+        if isinstance(document, dict):
+            main.validate_single_document(document, "warmup")
+            warmed += 1
+    return warmed
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, log_level: str):
+    import uvicorn
+
+    gc.enable()
+    config = uvicorn.Config(app, log_level=log_level, access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    def __init__(self, app, sock: socket.socket, workers: int, log_level: str):
+        self.app = app
+        self.sock = sock
+        self.size = workers
+        self.log_level = log_level
+        self.children = {}  # pid -> spawn time
+        self.stopping = False
+        self.backoff = 0.0
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(self.app, self.sock, self.log_level)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for _ in range(self.size):
+            self.spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+
+            lifetime = time.monotonic() - started
+            print(f"Worker {pid} exited with status {status} after {lifetime:.1f}s; restarting")
+            # Back off when workers die right after starting, to avoid a fork storm
+            self.backoff = min(RESTART_BACKOFF_MAX, self.backoff * 2 or 0.5) if lifetime < 5 else 0.0
+            if self.backoff:
+                time.sleep(self.backoff)
+            if not self.stopping:
+                self.spawn()
+
+
+def main():
+    args = parse_args()
+
+    if not hasattr(os, "fork"):
+        print("Prefork mode needs os.fork(); falling back to a single worker")
+        import uvicorn
+        from main import app
+        uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level)
+        return
+
+    # Workers aggregate their counters through one shared file
+    own_metrics_file = "KSML_METRICS_FILE" not in os.environ
+    os.environ.setdefault("KSML_METRICS_FILE", os.path.join(tempfile.gettempdir(), f"ksml-metrics-{os.getpid()}.mmap"))
+    os.environ.setdefault("KSML_METRICS_SLOTS", str(max(args.workers * 2, 8)))
+
+    # Keep the collector from touching (and un-sharing) warmed pages before the fork
+    gc.disable()
+    import main as validator_main
+
+    started = time.perf_counter()
+    warmed = warm_up(validator_main)
+    # The supervisor serves nothing; drop its warm-up counts and metrics slot
+    validator_main.METRICS.release()
+    gc.collect()
+    gc.freeze()
+    print(f"Warmed {warmed} documents in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    print(f"Starting {args.workers} workers on http://{args.host}:{args.port}")
+    Supervisor(validator_main.app, sock, args.workers, args.log_level).run()
+    sock.close()
+    if own_metrics_file:
+        os.unlink(os.environ["KSML_METRICS_FILE"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Counters shared between worker processes through an mmap'd file.
+
+The file holds one fixed-size slot per worker. Each process only ever writes
+its own slot, so cross-process updates need no locking; readers sum all slots
+to get the aggregate. Slots of workers that have exited are folded into a
+reserved "retired" slot when reclaimed, so totals survive worker restarts.
+
+Without ``path`` the store falls back to a private anonymous mapping, which
+behaves exactly like the old per-process dict.
+"""
+
+import atexit
+import mmap
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import psutil
+
+try:
+    import fcntl
+except ImportError:  # Windows: slot claiming is unlocked but still pid-checked
+    fcntl = None
+
+MAGIC = b"KSMLMET1"
+HEADER_WORDS = 8  # magic + nslots + nfields + layout checksum, padded
+SLOT_META_WORDS = 2  # pid, start time (microseconds)
+RETIRED_SLOT = 0
+RETIRED_PID = -1
+
+
+class SharedMetrics:
+    """Dict-like view of this worker's counters plus cross-worker aggregates"""
+
+    def __init__(self, counters: Iterable[str], gauges: Optional[Dict[str, float]] = None,
+                 path: Optional[str] = None, slots: int = 64):
+        self.counters = list(counters)
+        self._index = {name: i for i, name in enumerate(self.counters)}
+        self._local = dict(gauges or {})
+        self._order = self.counters + list(self._local)
+        self.path = path
+        self.nslots = slots + 1  # plus the retired slot
+        self._slot_words = SLOT_META_WORDS + len(self.counters)
+        self._layout = zlib.crc32(",".join(self.counters).encode("utf-8"))
+        self._lock = threading.Lock()
+        self._open()
+        atexit.register(self._retire)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork_in_child)
+
+    # --- mapping / slot management ---
+    @property
+    def _size(self) -> int:
+        return (HEADER_WORDS + self.nslots * self._slot_words) * 8
+
+    def _open(self):
+        self.pid = os.getpid()
+        if self.path is None:
+            self._mmap = mmap.mmap(-1, self._size)
+            self._words = memoryview(self._mmap).cast("q")
+            self._init_header()
+            self._base = self._claim_slot()
+            return
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            self._flock(fd, True)
+            try:
+                if os.fstat(fd).st_size != self._size:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self._size)
+                self._mmap = mmap.mmap(fd, self._size)
+                self._words = memoryview(self._mmap).cast("q")
+                if self._mmap[:8] != MAGIC or self._words[3] != self._layout:
+                    self._mmap[:] = bytes(self._size)
+                    self._init_header()
+                self._base = self._claim_slot()
+            finally:
+                self._flock(fd, False)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _flock(fd: int, lock: bool):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if lock else fcntl.LOCK_UN)
+
+    def _init_header(self):
+        self._mmap[:8] = MAGIC
+        self._words[1] = self.nslots
+        self._words[2] = len(self.counters)
+        self._words[3] = self._layout
+        self._words[self._slot_base(RETIRED_SLOT)] = RETIRED_PID
+
+    def _slot_base(self, slot: int) -> int:
+        return HEADER_WORDS + slot * self._slot_words
+
+    def _claim_slot(self) -> int:
+        """Take a free slot, or one whose owner has died (folding its counts into retired)"""
+        for slot in range(1, self.nslots):
+            base = self._slot_base(slot)
+            owner = self._words[base]
+            if owner != 0 and owner != self.pid and psutil.pid_exists(owner):
+                continue
+            if owner != 0:
+                self._fold_into_retired(base)
+            self._words[base] = self.pid
+            self._words[base + 1] = int(time.time() * 1e6)
+            for i in range(len(self.counters)):
+                self._words[base + SLOT_META_WORDS + i] = 0
+            return base
+        raise RuntimeError(f"No free metrics slot in {self.path} ({self.nslots - 1} workers)")
+
+    def _fold_into_retired(self, base: int):
+        retired = self._slot_base(RETIRED_SLOT) + SLOT_META_WORDS
+        for i in range(len(self.counters)):
+            self._words[retired + i] += self._words[base + SLOT_META_WORDS + i]
+
+    def _retire(self):
+        """On exit, hand this worker's counts to the retired slot and free the slot"""
+        if self.path is None or os.getpid() != self.pid:
+            return
+        fd = os.open(self.path, os.O_RDWR)
+        try:
+            self._flock(fd, True)
+            try:
+                if self._words[self._base] == self.pid:
+                    self._fold_into_retired(self._base)
+                    self._words[self._base] = 0
+            finally:
+                self._flock(fd, False)
+        finally:
+            os.close(fd)
+
+    def _after_fork_in_child(self):
+        # Re-map (an anonymous mapping would stay shared with the parent) and claim our own slot
+        self._lock = threading.Lock()
+        self._open()
+
+    def release(self):
+        """Give up this process's slot without counting it (e.g. a supervisor that serves nothing)"""
+        with self._lock:
+            if self._words[self._base] == self.pid:
+                self._words[self._base] = 0
+
+    # --- dict-like access to this worker's values ---
+    def inc(self, name: str, amount: int = 1):
+        with self._lock:
+            self._words[self._base + SLOT_META_WORDS + self._index[name]] += amount
+
+    def __getitem__(self, name: str):
+        i = self._index.get(name)
+        if i is None:
+            return self._local[name]
+        return self._words[self._base + SLOT_META_WORDS + i]
+
+    def __setitem__(self, name: str, value):
+        i = self._index.get(name)
+        if i is None:
+            self._local[name] = value
+        else:
+            with self._lock:
+                self._words[self._base + SLOT_META_WORDS + i] = value
+
+    def items(self):
+        return [(name, self[name]) for name in self._order]
+
+    # --- cross-worker views ---
+    def aggregate(self) -> Dict[str, int]:
+        """Counters summed over every live, exited and retired worker"""
+        totals = [0] * len(self.counters)
+        for slot in range(self.nslots):
+            base = self._slot_base(slot)
+            if self._words[base] == 0:
+                continue
+            for i in range(len(self.counters)):
+                totals[i] += self._words[base + SLOT_META_WORDS + i]
+        return dict(zip(self.counters, totals))
+
+    def workers(self) -> List[dict]:
+        """Per-worker counters for every occupied slot"""
+        result = []
+        for slot in range(1, self.nslots):
+            base = self._slot_base(slot)
+            pid = self._words[base]
+            if pid == 0:
+                continue
+            entry = {"pid": pid, "alive": psutil.pid_exists(pid), "started_at": self._words[base + 1] / 1e6}
+            for i, name in enumerate(self.counters):
+                entry[name] = self._words[base + SLOT_META_WORDS + i]
+            result.append(entry)
+        return result
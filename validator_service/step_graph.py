@@ -0,0 +1,259 @@
+"""Step dependency graph: duplicate ids, cycles, topological order and stages.
+
+Steps are an ordered sequence, so by default each step depends on the one
+before it. A step can instead name the steps it needs with a ``depends_on``
+condition whose expression lists step ids (comma or space separated; empty
+means no dependencies). The declared ids replace the implicit predecessor,
+which is what lets independent steps share a stage.
+
+Everything here is linear in steps plus references: ids are indexed once,
+Kahn's algorithm yields the order and the stage of every step, and only when
+it cannot finish (a cycle) does Tarjan's algorithm name the steps involved.
+"""
+
+import re
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+DEPENDS_ON = "depends_on"
+DEFAULT_TIMEOUT_SECONDS = 60  # configurations.timeout_seconds default
+DEFAULT_MAX_RETRIES = 3  # configurations.max_retries default
+MAX_LISTED = 10  # steps named in a cycle message
+
+_ID_SEPARATORS = re.compile(r"[,\s]+")
+
+
+class GraphIssue(NamedTuple):
+    path: str
+    details: str
+
+
+class StepPlan:
+    __slots__ = ("index", "id", "name", "depends_on", "stage", "worst_case_seconds", "earliest_start",
+                 "earliest_finish")
+
+    def __init__(self, index: int, step_id: Optional[str], name: Optional[str], depends_on: List[int]):
+        self.index = index
+        self.id = step_id
+        self.name = name
+        self.depends_on = depends_on
+        self.stage = 0
+        self.worst_case_seconds = 0.0
+        self.earliest_start = 0.0
+        self.earliest_finish = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "id": self.id,
+            "name": self.name,
+            "depends_on": self.depends_on,
+            "stage": self.stage,
+            "worst_case_seconds": self.worst_case_seconds,
+            "earliest_start": self.earliest_start,
+            "earliest_finish": self.earliest_finish,
+        }
+
+
+class ExecutionPlan:
+    """Topological order, parallel stages and the worst-case critical path"""
+    __slots__ = ("steps", "order", "stages", "critical_path", "worst_case_seconds")
+
+    def __init__(self, steps: List[StepPlan], order: List[int], stages: List[List[int]], critical_path: List[int],
+                 worst_case_seconds: float):
+        self.steps = steps
+        self.order = order
+        self.stages = stages
+        self.critical_path = critical_path
+        self.worst_case_seconds = worst_case_seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "order": self.order,
+            "stages": self.stages,
+            "critical_path": self.critical_path,
+            "worst_case_seconds": self.worst_case_seconds,
+            "steps": [step.to_dict() for step in self.steps],
+        }
+
+
+class GraphAnalysis(NamedTuple):
+    issues: List[GraphIssue]
+    plan: Optional[ExecutionPlan]  # None when the graph has issues
+
+
+def _label(steps: List[StepPlan], index: int) -> str:
+    return steps[index].id if steps[index].id is not None else f"steps.{index}"
+
+
+def _number(value, default: float) -> float:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0 else default
+
+
+def worst_case_seconds(step: dict, configurations: dict) -> float:
+    """Every attempt runs to its timeout, with the backoff between attempts"""
+    timeout = _number(step.get("timeout_override"), _number(configurations.get("timeout_seconds"), DEFAULT_TIMEOUT_SECONDS))
+    retry_policy = step.get("retry_policy") if isinstance(step.get("retry_policy"), dict) else {}
+    if "max_attempts" in retry_policy:
+        attempts = max(int(_number(retry_policy["max_attempts"], 1)), 1)
+    elif step.get("on_failure") == "retry":
+        attempts = 1 + int(_number(configurations.get("max_retries"), DEFAULT_MAX_RETRIES))
+    else:
+        attempts = 1
+    backoff = _number(retry_policy.get("backoff_seconds"), 0)
+    return float(attempts * timeout + (attempts - 1) * backoff)
+
+
+def build_graph(raw_steps: List[Any]) -> Tuple[List[StepPlan], List[GraphIssue]]:
+    """Index step ids and resolve every step's dependencies to step positions"""
+    issues = []
+    by_id: Dict[str, int] = {}
+    for i, step in enumerate(raw_steps):
+        step_id = step.get("id") if isinstance(step, dict) else None
+        if not isinstance(step_id, str):
+            continue
+        if step_id in by_id:
+            issues.append(GraphIssue(f"steps.{i}.id", f"Duplicate step id '{step_id}' (already used by steps.{by_id[step_id]})"))
+        else:
+            by_id[step_id] = i
+
+    steps = []
+    for i, step in enumerate(raw_steps):
+        step = step if isinstance(step, dict) else {}
+        declared = None
+        seen = set()
+        conditions = step.get("conditions")
+        for j, condition in enumerate(conditions if isinstance(conditions, list) else []):
+            if not isinstance(condition, dict) or condition.get("type") != DEPENDS_ON:
+                continue
+            expression = condition.get("expression")
+            if not isinstance(expression, str):
+                continue
+            declared = [] if declared is None else declared
+            for ref in _ID_SEPARATORS.split(expression.strip()):
+                if not ref:
+                    continue
+                target = by_id.get(ref)
+                if target is None:
+                    issues.append(GraphIssue(f"steps.{i}.conditions.{j}.expression", f"Unknown step id '{ref}' in depends_on"))
+                elif target not in seen:
+                    seen.add(target)
+                    declared.append(target)
+        if declared is None:
+            declared = [i - 1] if i > 0 else []
+        step_id, name = step.get("id"), step.get("name")
+        steps.append(StepPlan(i, step_id if isinstance(step_id, str) else None, name if isinstance(name, str) else None,
+                              declared))
+    return steps, issues
+
+
+def strongly_connected(steps: List[StepPlan], nodes: List[int]) -> List[List[int]]:
+    """Tarjan's algorithm (iterative) over ``nodes``; components of a cycle, each sorted"""
+    members = set(nodes)
+    index_of: Dict[int, int] = {}
+    low: Dict[int, int] = {}
+    on_stack = set()
+    stack: List[int] = []
+    components = []
+    counter = 0
+    for root in nodes:
+        if root in index_of:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, edge = work.pop()
+            if edge == 0:
+                index_of[node] = low[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack.add(node)
+            deps = steps[node].depends_on
+            recursed = False
+            while edge < len(deps):
+                dep = deps[edge]
+                edge += 1
+                if dep not in members:
+                    continue
+                if dep not in index_of:
+                    work.append((node, edge))
+                    work.append((dep, 0))
+                    recursed = True
+                    break
+                if dep in on_stack:
+                    low[node] = min(low[node], index_of[dep])
+            if recursed:
+                continue
+            if low[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in steps[node].depends_on:
+                    components.append(sorted(component))
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+    return sorted(components)
+
+
+def analyze_steps(document: dict) -> GraphAnalysis:
+    """Issues of the step graph, and the execution plan when there are none"""
+    raw_steps = document.get("steps") if isinstance(document, dict) else None
+    if not isinstance(raw_steps, list):
+        return GraphAnalysis([], None)
+    steps, issues = build_graph(raw_steps)
+
+    # Kahn's algorithm: order, and each step's stage (longest chain of dependencies before it)
+    dependents: List[List[int]] = [[] for _ in steps]
+    waiting = [len(step.depends_on) for step in steps]
+    for step in steps:
+        for dep in step.depends_on:
+            dependents[dep].append(step.index)
+    ready = deque(i for i, count in enumerate(waiting) if count == 0)
+    order = []
+    while ready:
+        node = ready.popleft()
+        order.append(node)
+        for dependent in dependents[node]:
+            steps[dependent].stage = max(steps[dependent].stage, steps[node].stage + 1)
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                ready.append(dependent)
+
+    if len(order) < len(steps):
+        for component in strongly_connected(steps, [i for i, count in enumerate(waiting) if count > 0]):
+            cycle = ", ".join(_label(steps, i) for i in component[:MAX_LISTED])
+            if len(component) > MAX_LISTED:
+                cycle += f" and {len(component) - MAX_LISTED} more"
+            issues.append(GraphIssue(f"steps.{component[0]}", f"Circular dependency between steps: {cycle}"))
+    if issues:
+        return GraphAnalysis(sorted(issues), None)
+
+    configurations = document.get("configurations")
+    configurations = configurations if isinstance(configurations, dict) else {}
+    for node in order:
+        step = steps[node]
+        step.worst_case_seconds = worst_case_seconds(raw_steps[node] if isinstance(raw_steps[node], dict) else {},
+                                                     configurations)
+        step.earliest_start = max((steps[dep].earliest_finish for dep in step.depends_on), default=0.0)
+        step.earliest_finish = step.earliest_start + step.worst_case_seconds
+
+    stages: List[List[int]] = [[] for _ in range(max((s.stage for s in steps), default=-1) + 1)]
+    for step in steps:
+        stages[step.stage].append(step.index)
+
+    critical_path = []
+    if steps:
+        node = max(order, key=lambda i: steps[i].earliest_finish)
+        while True:
+            critical_path.append(node)
+            deps = steps[node].depends_on
+            if not deps:
+                break
+            node = max(deps, key=lambda i: steps[i].earliest_finish)
+        critical_path.reverse()
+    total = max((s.earliest_finish for s in steps), default=0.0)
+    return GraphAnalysis([], ExecutionPlan(steps, order, stages, critical_path, total))